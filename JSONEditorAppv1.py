@@ -1,15 +1,26 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import json
-import csv
-import xml.etree.ElementTree as ET
 import os
+from multifile.convert import json_to_xml, write_records_csv
+from multifile.jsonio import iter_parse_json, iter_read_text, write_json_text
+from multifile.loader import BackgroundLoader
+from multifile.ui.highlight import JSONHighlighter
+from multifile.xmlwrite import write_json_element, xml_file
+
+# Idle time after the last keystroke before the text is validated
+VALIDATE_DELAY_MS = 500
 
 
 class JSONEditorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("JSON Editor & Converter")
+        self.loader = BackgroundLoader(self.root)
+        self.validator = BackgroundLoader(self.root)
+        self.revision = 0  # Bumped on every change to the text
+        self.parsed = None  # (revision, data) of the last successful parse
+        self.validate_job = None
 
         # Create the main UI for loading, editing, saving JSON, and converting
         self.create_ui()
@@ -17,8 +28,15 @@ class JSONEditorApp:
     def create_ui(self):
         """Create the UI components for the JSON editor."""
         # Text area for displaying and editing JSON content
-        self.text_area = tk.Text(self.root, bd=11,height=20, width=60)
+        # Tk's undo stack records the inserted/deleted text of each edit, not copies of the document
+        self.text_area = tk.Text(self.root, bd=11,height=20, width=60, undo=True, autoseparators=True)
         self.text_area.grid(row=0, column=0, columnspan=4, padx=10, pady=10, sticky="nsew")
+        # Syntax highlighting of the visible lines, updated incrementally as the text changes
+        self.highlighter = JSONHighlighter(self.text_area)
+        self.highlight_var = tk.BooleanVar(self.root, True)
+        self.highlight_check = tk.Checkbutton(self.root, text="Highlight", variable=self.highlight_var,
+                                              command=lambda: self.highlighter.set_enabled(self.highlight_var.get()))
+        self.highlight_check.grid(row=4, column=0, padx=10, pady=5, sticky="w")
 
         # Load JSON button
         self.load_button = tk.Button(self.root, bd=4,text="Load JSON", command=self.load_json)
@@ -41,28 +59,133 @@ class JSONEditorApp:
         self.convert_dict_button.grid(row=2, column=1, columnspan=2, padx=10, pady=5, sticky="ew")
         self.cleartext_button = tk.Button(self.root, bd=4,text="Clear Text", command=self.clear)
         self.cleartext_button.grid(row=3, column=2, columnspan=2, padx=10, pady=5, sticky="ew")
+        self.undo_button = tk.Button(self.root, bd=4, text="Undo", command=self.undo)
+        self.undo_button.grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+        self.redo_button = tk.Button(self.root, bd=4, text="Redo", command=self.redo)
+        self.redo_button.grid(row=2, column=3, padx=10, pady=5, sticky="ew")
+        self.text_area.bind("<Control-y>", lambda event: self.redo() or "break")
+
+        # Live validation result; the line of a syntax error is highlighted
+        self.validation_label = tk.Label(self.root, text="", anchor="w")
+        self.validation_label.grid(row=3, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+        self.text_area.tag_configure("json_error", background="#ffd6d6")
+        self.text_area.tag_configure("json_error_char", background="#ff8080")
+        self.text_area.bind("<<Modified>>", self.on_text_modified)
 
     def load_json(self):
-        """Load a JSON file and display its content in the text area."""
+        """Load a JSON file in the background, appending its text to the text area chunk by chunk."""
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if file_path:
-            with open(file_path, "r") as json_file:
-                data = json_file.read()
-                self.text_area.delete(1.0, tk.END)  # Clear previous content
-                self.text_area.insert(tk.END, data)  # Insert new JSON content
-            self.status_message(f"Loaded: {file_path}")
+            # Loading is not an undoable edit; keeping it in the undo stack would hold a second copy of the file
+            self.text_area.config(undo=False)
+            self.text_area.delete(1.0, tk.END)  # Clear previous content
+            self.status_message(f"Loading {file_path}...")
+            self.loader.start(
+                iter_read_text(file_path),
+                on_done=lambda size: self.on_loaded(file_path),
+                on_progress=lambda done, total: self.status_message(f"Loading... {done * 100 // max(total, 1)}%"),
+                on_partial=lambda text: self.text_area.insert(tk.END, text),
+                on_error=self.on_load_error,
+            )
         else:
             self.status_message("File loading cancelled")
 
+    def on_loaded(self, file_path):
+        """Finish a background load; the loaded text is where undo history starts."""
+        self.status_message(f"Loaded: {file_path}")
+        self.reset_undo()
+
+    def on_load_error(self, exc):
+        """Report a failed background load."""
+        self.reset_undo()
+        self.status_message("Loading failed")
+        messagebox.showerror("Error", f"Failed to load file: {exc}")
+
+    def reset_undo(self):
+        """Start a fresh undo history with the current text."""
+        self.text_area.edit_reset()
+        self.text_area.config(undo=True)
+
+    def undo(self):
+        try:
+            self.text_area.edit_undo()
+        except tk.TclError:
+            pass  # Nothing to undo
+
+    def redo(self):
+        try:
+            self.text_area.edit_redo()
+        except tk.TclError:
+            pass  # Nothing to redo
+
+    def on_text_modified(self, event):
+        """Count a new revision of the text and validate it once typing pauses."""
+        if not self.text_area.edit_modified():
+            return  # The event for resetting the flag below
+        self.text_area.edit_modified(False)
+        self.revision += 1
+        if self.validate_job is not None:
+            self.root.after_cancel(self.validate_job)
+        self.validate_job = self.root.after(VALIDATE_DELAY_MS, self.validate)
+
+    def validate(self):
+        """Parse the current text on a worker thread and report the result."""
+        self.validate_job = None
+        if self.loader.busy():
+            # Still loading; check the whole text once it is in
+            self.validate_job = self.root.after(VALIDATE_DELAY_MS, self.validate)
+            return
+        revision = self.revision
+        self.validator.start(
+            iter_parse_json(self.text_area.get(1.0, tk.END)),
+            on_done=lambda data: self.on_valid(revision, data),
+            on_error=lambda exc: self.on_invalid(revision, exc),
+        )
+
+    def on_valid(self, revision, data):
+        """Keep a successful parse for Save/Convert and clear any error highlight."""
+        if revision != self.revision:
+            return  # The text changed while it was being parsed
+        self.parsed = (revision, data)
+        self.clear_error()
+        self.validation_label.config(text="Valid JSON", fg="dark green")
+
+    def on_invalid(self, revision, exc):
+        """Highlight the line and character where parsing failed."""
+        if revision != self.revision:
+            return
+        self.clear_error()
+        if not isinstance(exc, json.JSONDecodeError):
+            self.validation_label.config(text=f"Cannot parse: {exc}", fg="red")
+            return
+        line = f"{exc.lineno}.0"
+        char = f"{exc.lineno}.{exc.colno - 1}"
+        self.text_area.tag_add("json_error", line, f"{line} lineend")
+        self.text_area.tag_add("json_error_char", char)
+        self.validation_label.config(text=f"Line {exc.lineno}, column {exc.colno}: {exc.msg}", fg="red")
+
+    def clear_error(self):
+        self.text_area.tag_remove("json_error", 1.0, tk.END)
+        self.text_area.tag_remove("json_error_char", 1.0, tk.END)
+
+    def parsed_json(self):
+        """Return the parsed text, reusing the last parse if the text has not changed since.
+
+        Raises json.JSONDecodeError if the text is not valid JSON.
+        """
+        if self.text_area.edit_modified():
+            self.on_text_modified(None)  # A change whose <<Modified>> event is still queued
+        if self.parsed is None or self.parsed[0] != self.revision:
+            self.parsed = (self.revision, json.loads(self.text_area.get(1.0, tk.END)))
+        return self.parsed[1]
+
     def save_json(self):
-        """Save the current text area content as a JSON file."""
+        """Save the current text area content as a JSON file, as typed, once it is known to be valid."""
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
-            json_data = self.text_area.get(1.0, tk.END)
             try:
-                parsed_data = json.loads(json_data)  # Ensure it's valid JSON before saving
-                with open(file_path, "w") as json_file:
-                    json.dump(parsed_data, json_file, indent=4)
+                self.parsed_json()  # Ensure it's valid JSON before saving
+                write_json_text(self.text_area.get(1.0, "end-1c"), file_path)
                 self.status_message(f"Saved: {file_path}")
             except json.JSONDecodeError:
                 messagebox.showerror("Error", "Invalid JSON format. Please check the content.")
@@ -70,43 +193,37 @@ class JSONEditorApp:
             self.status_message("File saving cancelled")
 
     def convert_to_csv(self):
-        """Convert the JSON content to a CSV file."""
-        json_data = self.text_area.get(1.0, tk.END)
+        """Convert the JSON content (an array of records) to a CSV file with a column for every field."""
         try:
-            parsed_data = json.loads(json_data)
-            if isinstance(parsed_data, list):  # Ensure the JSON is a list of dictionaries
-                file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-                if file_path:
-                    with open(file_path, "w", newline="") as csv_file:
-                        writer = csv.DictWriter(csv_file, fieldnames=parsed_data[0].keys())
-                        writer.writeheader()
-                        writer.writerows(parsed_data)
-                    self.status_message(f"CSV file created: {file_path}")
-            else:
-                messagebox.showerror("Error", "JSON is not in the format of a list of dictionaries.")
+            parsed_data = self.parsed_json()
         except json.JSONDecodeError:
             messagebox.showerror("Error", "Invalid JSON format. Cannot convert to CSV.")
+            return
+        if not isinstance(parsed_data, list):
+            messagebox.showerror("Error", "JSON is not a list of records.")
+            return
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if file_path:
+            records, columns = write_records_csv(parsed_data, file_path)
+            self.status_message(f"CSV file created: {file_path} ({records:,} records, {columns:,} columns)")
 
     def convert_to_xml(self):
-        """Convert the JSON content to an XML file."""
-        json_data = self.text_area.get(1.0, tk.END)
+        """Convert the JSON content to an XML file, writing elements as the data is walked."""
         try:
-            parsed_data = json.loads(json_data)
-            root_element = self.json_to_xml(parsed_data, ET.Element("root"))
+            parsed_data = self.parsed_json()
 
             file_path = filedialog.asksaveasfilename(defaultextension=".xml", filetypes=[("XML files", "*.xml")])
             if file_path:
-                tree = ET.ElementTree(root_element)
-                tree.write(file_path, encoding="utf-8", xml_declaration=True)
+                with xml_file(file_path) as writer:
+                    write_json_element(writer, "root", parsed_data)
                 self.status_message(f"XML file created: {file_path}")
         except json.JSONDecodeError:
             messagebox.showerror("Error", "Invalid JSON format. Cannot convert to XML.")
 
     def convert_to_dict(self):
         """Convert the JSON content to a Python dictionary and display it."""
-        json_data = self.text_area.get(1.0, tk.END)
         try:
-            parsed_data = json.loads(json_data)
+            parsed_data = self.parsed_json()
             dict_representation = str(parsed_data)
             self.text_area.delete(1.0, tk.END)
             self.text_area.insert(tk.END, dict_representation)
@@ -116,17 +233,7 @@ class JSONEditorApp:
 
     def json_to_xml(self, json_obj, parent):
         """Recursively convert JSON data to XML elements."""
-        if isinstance(json_obj, dict):
-            for key, value in json_obj.items():
-                sub_element = ET.SubElement(parent, key)
-                self.json_to_xml(value, sub_element)
-        elif isinstance(json_obj, list):
-            for item in json_obj:
-                sub_element = ET.SubElement(parent, "item")
-                self.json_to_xml(item, sub_element)
-        else:
-            parent.text = str(json_obj)
-        return parent
+        return json_to_xml(json_obj, parent)
 
     def status_message(self, message):
         """Display status messages in the window title bar."""
@@ -134,9 +241,12 @@ class JSONEditorApp:
 
     def clear(self):
         self.text_area.delete("1.0", tk.END)
-# Create the main Tkinter window
-root = tk.Tk()
 
-# Run the application
-app = JSONEditorApp(root)
-root.mainloop()
+
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
+
+    # Run the application
+    app = JSONEditorApp(root)
+    root.mainloop()
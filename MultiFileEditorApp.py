@@ -1,7 +1,14 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import json
-import csv
+from tkinter import filedialog, messagebox, simpledialog
+from multifile.csvio import LAZY_THRESHOLD, read_csv, iter_read_csv, reparse_csv, write_csv, close_data
+from multifile.index import TableIndex
+from multifile.journal import EditJournal
+from multifile.jsonio import iter_read_json, write_json
+from multifile.loader import BackgroundLoader, run_steps
+from multifile.ndjson import RecordRows, iter_read_ndjson, write_ndjson
+from multifile.ui.grid import VirtualGrid
+from multifile.ui.progress import LoadStatus
+from multifile.ui.query import QueryBar
 
 
 class FileHandler:
@@ -9,19 +16,61 @@ class FileHandler:
         self.data = []
         self.file_type = None
         self.delimiter = ','  # Default delimiter for CSV
+        self.sniff_dialect = True  # Detect each CSV file's delimiter on load instead of using self.delimiter
+        self.lazy_threshold = LAZY_THRESHOLD  # CSV files this big are loaded lazily
+        self.json_indent = 4  # None saves compact JSON
+        self.dirty_rows = set()  # Rows edited since the last load or save
+        self.journal = EditJournal(self.get_cell, self.update_data)  # Batches grid edits, keeps undo history
+        self.index = None  # Column indexes over CSV data for sorting, filtering and lookups
+        self.rows = None  # Grid rows over NDJSON records
 
     def load_file(self, file_type):
         """Load a file based on the file type."""
-        file_path = filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+        file_path = self.choose_file(file_type)
         if not file_path:
             return
+        self.set_loaded(file_type, run_steps(self.iter_load(file_type, file_path)))
 
+    def choose_file(self, file_type):
+        """Ask for a file of the given type to open."""
+        return filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", self.file_patterns(file_type))])
+
+    @staticmethod
+    def file_patterns(file_type):
+        """Filename patterns for the file dialogs."""
+        return "*.ndjson *.jsonl" if file_type == 'ndjson' else f"*.{file_type}"
+
+    def iter_load(self, file_type, file_path):
+        """Loader steps that parse a file (see multifile.loader); pass the result to set_loaded."""
         if file_type == 'csv':
-            self.file_type = 'csv'
-            self.load_csv(file_path)
+            return (yield from iter_read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
         elif file_type == 'json':
-            self.file_type = 'json'
-            self.load_json(file_path)
+            return (yield from iter_read_json(file_path))
+        elif file_type == 'ndjson':
+            return (yield from iter_read_ndjson(file_path))
+
+    def set_loaded(self, file_type, data):
+        """Make freshly loaded data the current data."""
+        close_data(self.data)
+        self.file_type = file_type
+        self.data = data
+        if file_type == 'csv':
+            self.delimiter = data.delimiter
+        self.rows = RecordRows(data) if file_type == 'ndjson' else None
+        self.reset_index()
+        self.dirty_rows = set()
+        self.journal.clear()
+
+    def reset_index(self):
+        """Start new, empty column indexes for the current CSV data."""
+        if self.file_type == 'csv':
+            self.index = TableIndex(self.data, 1 if getattr(self.data, 'has_header', False) else 0)
+        else:
+            self.index = None
+
+    def load_delimiter(self):
+        """Delimiter to open CSV files with (None lets the reader sniff it)."""
+        return None if self.sniff_dialect else self.delimiter
 
     def save_file(self):
         """Save the data to a file based on the current file type."""
@@ -29,7 +78,7 @@ class FileHandler:
             messagebox.showerror("Error", "No file type selected for saving.")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=f".{self.file_type}", filetypes=[(f"{self.file_type.upper()} files", f"*.{self.file_type}")])
+        file_path = filedialog.asksaveasfilename(defaultextension=f".{self.file_type}", filetypes=[(f"{self.file_type.upper()} files", self.file_patterns(self.file_type))])
         if not file_path:
             return
 
@@ -37,42 +86,75 @@ class FileHandler:
             self.save_csv(file_path)
         elif self.file_type == 'json':
             self.save_json(file_path)
+        elif self.file_type == 'ndjson':
+            self.save_ndjson(file_path)
 
     def load_csv(self, file_path):
-        """Load CSV file and store its data."""
-        with open(file_path, newline='') as csvfile:
-            reader = csv.reader(csvfile, delimiter=self.delimiter)
-            self.data = list(reader)
+        """Load CSV file and store its data (big files are parsed on demand)."""
+        self.set_loaded('csv', read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
 
     def save_csv(self, file_path):
-        """Save CSV data to file."""
-        with open(file_path, mode='w', newline='') as csvfile:
-            writer = csv.writer(csvfile, delimiter=self.delimiter)
-            for row in self.data:
-                writer.writerow(row)
+        """Save CSV data to file (atomically, re-encoding only edited rows of lazy data)."""
+        self.journal.commit()
+        self.data = write_csv(self.data, file_path, self.delimiter, self.dirty_rows)
+        self.index.set_data(self.data)
+        self.dirty_rows.clear()
         messagebox.showinfo("Success", "CSV file saved successfully!")
 
     def load_json(self, file_path):
         """Load JSON file and store its data."""
-        with open(file_path, "r") as json_file:
-            self.data = json.load(json_file)
+        self.set_loaded('json', run_steps(iter_read_json(file_path)))
 
     def save_json(self, file_path):
-        """Save JSON data to file."""
-        with open(file_path, "w") as json_file:
-            json.dump(self.data, json_file, indent=4)
+        """Save JSON data to file (atomically)."""
+        write_json(self.data, file_path, self.json_indent)
         messagebox.showinfo("Success", "JSON file saved successfully!")
 
+    def save_ndjson(self, file_path):
+        """Save JSON Lines data (appending new records in place when nothing else changed)."""
+        self.journal.commit()
+        self.data = write_ndjson(self.data, file_path)
+        self.rows.records = self.data
+        self.dirty_rows.clear()
+        messagebox.showinfo("Success", "NDJSON file saved successfully!")
+
+    def add_record(self):
+        """Add an empty NDJSON record at the end; saving appends it to the file."""
+        self.rows.append_record()
+        self.dirty_rows.add(len(self.rows) - 1)
+
+    def get_cell(self, row, col):
+        """Return the current value of a cell."""
+        if self.rows is not None:
+            return self.rows.get_cell(row, col)
+        return self.data[row][col]
+
     def update_data(self, row, col, value):
         """Update the data array when the user edits the grid."""
+        if self.rows is not None:
+            self.rows.set_cell(row, col, value)
+            self.dirty_rows.add(row)
+            return
+        if self.index is not None:
+            self.index.update(row, col, self.data[row][col], value)
         self.data[row][col] = value
+        self.dirty_rows.add(row)
+
+    def has_unsaved_edits(self):
+        """Return True if there are edits that have not been saved yet."""
+        return bool(self.dirty_rows or self.journal.pending)
 
     def change_delimiter(self, new_delimiter):
-        """Change the delimiter for CSV files."""
+        """Change the delimiter for CSV files and re-split the loaded CSV data with it."""
         if new_delimiter.lower() == "tab":
             self.delimiter = '\t'
         else:
             self.delimiter = new_delimiter
+        if self.file_type == 'csv':
+            self.data = reparse_csv(self.data, self.delimiter)
+            self.reset_index()
+            self.dirty_rows = set()
+            self.journal.clear()
 
 
 class MultiFileEditorApp:
@@ -80,6 +162,7 @@ class MultiFileEditorApp:
         self.root = root
         self.root.title("Multi-File Editor")
         self.file_handler = FileHandler()
+        self.loader = BackgroundLoader(self.root)
 
         # Create UI components
         self.create_ui()
@@ -106,43 +189,155 @@ class MultiFileEditorApp:
         self.delimiter_button = tk.Button(button_frame, text="Change Delimiter", command=self.change_delimiter)
         self.delimiter_button.grid(row=0, column=3, padx=5, pady=5)
 
-        # Frame to display file content in a grid
-        self.file_frame = tk.Frame(self.root)
-        self.file_frame.grid(row=1, column=0, padx=10, pady=10)
+        # JSON Lines: one record per line, indexed so only visible records are decoded
+        self.load_ndjson_button = tk.Button(button_frame, text="Load NDJSON", command=lambda: self.load_file('ndjson'))
+        self.load_ndjson_button.grid(row=0, column=4, padx=5, pady=5)
+        self.add_record_button = tk.Button(button_frame, text="Add Record", command=self.add_record)
+        self.add_record_button.grid(row=0, column=5, padx=5, pady=5)
+
+        # Undo/Redo replay the edit journal, so they cost the same however big the file is
+        self.undo_button = tk.Button(button_frame, text="Undo", command=self.undo)
+        self.undo_button.grid(row=0, column=6, padx=5, pady=5)
+        self.redo_button = tk.Button(button_frame, text="Redo", command=self.redo)
+        self.redo_button.grid(row=0, column=7, padx=5, pady=5)
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Control-Z>', lambda event: self.redo())
+
+        # Scrollable grid that only creates Entry widgets for the visible cells
+        self.file_grid = VirtualGrid(self.root)
+        self.file_grid.grid(row=1, column=0, padx=10, pady=10)
+
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+
+        # Sort, filter and go-to-key over the loaded CSV rows
+        self.query_bar = QueryBar(self.root, self.file_grid, lambda: self.file_handler.index)
+        self.query_bar.grid(row=3, column=0, padx=10, pady=5, sticky="w")
 
     def load_file(self, file_type):
-        """Load a file and display its content."""
-        self.file_handler.load_file(file_type)
+        """Load a file in the background, showing rows as soon as they are parsed."""
+        file_path = self.file_handler.choose_file(file_type)
+        if not file_path:
+            return
+        # Apply pending edits now: the grid switches to the new rows as they are parsed
+        self.file_grid.flush()
+        self.load_status.begin(file_path)
+        self.loader.start(
+            self.file_handler.iter_load(file_type, file_path),
+            on_done=lambda data: self.on_loaded(file_type, data),
+            on_progress=self.load_status.show_progress,
+            # JSON partials are records, which the grid only shows once loaded
+            on_partial=self.show_partial if file_type == 'csv' else None,
+            on_error=self.on_load_error,
+            on_cancel=self.on_load_cancelled,
+        )
+
+    def show_partial(self, data):
+        """Show the rows parsed so far; editing waits until the load is done."""
+        self.query_bar.reset()
+        self.file_grid.editable = False
+        if self.file_grid.data is data:
+            self.file_grid.refresh()
+        else:
+            self.file_grid.set_data(data)
+
+    def on_loaded(self, file_type, data):
+        """Switch to the loaded data once the background load has finished."""
+        self.file_handler.set_loaded(file_type, data)
+        self.load_status.finish("Loaded")
+        self.display_data()
+
+    def on_load_error(self, exc):
+        """Report a failed background load and go back to the previous data."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load file: {exc}")
+        self.display_data()
+
+    def on_load_cancelled(self):
+        """Go back to the previous data after the user cancelled a load."""
+        self.load_status.finish("Loading cancelled")
         self.display_data()
 
     def save_file(self):
         """Save the file."""
+        self.file_grid.flush()
         self.file_handler.save_file()
+        if self.file_handler.file_type == 'csv':
+            # Saving reopens lazily loaded data, so point the grid at the new rows
+            self.query_bar.rebind(self.file_handler.data)
+
+    def undo(self):
+        """Revert the last batch of grid edits."""
+        self.file_grid.flush()
+        if self.file_handler.journal.undo():
+            self.file_grid.refresh()
+
+    def redo(self):
+        """Re-apply the last undone batch of grid edits."""
+        self.file_grid.flush()
+        if self.file_handler.journal.redo():
+            self.file_grid.refresh()
+
+    def add_record(self):
+        """Add an empty record to NDJSON data and scroll to it."""
+        if self.file_handler.file_type != 'ndjson':
+            messagebox.showerror("Error", "Load an NDJSON file first.")
+            return
+        self.file_grid.flush()
+        self.file_handler.add_record()
+        self.file_grid.set_first_row(len(self.file_handler.rows) - 1)
+        self.file_grid.refresh()
 
     def change_delimiter(self):
         """Change the CSV delimiter."""
-        delimiter = tk.simpledialog.askstring("Input", "Enter delimiter (e.g., comma, tab, semicolon):")
-        if delimiter:
-            self.file_handler.change_delimiter(delimiter)
+        delimiter = simpledialog.askstring("Input", "Enter delimiter (e.g., comma, tab, semicolon):")
+        if not delimiter:
+            return
+        self.file_grid.flush()
+        if self.file_handler.file_type == 'csv' and self.file_handler.has_unsaved_edits():
+            if not messagebox.askyesno("Change Delimiter", "Re-splitting the file discards unsaved edits. Continue?"):
+                return
+        self.file_handler.change_delimiter(delimiter)
+        if self.file_handler.file_type == 'csv':
+            self.display_data()
 
     def display_data(self):
         """Display the loaded data in the grid."""
-        # Clear the current grid
-        for widget in self.file_frame.winfo_children():
-            widget.destroy()
+        data = self.file_handler.data
+        journal = self.file_handler.journal
+        header = None
+        if self.file_handler.file_type == 'csv':
+            if getattr(data, 'has_header', False) and len(data):
+                header = list(data[0])
+            # Edits are coalesced in the grid and applied in batches by the journal;
+            # grid rows are mapped back to file rows while sorted or filtered
+            self.file_grid.on_edit = self.record_edit
+            self.file_grid.on_flush = journal.commit
+        elif self.file_handler.file_type == 'ndjson':
+            # One column per record field; records are decoded as they scroll into view
+            data = self.file_handler.rows
+            header = data.fields
+            self.file_grid.on_edit = self.record_edit
+            self.file_grid.on_flush = journal.commit
+        else:
+            # JSON rows are shown as their keys/items, one per cell
+            data = [list(row) for row in data]
+            self.file_grid.on_edit = self.file_grid.on_flush = None
+        self.query_bar.reset()
+        self.file_grid.editable = True
+        self.file_grid.set_data(data, header=header)
 
-        # Display data in a grid of Entry widgets
-        for r, row in enumerate(self.file_handler.data):
-            for c, value in enumerate(row):
-                entry = tk.Entry(self.file_frame, width=15)
-                entry.grid(row=r, column=c, padx=5, pady=5)
-                entry.insert(0, value)
-                entry.bind('<KeyRelease>', lambda event, row=r, col=c: self.file_handler.update_data(row, col, event.widget.get()))
+    def record_edit(self, row, col, value):
+        """VirtualGrid ``on_edit`` callback: journal an edit of the row shown at grid row ``row``."""
+        self.file_handler.journal.record(self.query_bar.source_row(row), col, value)
 
 
-# Create the main Tkinter window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
 
-# Run the application
-app = MultiFileEditorApp(root)
-root.mainloop()
+    # Run the application
+    app = MultiFileEditorApp(root)
+    root.mainloop()
@@ -1,7 +1,11 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, Listbox, Entry, Text
-import json
-import csv
+from collections.abc import Sequence
+from multifile.csvio import LAZY_THRESHOLD, read_csv, iter_read_csv, write_csv, close_data
+from multifile.jsonio import iter_read_json, write_json
+from multifile.loader import BackgroundLoader, run_steps
+from multifile.ui.progress import LoadStatus
+from multifile.ui.search import SearchBar
 
 
 class FileHandler:
@@ -9,30 +13,47 @@ class FileHandler:
         self.data = []
         self.file_type = None
         self.delimiter = ','  # Default delimiter for CSV
+        self.sniff_dialect = True  # Detect each CSV file's delimiter on load instead of using self.delimiter
+        self.lazy_threshold = LAZY_THRESHOLD  # CSV files this big are loaded lazily
+        self.json_indent = 4  # None saves compact JSON
 
     def load_file(self, file_type):
         """Load a file based on the file type."""
-        file_path = filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+        file_path = self.choose_file(file_type)
         if not file_path:
             return
+        self.set_loaded(file_type, run_steps(self.iter_load(file_type, file_path)))
 
+    def choose_file(self, file_type):
+        """Ask for a file of the given type to open."""
+        return filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+
+    def iter_load(self, file_type, file_path):
+        """Loader steps that parse a file (see multifile.loader); pass the result to set_loaded."""
         if file_type == 'csv':
-            self.file_type = 'csv'
-            self.load_csv(file_path)
+            return (yield from iter_read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
         elif file_type == 'json':
-            self.file_type = 'json'
-            self.load_json(file_path)
+            return (yield from iter_read_json(file_path))
+
+    def set_loaded(self, file_type, data):
+        """Make freshly loaded data the current data."""
+        close_data(self.data)
+        self.file_type = file_type
+        self.data = data
+        if file_type == 'csv':
+            self.delimiter = data.delimiter
+
+    def load_delimiter(self):
+        """Delimiter to open CSV files with (None lets the reader sniff it)."""
+        return None if self.sniff_dialect else self.delimiter
 
     def load_csv(self, file_path):
-        """Load CSV file and store its data."""
-        with open(file_path, newline='') as csvfile:
-            reader = csv.reader(csvfile, delimiter=self.delimiter)
-            self.data = list(reader)
+        """Load CSV file and store its data (big files are parsed on demand)."""
+        self.set_loaded('csv', read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
 
     def load_json(self, file_path):
         """Load JSON file and store its data."""
-        with open(file_path, "r") as json_file:
-            self.data = json.load(json_file)
+        self.set_loaded('json', run_steps(iter_read_json(file_path)))
 
     def save_file(self, file_path):
         """Save the data to a file based on the current file type."""
@@ -42,17 +63,13 @@ class FileHandler:
             self.save_json(file_path)
 
     def save_csv(self, file_path):
-        """Save CSV data to file."""
-        with open(file_path, mode='w', newline='') as csvfile:
-            writer = csv.writer(csvfile, delimiter=self.delimiter)
-            for row in self.data:
-                writer.writerow(row)
+        """Save CSV data to file (atomically)."""
+        self.data = write_csv(self.data, file_path, self.delimiter)
         messagebox.showinfo("Success", "CSV file saved successfully!")
 
     def save_json(self, file_path):
-        """Save JSON data to file."""
-        with open(file_path, "w") as json_file:
-            json.dump(self.data, json_file, indent=4)
+        """Save JSON data to file (atomically)."""
+        write_json(self.data, file_path, self.json_indent)
         messagebox.showinfo("Success", "JSON file saved successfully!")
 
 
@@ -61,6 +78,7 @@ class MultiFileEditorApp:
         self.root = root
         self.root.title("Multi-File Editor")
         self.file_handler = FileHandler()
+        self.loader = BackgroundLoader(self.root)
 
         # Create UI components
         self.create_ui()
@@ -94,11 +112,39 @@ class MultiFileEditorApp:
         self.input_frame = tk.Frame(self.listbox_frame)
         self.input_frame.grid(row=0, column=1, padx=5, pady=5)
 
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+
+        # Find keys and values through an index built in the background
+        self.search_bar = SearchBar(self.root, on_jump=self.show_path)
+        self.search_bar.grid(row=3, column=0, padx=10, pady=5, sticky="w")
+
     def load_file(self, file_type):
-        """Load a file and display its content."""
-        self.file_handler.load_file(file_type)
+        """Load a file in the background and display its content when done."""
+        file_path = self.file_handler.choose_file(file_type)
+        if not file_path:
+            return
+        self.load_status.begin(file_path)
+        self.loader.start(
+            self.file_handler.iter_load(file_type, file_path),
+            on_done=lambda data: self.on_loaded(file_type, data),
+            on_progress=self.load_status.show_progress,
+            on_error=self.on_load_error,
+            on_cancel=lambda: self.load_status.finish("Loading cancelled"),
+        )
+
+    def on_loaded(self, file_type, data):
+        """Switch to the loaded data once the background load has finished."""
+        self.file_handler.set_loaded(file_type, data)
+        self.load_status.finish("Loaded")
         self.display_data()
 
+    def on_load_error(self, exc):
+        """Report a failed background load."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load file: {exc}")
+
     def save_file(self):
         """Save the file."""
         file_path = filedialog.asksaveasfilename(defaultextension=f".{self.file_handler.file_type}", filetypes=[(f"{self.file_handler.file_type.upper()} files", f"*.{self.file_handler.file_type}")])
@@ -110,7 +156,7 @@ class MultiFileEditorApp:
         self.listbox_keys.delete(0, tk.END)
         self.clear_input_frame()
 
-        if isinstance(self.file_handler.data, list):
+        if isinstance(self.file_handler.data, Sequence):
             if isinstance(self.file_handler.data[0], dict):  # For JSON list of dictionaries
                 for i, entry in enumerate(self.file_handler.data):
                     self.listbox_keys.insert(tk.END, f"Item {i+1}")
@@ -120,6 +166,26 @@ class MultiFileEditorApp:
         elif isinstance(self.file_handler.data, dict):  # For JSON object
             for key in self.file_handler.data.keys():
                 self.listbox_keys.insert(tk.END, key)
+        self.search_bar.set_data(self.file_handler.data)
+
+    def show_path(self, path):
+        """Select the listbox item holding the node at a data path and show its values."""
+        data = self.file_handler.data
+        if not path:
+            return False
+        if isinstance(data, dict):
+            if path[0] not in data:
+                return False
+            index = list(data).index(path[0])
+        elif isinstance(path[0], int) and path[0] < self.listbox_keys.size():
+            index = path[0]
+        else:
+            return False
+        self.listbox_keys.selection_clear(0, tk.END)
+        self.listbox_keys.selection_set(index)
+        self.listbox_keys.see(index)
+        self.listbox_keys.event_generate("<<ListboxSelect>>")
+        return True
 
     def clear_input_frame(self):
         """Clear the dynamic input frame (Entry or Text widget)."""
@@ -135,7 +201,7 @@ class MultiFileEditorApp:
         index = selection[0]
         self.clear_input_frame()
 
-        if isinstance(self.file_handler.data, list):
+        if isinstance(self.file_handler.data, Sequence):
             if isinstance(self.file_handler.data[0], dict):  # For JSON list of dictionaries
                 selected_data = self.file_handler.data[index]
                 self.populate_input_widgets(selected_data)
@@ -166,9 +232,10 @@ class MultiFileEditorApp:
             entry_widget.insert(0, value)
 
 
-# Create the main Tkinter window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
 
-# Run the application
-app = MultiFileEditorApp(root)
-root.mainloop()
+    # Run the application
+    app = MultiFileEditorApp(root)
+    root.mainloop()
@@ -1,8 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
-import json
-import csv
-import xml.etree.ElementTree as ET
+from multifile.convert import flatten_json, unflatten_json, path_to_key, xml_to_dict, dict_to_xml
+from multifile.csvio import LAZY_THRESHOLD, read_csv, iter_read_csv, reparse_csv, write_csv, close_data
+from multifile.jsonio import iter_read_json, write_json
+from multifile.loader import BackgroundLoader, run_steps
+from multifile.xmlio import iter_stream_xml
+from multifile.xmlnodes import XMLNodes, iter_read_nodes
+from multifile.xmlwrite import write_dict_element, write_json_element, write_nodes, xml_file
+from multifile.ui.progress import LoadStatus
 
 
 class FileHandler:
@@ -10,22 +15,49 @@ class FileHandler:
         self.data = []
         self.file_type = None
         self.delimiter = ','  # Default delimiter for CSV
+        self.sniff_dialect = True  # Detect each CSV file's delimiter on load instead of using self.delimiter
+        self.lazy_threshold = LAZY_THRESHOLD  # CSV files this big are loaded lazily
+        self.json_indent = 4  # None saves compact JSON
+        self.xml_max_depth = None  # Levels below the root element to load (None loads them all)
+        self.xml_tags = None  # Tags of the XML elements to load, with their subtrees (None loads all)
 
     def load_file(self, file_type):
         """Load a file based on the file type."""
-        file_path = filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+        file_path = self.choose_file(file_type)
         if not file_path:
             return
+        self.set_loaded(file_type, run_steps(self.iter_load(file_type, file_path)))
 
+    def choose_file(self, file_type):
+        """Ask for a file of the given type to open."""
+        return filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+
+    def iter_load(self, file_type, file_path):
+        """Loader steps that parse a file (see multifile.loader); pass the result to set_loaded."""
         if file_type == 'csv':
-            self.file_type = 'csv'
-            self.load_csv(file_path)
+            return (yield from iter_read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
         elif file_type == 'json':
-            self.file_type = 'json'
-            self.load_json(file_path)
+            data = yield from iter_read_json(file_path)
+            return self.flatten_json(data)
         elif file_type == 'xml':
-            self.file_type = 'xml'
-            self.load_xml(file_path)
+            # XML is kept as XMLNodes, whose items() are the flattened paths and values
+            if self.xml_max_depth is None and not self.xml_tags:
+                return (yield from iter_read_nodes(file_path))
+            # Only part of the tree is wanted, so the rest is dropped as it is parsed
+            root = (yield from iter_stream_xml(file_path, self.xml_max_depth, self.xml_tags)).root
+            return XMLNodes.from_element(root)
+
+    def set_loaded(self, file_type, data):
+        """Make freshly loaded data the current data."""
+        close_data(self.data)
+        self.file_type = file_type
+        self.data = data
+        if file_type == 'csv':
+            self.delimiter = data.delimiter
+
+    def load_delimiter(self):
+        """Delimiter to open CSV files with (None lets the reader sniff it)."""
+        return None if self.sniff_dialect else self.delimiter
 
     def save_file(self):
         """Save the data to a file based on the current file type."""
@@ -45,110 +77,71 @@ class FileHandler:
             self.save_xml(file_path)
 
     def load_csv(self, file_path):
-        """Load CSV file and store its data."""
-        with open(file_path, newline='') as csvfile:
-            reader = csv.reader(csvfile, delimiter=self.delimiter)
-            self.data = list(reader)
+        """Load CSV file and store its data (big files are parsed on demand)."""
+        self.set_loaded('csv', read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
 
     def save_csv(self, file_path):
-        """Save CSV data to file."""
-        with open(file_path, mode='w', newline='') as csvfile:
-            writer = csv.writer(csvfile, delimiter=self.delimiter)
-            for row in self.data:
-                writer.writerow(row)
+        """Save CSV data to file (atomically)."""
+        self.data = write_csv(self.data, file_path, self.delimiter)
         messagebox.showinfo("Success", "CSV file saved successfully!")
 
+    def change_delimiter(self, new_delimiter):
+        """Change the delimiter for CSV files and re-split the loaded CSV data with it."""
+        if new_delimiter.lower() == "tab":
+            self.delimiter = '\t'
+        else:
+            self.delimiter = new_delimiter
+        if self.file_type == 'csv':
+            self.data = reparse_csv(self.data, self.delimiter)
+
     def load_json(self, file_path):
         """Load JSON file and store its data."""
-        with open(file_path, "r") as json_file:
-            self.data = json.load(json_file)
-            self.data = self.flatten_json(self.data)
+        self.set_loaded('json', run_steps(self.iter_load('json', file_path)))
 
     def save_json(self, file_path):
-        """Save JSON data to file."""
+        """Save JSON data to file (atomically)."""
         # Unflatten the JSON structure before saving
         unflattened_data = self.unflatten_json(self.data)
-        with open(file_path, "w") as json_file:
-            json.dump(unflattened_data, json_file, indent=4)
+        write_json(unflattened_data, file_path, self.json_indent)
         messagebox.showinfo("Success", "JSON file saved successfully!")
 
     def load_xml(self, file_path):
         """Load XML file and store its data."""
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        self.data = self.xml_to_dict(root)
-        self.data = self.flatten_json(self.data)
+        self.set_loaded('xml', run_steps(self.iter_load('xml', file_path)))
 
     def save_xml(self, file_path):
-        """Save data as XML file."""
-        unflattened_data = self.unflatten_json(self.data)
-        root = self.dict_to_xml("root", unflattened_data)
-        tree = ET.ElementTree(root)
-        tree.write(file_path, encoding='utf-8', xml_declaration=True)
+        """Save data as XML file (atomically), writing elements as the data is walked."""
+        with xml_file(file_path) as writer:
+            if isinstance(self.data, XMLNodes):
+                # Loaded XML is saved from its node model, keeping its root and element order
+                write_nodes(writer, self.data)
+            else:
+                unflattened_data = self.unflatten_json(self.data)
+                if isinstance(unflattened_data, dict):
+                    write_dict_element(writer, "root", unflattened_data)
+                else:
+                    write_json_element(writer, "root", unflattened_data)
         messagebox.showinfo("Success", "XML file saved successfully!")
 
-    def flatten_json(self, json_obj, parent_key='', sep='_'):
-        """Flatten nested JSON objects into a dictionary."""
-        items = {}
-        for k, v in json_obj.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.update(self.flatten_json(v, new_key, sep=sep))
-            elif isinstance(v, list):
-                for i, item in enumerate(v):
-                    items.update(self.flatten_json({f"{k}_{i}": item}, parent_key, sep=sep))
-            else:
-                items[new_key] = v
-        return items
-
-    def unflatten_json(self, flat_json, sep='_'):
-        """Unflatten a dictionary to restore nested JSON objects."""
-        unflattened = {}
-        for k, v in flat_json.items():
-            keys = k.split(sep)
-            d = unflattened
-            for key in keys[:-1]:
-                d = d.setdefault(key, {})
-            d[keys[-1]] = v
-        return unflattened
+    def flatten_json(self, json_obj):
+        """Flatten nested JSON data into a dictionary keyed by path tuples."""
+        return flatten_json(json_obj)
+
+    def unflatten_json(self, flat_json):
+        """Restore the nested JSON data from its path tuples."""
+        return unflatten_json(flat_json)
+
+    def update_data(self, path, value):
+        """Update a leaf value when the user edits it."""
+        self.data[path] = value
 
     def xml_to_dict(self, element):
         """Convert an XML element and its children into a dictionary."""
-        d = {element.tag: {} if element.attrib else None}
-        children = list(element)
-        if children:
-            dd = {}
-            for dc in map(self.xml_to_dict, children):
-                for k, v in dc.items():
-                    if k in dd:
-                        if not isinstance(dd[k], list):
-                            dd[k] = [dd[k]]
-                        dd[k].append(v)
-                    else:
-                        dd[k] = v
-            d = {element.tag: dd}
-        if element.attrib:
-            d[element.tag].update(('@' + k, v) for k, v in element.attrib.items())
-        if element.text:
-            text = element.text.strip()
-            if children or element.attrib:
-                if text:
-                    d[element.tag]['#text'] = text
-            else:
-                d[element.tag] = text
-        return d
+        return xml_to_dict(element)
 
     def dict_to_xml(self, tag, d):
         """Convert a dictionary back to an XML element."""
-        element = ET.Element(tag)
-        for k, v in d.items():
-            if isinstance(v, dict):
-                child = self.dict_to_xml(k, v)
-                element.append(child)
-            else:
-                child = ET.SubElement(element, k)
-                child.text = str(v)
-        return element
+        return dict_to_xml(tag, d)
 
 
 class MultiFileEditorApp:
@@ -156,6 +149,7 @@ class MultiFileEditorApp:
         self.root = root
         self.root.title("Multi-File Editor")
         self.file_handler = FileHandler()
+        self.loader = BackgroundLoader(self.root)
 
         # Create UI components
         self.create_ui()
@@ -190,18 +184,42 @@ class MultiFileEditorApp:
         self.file_frame = tk.Frame(self.root)
         self.file_frame.grid(row=1, column=0, padx=10, pady=10)
 
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+
     def load_file(self, file_type):
-        """Load a file and display its content."""
-        self.file_handler.load_file(file_type)
+        """Load a file in the background and display its content when done."""
+        file_path = self.file_handler.choose_file(file_type)
+        if not file_path:
+            return
+        self.load_status.begin(file_path)
+        self.loader.start(
+            self.file_handler.iter_load(file_type, file_path),
+            on_done=lambda data: self.on_loaded(file_type, data),
+            on_progress=self.load_status.show_progress,
+            on_error=self.on_load_error,
+            on_cancel=lambda: self.load_status.finish("Loading cancelled"),
+        )
+
+    def on_loaded(self, file_type, data):
+        """Switch to the loaded data once the background load has finished."""
+        self.file_handler.set_loaded(file_type, data)
+        self.load_status.finish("Loaded")
         self.display_data()
 
+    def on_load_error(self, exc):
+        """Report a failed background load."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load file: {exc}")
+
     def save_file(self):
         """Save the file."""
         self.file_handler.save_file()
 
     def change_delimiter(self):
         """Change the CSV delimiter."""
-        delimiter = tk.simpledialog.askstring("Input", "Enter delimiter (e.g., comma, tab, semicolon):")
+        delimiter = simpledialog.askstring("Input", "Enter delimiter (e.g., comma, tab, semicolon):")
         if delimiter:
             self.file_handler.change_delimiter(delimiter)
 
@@ -215,16 +233,17 @@ class MultiFileEditorApp:
         for r, (key, value) in enumerate(self.file_handler.data.items()):
             key_entry = tk.Entry(self.file_frame, width=30)
             key_entry.grid(row=r, column=0, padx=5, pady=5)
-            key_entry.insert(0, key)
+            key_entry.insert(0, path_to_key(key))
             value_entry = tk.Entry(self.file_frame, width=30)
             value_entry.grid(row=r, column=1, padx=5, pady=5)
             value_entry.insert(0, value)
             value_entry.bind('<KeyRelease>', lambda event, k=key: self.file_handler.update_data(k, event.widget.get()))
 
 
-# Create the main Tkinter window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
 
-# Run the application
-app = MultiFileEditorApp(root)
-root.mainloop()
+    # Run the application
+    app = MultiFileEditorApp(root)
+    root.mainloop()
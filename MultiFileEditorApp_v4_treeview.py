@@ -1,37 +1,61 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import json
-import csv
+from multifile.csvio import LAZY_THRESHOLD, read_csv, iter_read_csv, write_csv, close_data
+from multifile.jsonio import iter_read_json, write_json
+from multifile.loader import BackgroundLoader, run_steps
+from multifile.ui.progress import LoadStatus
+from multifile.ui.search import SearchBar
+from multifile.ui.tree import LazyTree, is_container
 
 class FileHandler:
     def __init__(self):
         self.data = []
         self.file_type = None
         self.delimiter = ','  # Default delimiter for CSV
+        self.sniff_dialect = True  # Detect each CSV file's delimiter on load instead of using self.delimiter
+        self.lazy_threshold = LAZY_THRESHOLD  # CSV files this big are loaded lazily
+        self.json_indent = 4  # None saves compact JSON
+        self.dirty_rows = set()  # CSV rows edited since the last load or save
 
     def load_file(self, file_type):
         """Load a file based on the file type."""
-        file_path = filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+        file_path = self.choose_file(file_type)
         if not file_path:
             return
+        self.set_loaded(file_type, run_steps(self.iter_load(file_type, file_path)))
 
+    def choose_file(self, file_type):
+        """Ask for a file of the given type to open."""
+        return filedialog.askopenfilename(filetypes=[(f"{file_type.upper()} files", f"*.{file_type}")])
+
+    def iter_load(self, file_type, file_path):
+        """Loader steps that parse a file (see multifile.loader); pass the result to set_loaded."""
         if file_type == 'csv':
-            self.file_type = 'csv'
-            self.load_csv(file_path)
+            return (yield from iter_read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
         elif file_type == 'json':
-            self.file_type = 'json'
-            self.load_json(file_path)
+            return (yield from iter_read_json(file_path))
+
+    def set_loaded(self, file_type, data):
+        """Make freshly loaded data the current data."""
+        close_data(self.data)
+        self.file_type = file_type
+        self.data = data
+        if file_type == 'csv':
+            self.delimiter = data.delimiter
+        self.dirty_rows = set()
+
+    def load_delimiter(self):
+        """Delimiter to open CSV files with (None lets the reader sniff it)."""
+        return None if self.sniff_dialect else self.delimiter
 
     def load_csv(self, file_path):
-        """Load CSV file and store its data."""
-        with open(file_path, newline='') as csvfile:
-            reader = csv.reader(csvfile, delimiter=self.delimiter)
-            self.data = list(reader)
+        """Load CSV file and store its data (big files are parsed on demand)."""
+        self.set_loaded('csv', read_csv(file_path, self.load_delimiter(), self.lazy_threshold))
 
     def load_json(self, file_path):
         """Load JSON file and store its data."""
-        with open(file_path, "r") as json_file:
-            self.data = json.load(json_file)
+        self.set_loaded('json', run_steps(iter_read_json(file_path)))
 
     def save_file(self, file_path):
         """Save the data to a file based on the current file type."""
@@ -41,17 +65,28 @@ class FileHandler:
             self.save_json(file_path)
 
     def save_csv(self, file_path):
-        """Save CSV data to file."""
-        with open(file_path, mode='w', newline='') as csvfile:
-            writer = csv.writer(csvfile, delimiter=self.delimiter)
-            for row in self.data:
-                writer.writerow(row)
+        """Save CSV data to file (atomically, re-encoding only edited rows of lazy data)."""
+        self.data = write_csv(self.data, file_path, self.delimiter, self.dirty_rows)
+        self.dirty_rows.clear()
         messagebox.showinfo("Success", "CSV file saved successfully!")
 
+    def note_edit(self, path):
+        """Remember which CSV row an edit at a data path changed, so saving rewrites it."""
+        if self.file_type == 'csv' and path:
+            self.dirty_rows.add(path[0])
+
+    def parse_value(self, text, old):
+        """Turn edited text back into a value of the same kind as the one it replaces."""
+        if self.file_type != 'json' or isinstance(old, str):
+            return text
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
     def save_json(self, file_path):
-        """Save JSON data to file."""
-        with open(file_path, "w") as json_file:
-            json.dump(self.data, json_file, indent=4)
+        """Save JSON data to file (atomically)."""
+        write_json(self.data, file_path, self.json_indent)
         messagebox.showinfo("Success", "JSON file saved successfully!")
 
 class MultiFileEditorApp:
@@ -59,6 +94,7 @@ class MultiFileEditorApp:
         self.root = root
         self.root.title("Multi-File Editor with Treeview")
         self.file_handler = FileHandler()
+        self.loader = BackgroundLoader(self.root)
 
         # Create UI components
         self.create_ui()
@@ -85,10 +121,10 @@ class MultiFileEditorApp:
         self.tree_frame = tk.Frame(self.root)
         self.tree_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
 
-        self.tree = ttk.Treeview(self.tree_frame, columns=("Key", "Value"), show="headings")
-        self.tree.heading("Key", text="Key")
+        self.tree = ttk.Treeview(self.tree_frame, columns=("Value",), show="tree headings")
+        self.tree.heading("#0", text="Key")
         self.tree.heading("Value", text="Value")
-        self.tree.column("Key", width=200)
+        self.tree.column("#0", width=200)
         self.tree.column("Value", width=400)
         self.tree.grid(row=0, column=0, sticky="nsew")
 
@@ -102,16 +138,50 @@ class MultiFileEditorApp:
         self.input_frame.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
 
         self.entry_widget = tk.Entry(self.input_frame, width=60)
+        self.entry_widget.bind("<Return>", lambda event: self.apply_edit())
         self.text_widget = tk.Text(self.input_frame, height=5, width=60)
+        self.apply_button = tk.Button(self.input_frame, text="Apply", command=self.apply_edit)
+        self.editing = None  # Tree node whose value is in the input widget
+
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.grid(row=3, column=0, padx=10, pady=5, sticky="w")
+
+        # Find keys and values through an index built in the background
+        self.search_bar = SearchBar(self.root, on_jump=lambda path: self.tree_model.reveal(path))
+        self.search_bar.grid(row=4, column=0, padx=10, pady=5, sticky="w")
 
         # Bind selection change in Treeview to display the editable input widget
         self.tree.bind("<<TreeviewSelect>>", self.on_treeview_select)
 
+        # Nodes are inserted as they are opened and know their path in the data
+        self.tree_model = LazyTree(self.tree)
+
     def load_file(self, file_type):
-        """Load a file and display its content."""
-        self.file_handler.load_file(file_type)
+        """Load a file in the background and display its content when done."""
+        file_path = self.file_handler.choose_file(file_type)
+        if not file_path:
+            return
+        self.load_status.begin(file_path)
+        self.loader.start(
+            self.file_handler.iter_load(file_type, file_path),
+            on_done=lambda data: self.on_loaded(file_type, data),
+            on_progress=self.load_status.show_progress,
+            on_error=self.on_load_error,
+            on_cancel=lambda: self.load_status.finish("Loading cancelled"),
+        )
+
+    def on_loaded(self, file_type, data):
+        """Switch to the loaded data once the background load has finished."""
+        self.file_handler.set_loaded(file_type, data)
+        self.load_status.finish("Loaded")
         self.display_data()
 
+    def on_load_error(self, exc):
+        """Report a failed background load."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load file: {exc}")
+
     def save_file(self):
         """Save the file."""
         file_path = filedialog.asksaveasfilename(defaultextension=f".{self.file_handler.file_type}", filetypes=[(f"{self.file_handler.file_type.upper()} files", f"*.{self.file_handler.file_type}")])
@@ -119,51 +189,69 @@ class MultiFileEditorApp:
             self.file_handler.save_file(file_path)
 
     def display_data(self):
-        """Display the loaded data in the Treeview."""
-        # Clear previous data
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        # Display JSON or CSV data in Treeview
-        if isinstance(self.file_handler.data, list):
-            if isinstance(self.file_handler.data[0], dict):  # JSON list of dictionaries
-                for i, entry in enumerate(self.file_handler.data):
-                    for key, value in entry.items():
-                        self.tree.insert("", "end", values=(key, value))
-            else:  # CSV data
-                for row in self.file_handler.data:
-                    self.tree.insert("", "end", values=(row[0], row[1:] if len(row) > 1 else ""))
-        elif isinstance(self.file_handler.data, dict):  # JSON object
-            for key, value in self.file_handler.data.items():
-                self.tree.insert("", "end", values=(key, value))
+        """Display the loaded data in the Treeview, top level first."""
+        self.clear_input_frame()
+        self.tree_model.set_data(self.file_handler.data)
+        self.search_bar.set_data(self.file_handler.data)
 
     def on_treeview_select(self, event):
         """Handle selection in Treeview and display editable widget."""
         selection = self.tree.selection()
-        if selection:
-            item = self.tree.item(selection[0])
-            key, value = item["values"]
+        self.clear_input_frame()
+        if not selection:
+            return
+        path = self.tree_model.path_of(selection[0])
+        if path is None:
+            return
+        value = self.tree_model.value_at(path)
+        if is_container(value):
+            return  # Open the node to edit its items
+        self.editing = selection[0]
+        value = "" if value is None and self.file_handler.file_type == 'csv' else value
+        if not isinstance(value, str):
+            value = json.dumps(value)
 
-            self.clear_input_frame()
+        if len(value) > 50:
+            self.text_widget.grid(row=0, column=0, padx=5, pady=5)
+            self.text_widget.delete(1.0, tk.END)
+            self.text_widget.insert(tk.END, value)
+        else:
+            self.entry_widget.grid(row=0, column=0, padx=5, pady=5)
+            self.entry_widget.delete(0, tk.END)
+            self.entry_widget.insert(0, value)
+        self.apply_button.grid(row=0, column=1, padx=5, pady=5)
 
-            if isinstance(value, str) and len(value) > 50:
-                self.text_widget.grid(row=0, column=0, padx=5, pady=5)
-                self.text_widget.delete(1.0, tk.END)
-                self.text_widget.insert(tk.END, value)
-            else:
-                self.entry_widget.grid(row=0, column=0, padx=5, pady=5)
-                self.entry_widget.delete(0, tk.END)
-                self.entry_widget.insert(0, value)
+    def apply_edit(self):
+        """Write the edited value back to the data at the selected node's path."""
+        node = self.editing
+        if node is None or self.tree_model.path_of(node) is None:
+            return
+        if self.text_widget.winfo_manager():
+            text = self.text_widget.get(1.0, "end-1c")
+        else:
+            text = self.entry_widget.get()
+        path = self.tree_model.path_of(node)
+        old = self.tree_model.value_at(path)
+        self.tree_model.set_value(node, self.file_handler.parse_value(text, old))
+        self.file_handler.note_edit(path)
+        if path:
+            self.search_bar.note_edit(path)
+        else:
+            self.file_handler.data = self.tree_model.data
+            self.search_bar.set_data(self.file_handler.data)
 
     def clear_input_frame(self):
         """Clear the input frame (remove Entry or Text widget)."""
         self.entry_widget.grid_remove()
         self.text_widget.grid_remove()
+        self.apply_button.grid_remove()
+        self.editing = None
 
 
-# Create the main Tkinter window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
 
-# Run the application
-app = MultiFileEditorApp(root)
-root.mainloop()
+    # Run the application
+    app = MultiFileEditorApp(root)
+    root.mainloop()
@@ -1,7 +1,8 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import vobject
 import quopri  # Add this import for decoding
+from multifile.loader import BackgroundLoader
+from multifile.ui.progress import LoadStatus
 
 class VCFEditorApp:
     def __init__(self, root):
@@ -9,6 +10,7 @@ class VCFEditorApp:
         self.root.title("VCF Contact Viewer/Editor")
         self.root.geometry("600x400")
         self.contacts = []
+        self.loader = BackgroundLoader(self.root)
 
         # Setup GUI elements
         self.setup_widgets()
@@ -18,6 +20,10 @@ class VCFEditorApp:
         self.open_button = tk.Button(self.root, text="Open VCF File", command=self.open_vcf_file)
         self.open_button.pack(pady=10)
 
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.pack()
+
         # Listbox to show contacts
         self.contact_list = tk.Listbox(self.root, selectmode=tk.SINGLE)
         self.contact_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -43,6 +49,24 @@ class VCFEditorApp:
         if not file_path:
             return
 
+        # Parse in the background; contacts are listed as they are parsed
+        self.contacts = []
+        self.contact_list.delete(0, tk.END)
+        self.load_status.begin(file_path)
+        self.loader.start(
+            self.iter_load_contacts(file_path),
+            on_done=lambda count: self.load_status.finish(f"{count} contacts"),
+            on_progress=self.load_status.show_progress,
+            on_partial=self.add_contacts,
+            on_error=self.on_load_error,
+            on_cancel=lambda: self.load_status.finish("Loading cancelled"),
+        )
+
+    def iter_load_contacts(self, file_path, batch_size=200):
+        """Loader steps (see multifile.loader) yielding parsed contacts in batches."""
+        # vobject is slow to import, so only load it once a file is opened
+        import vobject
+
         # Read and decode VCF file
         with open(file_path, "r") as file:
             raw_data = file.read()
@@ -51,18 +75,34 @@ class VCFEditorApp:
         decoded_data = quopri.decodestring(raw_data).decode('utf-8')
 
         # Parse VCF data
-        try:
-            self.contacts = list(vobject.readComponents(decoded_data))
-        except vobject.base.ParseError as e:
-            messagebox.showerror("Parse Error", f"Failed to parse the VCF file: {e}")
-            return
+        count = 0
+        batch = []
+        for contact in vobject.readComponents(decoded_data):
+            batch.append(contact)
+            if len(batch) >= batch_size:
+                count += len(batch)
+                yield count, None, batch
+                batch = []
+        if batch:
+            count += len(batch)
+            yield count, None, batch
+        return count
 
+    def add_contacts(self, batch):
         # Populate the contact list
-        self.contact_list.delete(0, tk.END)
-        for contact in self.contacts:
+        self.contacts.extend(batch)
+        for contact in batch:
             name = contact.fn.value if hasattr(contact, 'fn') else "Unknown"
             self.contact_list.insert(tk.END, name)
 
+    def on_load_error(self, e):
+        import vobject
+        self.load_status.finish()
+        if isinstance(e, vobject.base.ParseError):
+            messagebox.showerror("Parse Error", f"Failed to parse the VCF file: {e}")
+        else:
+            messagebox.showerror("Error", f"Failed to read VCF file: {e}")
+
     def show_contact_details(self, event):
         # Display selected contact details
         index = self.contact_list.curselection()
@@ -1,17 +1,21 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import xml.etree.ElementTree as ET
+from multifile.journal import EditJournal
 
 class XMLCreatorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("XML Creator")
 
-        # Create the main UI for adding elements and attributes
-        self.create_ui()
-
         # Hold all elements for hierarchy
         self.sub_elements = []
+        # Committed (tag, text, attributes) of each sub-element; the journal keeps the undo history
+        self.values = []
+        self.journal = EditJournal(self.get_value, self.set_value)
+
+        # Create the main UI for adding elements and attributes
+        self.create_ui()
 
     def create_ui(self):
         """Create the UI components."""
@@ -36,6 +40,15 @@ class XMLCreatorApp:
         self.status_label = tk.Label(self.root, text="", fg="green")
         self.status_label.grid(row=4, column=0, columnspan=2, pady=10)
 
+        # Undo/Redo of the sub-element fields
+        self.undo_button = tk.Button(self.root, text="Undo", command=self.undo)
+        self.undo_button.grid(row=5, column=0, pady=5)
+        self.redo_button = tk.Button(self.root, text="Redo", command=self.redo)
+        self.redo_button.grid(row=5, column=1, pady=5)
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Control-Z>', lambda event: self.redo())
+
     def add_sub_element(self):
         """Add a new row of inputs for a sub-element."""
         row_index = len(self.sub_elements)
@@ -59,9 +72,44 @@ class XMLCreatorApp:
 
         # Add the new sub-element inputs to the list
         self.sub_elements.append((tag_entry, text_entry, attr_entry))
+        self.values.append(['', '', ''])
+        for entry in (tag_entry, text_entry, attr_entry):
+            entry.bind('<FocusOut>', lambda event: self.commit_fields())
+            entry.bind('<Return>', lambda event: self.commit_fields())
+
+    def commit_fields(self):
+        """Journal the fields that changed since the last commit as one undoable step."""
+        for row, entries in enumerate(self.sub_elements):
+            for col, entry in enumerate(entries):
+                text = entry.get()
+                if text != self.values[row][col]:
+                    self.journal.record(row, col, text)
+        self.journal.commit()
+
+    def get_value(self, row, col):
+        return self.values[row][col]
+
+    def set_value(self, row, col, value):
+        """Store a field value and show it in its Entry (for undo/redo)."""
+        self.values[row][col] = value
+        entry = self.sub_elements[row][col]
+        if entry.get() != value:
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+
+    def undo(self):
+        """Revert the last committed change to the sub-element fields."""
+        self.commit_fields()
+        self.journal.undo()
+
+    def redo(self):
+        """Re-apply the last undone change to the sub-element fields."""
+        self.commit_fields()
+        self.journal.redo()
 
     def create_xml(self):
         """Create an XML file based on the user's input."""
+        self.commit_fields()
         root_element_name = self.root_element_entry.get()
         if not root_element_name:
             messagebox.showerror("Error", "Please provide a root element.")
@@ -112,9 +160,11 @@ class XMLCreatorApp:
         else:
             self.status_label.config(text="XML creation cancelled.", fg="red")
 
-# Create the main Tkinter window
-root = tk.Tk()
 
-# Run the application
-app = XMLCreatorApp(root)
-root.mainloop()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
+
+    # Run the application
+    app = XMLCreatorApp(root)
+    root.mainloop()
@@ -1,14 +1,26 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
-import csv
 from io import StringIO
+from multifile.csvio import LAZY_THRESHOLD, iter_read_csv, reparse_csv, write_csv, close_data
+from multifile.index import TableIndex
+from multifile.journal import EditJournal
+from multifile.loader import BackgroundLoader
+from multifile.ui.grid import VirtualGrid
+from multifile.ui.progress import LoadStatus
+from multifile.ui.query import QueryBar
 
 class CSVEditorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("CSV Editor")
         self.delimiter = ','  # Default delimiter
+        self.sniff_dialect = True  # Detect each file's delimiter on load instead of using self.delimiter
         self.data = []
+        self.lazy_threshold = LAZY_THRESHOLD  # CSV files this big are loaded lazily
+        self.dirty_rows = set()  # Rows edited since the last load or save
+        self.journal = EditJournal(self.get_cell, self.update_data)  # Batches grid edits, keeps undo history
+        self.index = TableIndex(self.data)  # Column indexes for sorting, filtering and lookups
+        self.loader = BackgroundLoader(self.root)
 
         # Create UI components
         self.create_ui()
@@ -35,27 +47,85 @@ class CSVEditorApp:
         self.delimiter_button = tk.Button(button_frame, text="Change Delimiter", command=self.change_delimiter)
         self.delimiter_button.grid(row=0, column=3, padx=5, pady=5)
 
-        # Frame to display CSV content in a grid
-        self.csv_frame = tk.Frame(self.root)
-        self.csv_frame.grid(row=1, column=0, padx=10, pady=10)
+        # Undo/Redo replay the edit journal, so they cost the same however big the file is
+        self.undo_button = tk.Button(button_frame, text="Undo", command=self.undo)
+        self.undo_button.grid(row=0, column=4, padx=5, pady=5)
+        self.redo_button = tk.Button(button_frame, text="Redo", command=self.redo)
+        self.redo_button.grid(row=0, column=5, padx=5, pady=5)
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
+        self.root.bind('<Control-Z>', lambda event: self.redo())
+
+        # Scrollable grid that only creates Entry widgets for the visible cells
+        # Grid rows are mapped back to file rows while sorted or filtered
+        self.csv_grid = VirtualGrid(self.root, on_edit=self.record_edit, on_flush=self.journal.commit)
+        self.csv_grid.grid(row=1, column=0, padx=10, pady=10)
+
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(self.root, self.loader)
+        self.load_status.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+
+        # Sort, filter and go-to-key over the loaded rows
+        self.query_bar = QueryBar(self.root, self.csv_grid, lambda: self.index)
+        self.query_bar.grid(row=3, column=0, padx=10, pady=5, sticky="w")
 
     def load_csv(self):
-        """Load a CSV file and display it in the grid."""
+        """Load a CSV file in the background and display it in the grid as rows are parsed."""
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if file_path:
-            with open(file_path, newline='') as csvfile:
-                reader = csv.reader(csvfile, delimiter=self.delimiter)
-                self.data = list(reader)
-                self.display_csv_data()
+            # Apply pending edits now: the grid switches to the new rows as they are parsed
+            self.csv_grid.flush()
+            self.load_status.begin(file_path)
+            self.loader.start(
+                iter_read_csv(file_path, None if self.sniff_dialect else self.delimiter, self.lazy_threshold),
+                on_done=self.on_loaded,
+                on_progress=self.load_status.show_progress,
+                on_partial=self.show_partial,
+                on_error=self.on_load_error,
+                on_cancel=self.on_load_cancelled,
+            )
+
+    def show_partial(self, data):
+        """Show the rows parsed so far; editing waits until the load is done."""
+        self.query_bar.reset()
+        self.csv_grid.editable = False
+        if self.csv_grid.data is data:
+            self.csv_grid.refresh()
+        else:
+            self.csv_grid.set_data(data)
+
+    def on_loaded(self, data):
+        """Switch to the loaded data once the background load has finished."""
+        close_data(self.data)
+        self.data = data
+        self.delimiter = data.delimiter
+        self.reset_index()
+        self.dirty_rows = set()
+        self.journal.clear()
+        self.load_status.finish(f"Loaded {len(data):,} rows")
+        self.display_csv_data()
+
+    def on_load_error(self, exc):
+        """Report a failed background load and go back to the previous data."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load CSV file: {exc}")
+        self.display_csv_data()
+
+    def on_load_cancelled(self):
+        """Go back to the previous data after the user cancelled a load."""
+        self.load_status.finish("Loading cancelled")
+        self.display_csv_data()
 
     def save_csv(self):
-        """Save the edited CSV data to a file."""
+        """Save the edited CSV data to a file (atomically, re-encoding only edited rows of lazy data)."""
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if file_path:
-            with open(file_path, mode='w', newline='') as csvfile:
-                writer = csv.writer(csvfile, delimiter=self.delimiter)
-                for row in self.data:
-                    writer.writerow(row)
+            self.csv_grid.flush()
+            self.journal.commit()
+            self.data = write_csv(self.data, file_path, self.delimiter, self.dirty_rows)
+            self.index.set_data(self.data)
+            self.dirty_rows.clear()
+            self.query_bar.rebind(self.data)
             messagebox.showinfo("Success", "CSV file saved successfully!")
 
     def create_new_csv(self):
@@ -63,41 +133,75 @@ class CSVEditorApp:
         rows = simpledialog.askinteger("Input", "How many rows?", minvalue=1, maxvalue=100)
         cols = simpledialog.askinteger("Input", "How many columns?", minvalue=1, maxvalue=50)
         if rows and cols:
+            close_data(self.data)
             self.data = [['' for _ in range(cols)] for _ in range(rows)]
+            self.reset_index()
+            self.dirty_rows = set()
+            self.journal.clear()
             self.display_csv_data()
 
     def change_delimiter(self):
-        """Change the CSV delimiter."""
+        """Change the CSV delimiter and re-split the loaded file with it."""
         delimiter = simpledialog.askstring("Input", "Enter delimiter (e.g., comma, tab, semicolon):")
         if delimiter:
+            self.csv_grid.flush()
+            if self.dirty_rows or self.journal.pending:
+                if not messagebox.askyesno("Change Delimiter", "Re-splitting the file discards unsaved edits. Continue?"):
+                    return
             if delimiter.lower() == "tab":
                 self.delimiter = '\t'
             else:
                 self.delimiter = delimiter
-            self.display_csv_data()  # Re-load the data with the new delimiter
+            self.data = reparse_csv(self.data, self.delimiter)  # Re-load the data with the new delimiter
+            self.reset_index()
+            self.dirty_rows = set()
+            self.journal.clear()
+            self.display_csv_data()
+
+    def undo(self):
+        """Revert the last batch of grid edits."""
+        self.csv_grid.flush()
+        if self.journal.undo():
+            self.csv_grid.refresh()
+
+    def redo(self):
+        """Re-apply the last undone batch of grid edits."""
+        self.csv_grid.flush()
+        if self.journal.redo():
+            self.csv_grid.refresh()
 
     def display_csv_data(self):
         """Display the CSV data in the grid (editable)."""
-        # Clear previous data from the frame
-        for widget in self.csv_frame.winfo_children():
-            widget.destroy()
-
-        # Display the CSV content in a grid of Entry widgets
-        for r, row in enumerate(self.data):
-            for c, value in enumerate(row):
-                entry = tk.Entry(self.csv_frame, width=15)
-                entry.grid(row=r, column=c, padx=5, pady=5)
-                entry.insert(0, value)
-                entry.bind('<KeyRelease>', lambda event, row=r, col=c: self.update_data(row, col, event.widget.get()))
+        header = None
+        if getattr(self.data, 'has_header', False) and len(self.data):
+            header = list(self.data[0])
+        self.query_bar.reset()
+        self.csv_grid.editable = True
+        self.csv_grid.set_data(self.data, header=header)
+
+    def reset_index(self):
+        """Start new, empty column indexes for the current data."""
+        self.index = TableIndex(self.data, 1 if getattr(self.data, 'has_header', False) else 0)
+
+    def record_edit(self, row, col, value):
+        """VirtualGrid ``on_edit`` callback: journal an edit of the row shown at grid row ``row``."""
+        self.journal.record(self.query_bar.source_row(row), col, value)
+
+    def get_cell(self, row, col):
+        """Return the current value of a cell."""
+        return self.data[row][col]
 
     def update_data(self, row, col, value):
         """Update the CSV data when the user edits the grid."""
+        self.index.update(row, col, self.data[row][col], value)
         self.data[row][col] = value
+        self.dirty_rows.add(row)
 
 
-# Create the main Tkinter window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
 
-# Run the application
-app = CSVEditorApp(root)
-root.mainloop()
+    # Run the application
+    app = CSVEditorApp(root)
+    root.mainloop()
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import json
+from multifile.jsonio import write_json
 
 class JSONCreatorApp:
     def __init__(self, root):
@@ -54,13 +54,14 @@ class JSONCreatorApp:
         """Save the current key-value pairs as a JSON file."""
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
-            with open(file_path, "w") as json_file:
-                json.dump(self.data, json_file, indent=4)
+            write_json(self.data, file_path)
             messagebox.showinfo("Success", f"JSON file saved at {file_path}")
 
-# Create the main Tkinter window
-root = tk.Tk()
 
-# Run the application
-app = JSONCreatorApp(root)
-root.mainloop()
+if __name__ == "__main__":
+    # Create the main Tkinter window
+    root = tk.Tk()
+
+    # Run the application
+    app = JSONCreatorApp(root)
+    root.mainloop()
@@ -0,0 +1 @@
+"""Shared building blocks for the file editor apps."""
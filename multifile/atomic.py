@@ -0,0 +1,37 @@
+"""Crash-safe file replacement."""
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(file_path, mode='w', before_replace=None, **kwargs):
+    """Open a temp file next to ``file_path`` and move it into place on success.
+
+    The temp file is flushed and fsynced before ``os.replace`` so the target
+    is either the old file or the complete new one, never a partial write.
+    If the block raises, the temp file is removed and the target is untouched.
+    ``before_replace()`` is called just before the replace, e.g. to close
+    the target where open files cannot be replaced.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, **kwargs) as tmp_file:
+            yield tmp_file
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        # mkstemp creates the file 0600; give it the permissions open() would have
+        if os.path.exists(file_path):
+            os.chmod(tmp_path, os.stat(file_path).st_mode & 0o7777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+        if before_replace is not None:
+            before_replace()
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,180 @@
+"""Command line entry point: ``python -m multifile``.
+
+Load, convert and save files without a GUI, e.g. from cron jobs::
+
+    python -m multifile convert contacts.vcf contacts.csv
+    python -m multifile convert data.csv data.json --delimiter ';'
+    python -m multifile convert events.jsonl events.csv
+    python -m multifile convert records.json records.xml
+    python -m multifile info data.xml
+"""
+import argparse
+import os
+import sys
+
+from multifile.convert import FORMATS, guess_format
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m multifile', description="Load, convert and save data files.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="convert a file to another format")
+    convert.add_argument('source')
+    convert.add_argument('target', help="output file, or - for standard output")
+    convert.add_argument('--from', dest='source_format', choices=FORMATS, help="format of the source (default: from its extension)")
+    convert.add_argument('--to', dest='target_format', choices=[fmt for fmt in FORMATS if fmt != 'vcf'], help="format of the target (default: from its extension)")
+    convert.add_argument('--delimiter', help="CSV delimiter of the source (default: detected)")
+    convert.add_argument('--out-delimiter', default=',', help="CSV delimiter of the target (default: ,)")
+    convert.add_argument('--compact', action='store_true', help="write JSON without indentation (faster, smaller)")
+
+    info = commands.add_parser('info', help="load a file and describe its contents")
+    info.add_argument('source')
+    info.add_argument('--from', dest='source_format', choices=FORMATS)
+    info.add_argument('--delimiter')
+    return parser
+
+
+def describe(data):
+    """Return a one-line summary of loaded data."""
+    if isinstance(data, dict):
+        return f"object with {len(data):,} keys: {', '.join(map(str, list(data)[:10]))}"
+    return describe_records(data)
+
+
+def describe_records(records):
+    """Summarize a list (or any iterable) of rows or records in one pass without keeping them."""
+    count = 0
+    keys = {}
+    all_dicts = True
+    for item in records:
+        count += 1
+        if isinstance(item, dict):
+            keys.update(dict.fromkeys(item))
+        else:
+            all_dicts = False
+    if count and all_dicts:
+        return f"{count:,} records with {len(keys):,} fields: {', '.join(map(str, list(keys)[:10]))}"
+    return f"{count:,} rows"
+
+
+def streamable(file_path, fmt):
+    """True if the records of a file can be read one at a time (JSON arrays and JSON Lines)."""
+    if fmt == 'ndjson':
+        return True
+    if fmt == 'json':
+        from multifile.jsonio import starts_with_array
+        return starts_with_array(file_path)
+    return False
+
+
+def iter_records(file_path, fmt):
+    """Yield the records of a JSON array or JSON Lines file one at a time."""
+    if fmt == 'ndjson':
+        from multifile.ndjson import iter_ndjson
+        with open(file_path, encoding='utf-8') as ndjson_file:
+            yield from iter_ndjson(ndjson_file)
+    else:
+        from multifile.jsonio import iter_json_array
+        with open(file_path, encoding='utf-8-sig') as json_file:
+            yield from iter_json_array(json_file)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    source_format = args.source_format or guess_format(args.source)
+    if source_format is None:
+        sys.exit(f"Cannot tell the format of {args.source}; use --from")
+
+    target_format = target_format_of(args) if args.command == 'convert' else None
+    if streamable(args.source, source_format) and (
+            args.command == 'info' or target_format in ('csv', 'xml') or (target_format == 'ndjson' and args.target != '-')):
+        # Records go straight from the source to the target without being held in memory
+        try:
+            records = iter_records(args.source, source_format)
+            if args.command == 'info':
+                print(f"{args.source}: {source_format}, {os.path.getsize(args.source):,} bytes, {describe_records(records)}")
+            elif target_format == 'csv':
+                write_records_csv(records, args.target, args.out_delimiter)
+            elif target_format == 'xml':
+                write_records_xml(records, args.target)
+            else:
+                from multifile.ndjson import write_ndjson
+                write_ndjson(records, args.target).close()
+        except (OSError, ValueError) as exc:
+            sys.exit(f"Failed to convert {args.source}: {exc}")
+        return
+
+    from multifile.convert import read_file
+    try:
+        data = read_file(args.source, source_format, args.delimiter)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"Failed to load {args.source}: {exc}")
+
+    if args.command == 'info':
+        print(f"{args.source}: {source_format}, {os.path.getsize(args.source):,} bytes, {describe(data)}")
+        return
+    if target_format is None:
+        sys.exit(f"Cannot tell the format to write {args.target} in; use --to")
+    from multifile.convert import write_file
+    indent = None if args.compact else 4
+    try:
+        if args.target == '-':
+            write_stdout(data, target_format, args.out_delimiter, indent)
+        else:
+            write_file(data, args.target, target_format, args.out_delimiter, indent)
+    except (OSError, ValueError) as exc:
+        sys.exit(f"Failed to save {args.target}: {exc}")
+
+
+def target_format_of(args):
+    """Format to convert to: --to, or the target's extension."""
+    return args.target_format or (None if args.target == '-' else guess_format(args.target))
+
+
+def write_stdout(data, fmt, delimiter, indent=4):
+    """Write converted data to standard output instead of a file."""
+    if fmt == 'json':
+        from multifile.jsonio import iter_encode_json, write_chunks
+        write_chunks(iter_encode_json(data, indent), sys.stdout)
+        sys.stdout.write('\n')
+    elif fmt == 'ndjson':
+        from multifile.jsonio import write_chunks
+        from multifile.ndjson import encode_record
+        write_chunks(map(encode_record, data if isinstance(data, list) else [data]), sys.stdout)
+    elif fmt == 'csv':
+        from multifile.convert import json_records
+        write_records_csv(json_records(data), '-', delimiter)
+    else:
+        from multifile.xmlwrite import XMLWriter, write_data
+        sys.stdout.flush()
+        writer = XMLWriter(sys.stdout.buffer)
+        writer.start_document()
+        write_data(writer, data)
+        writer.end_document()
+        sys.stdout.buffer.write(b'\n')
+
+
+def write_records_csv(records, target, delimiter=','):
+    """Write records as CSV (see multifile.convert.write_records_csv), to a file or (for ``-``) standard output."""
+    from multifile.convert import dump_records_csv, write_records_csv
+    if target != '-':
+        write_records_csv(records, target, delimiter)
+        return
+    sys.stdout.flush()
+    dump_records_csv(records, sys.stdout.buffer, delimiter)
+
+
+def write_records_xml(records, target):
+    """Write records as XML one at a time, to a file or (for ``-``) standard output."""
+    from multifile.xmlwrite import XMLWriter, write_records, xml_file
+    if target != '-':
+        with xml_file(target) as writer:
+            write_records(writer, records)
+        return
+    sys.stdout.flush()
+    writer = XMLWriter(sys.stdout.buffer)
+    writer.start_document()
+    write_records(writer, records)
+    writer.end_document()
+    sys.stdout.buffer.write(b'\n')
@@ -0,0 +1,437 @@
+"""Format conversions shared by the editor apps and the command line.
+
+Nothing here needs Tk, and the parsers for each format (csv, xml.etree)
+are only imported when a file of that format is read or written.
+"""
+import json
+import os
+
+FORMATS = ('csv', 'json', 'ndjson', 'xml', 'vcf')
+# Other file extensions of the formats
+EXTENSIONS = {'jsonl': 'ndjson'}
+
+# Rows formatted per write when streaming JSON records to CSV
+CSV_BATCH_ROWS = 10000
+# Bytes copied per read when moving spilled rows into place
+COPY_CHUNK = 16 * 1024 * 1024
+
+
+def guess_format(file_path):
+    """Return the format named by a file's extension, or None."""
+    fmt = os.path.splitext(file_path)[1].lower().lstrip('.')
+    fmt = EXTENSIONS.get(fmt, fmt)
+    return fmt if fmt in FORMATS else None
+
+
+def flatten_json(json_obj):
+    """Flatten nested JSON data into a dict mapping path tuples to leaf values.
+
+    A path holds the object keys (str) and list indexes (int) leading to a
+    leaf, e.g. ``{"a": [1, {"b": 2}]}`` flattens to ``{("a", 0): 1,
+    ("a", 1, "b"): 2}``.  Empty objects and lists are kept as leaves so
+    unflatten_json can rebuild them.  Each node is visited once, with an
+    explicit stack instead of recursion, so depth is not limited by the
+    recursion limit.
+    """
+    flat = {}
+    if not isinstance(json_obj, (dict, list)) or not json_obj:
+        flat[()] = json_obj
+        return flat
+    # keys[i] is the key of the node whose children stack[i + 1] walks
+    keys = []
+    stack = [iter(json_obj.items() if isinstance(json_obj, dict) else enumerate(json_obj))]
+    while stack:
+        for key, value in stack[-1]:
+            if isinstance(value, dict) and value:
+                keys.append(key)
+                stack.append(iter(value.items()))
+                break
+            if isinstance(value, list) and value:
+                keys.append(key)
+                stack.append(enumerate(value))
+                break
+            keys.append(key)
+            flat[tuple(keys)] = value
+            keys.pop()
+        else:
+            stack.pop()
+            if keys:
+                keys.pop()
+    return flat
+
+
+def unflatten_json(flat_json):
+    """Rebuild the nested data that flatten_json flattened.
+
+    Integer path parts become list indexes and strings become object keys.
+    Containers along the previous path are reused, so paths in flatten_json
+    order only walk the part that differs from the path before.
+    """
+    if not flat_json:
+        return {}
+    if () in flat_json:
+        return flat_json[()]
+    root = [] if isinstance(next(iter(flat_json))[0], int) else {}
+    nodes = [root]  # nodes[i] is the container at prev[:i]
+    prev = ()
+    for path, value in flat_json.items():
+        common = 0
+        limit = min(len(prev), len(path)) - 1
+        while common < limit and prev[common] == path[common]:
+            common += 1
+        del nodes[common + 1:]
+        node = nodes[-1]
+        for i in range(common, len(path) - 1):
+            key = path[i]
+            if isinstance(node, list):
+                child = node[key] if key < len(node) else None
+            else:
+                child = node.get(key)
+            if child is None:
+                child = [] if isinstance(path[i + 1], int) else {}
+                set_child(node, key, child)
+            nodes.append(child)
+            node = child
+        set_child(node, path[-1], value)
+        prev = path
+    return root
+
+
+def set_child(node, key, value):
+    """Set ``node[key]``, growing a list with None up to index ``key`` if needed."""
+    if isinstance(node, list) and key >= len(node):
+        if key > len(node):
+            node.extend([None] * (key - len(node)))
+        node.append(value)
+    else:
+        node[key] = value
+
+
+def path_to_key(path, sep='_'):
+    """Render a flatten_json path as a display string, e.g. ``a_0_b``."""
+    return sep.join(map(str, path))
+
+
+def xml_to_dict(element):
+    """Convert an XML element and its children into a dictionary.
+
+    Repeated child tags become lists, attributes ``@name`` keys and text
+    next to children or attributes a ``#text`` key.  The tree is walked
+    with an explicit stack, so depth is not limited by the recursion limit.
+    """
+    result = {}
+    # (element, children iterator, dict of the children converted so far)
+    stack = [(element, iter(element), {})]
+    while stack:
+        current, children, content = stack[-1]
+        child = next(children, None)
+        if child is not None:
+            stack.append((child, iter(child), {}))
+            continue
+        stack.pop()
+        value = element_value(current, content)
+        add_member(stack[-1][2] if stack else result, current.tag, value)
+    return result
+
+
+def element_value(element, content):
+    """Return xml_to_dict's value for an element, given the dict of its converted children."""
+    value = content if content else ({} if element.attrib else None)
+    if element.attrib:
+        value.update(('@' + k, v) for k, v in element.attrib.items())
+    if element.text:
+        text = element.text.strip()
+        if content or element.attrib:
+            if text:
+                value['#text'] = text
+        else:
+            value = text
+    return value
+
+
+def add_member(d, key, value):
+    """Add a converted child to ``d``, collecting repeated tags into a list."""
+    if key not in d:
+        d[key] = value
+    elif isinstance(d[key], list):
+        d[key].append(value)
+    else:
+        d[key] = [d[key], value]
+
+
+def dict_to_xml(tag, d):
+    """Convert a dictionary back to an XML element.
+
+    List values repeat their tag, and the ``@name`` and ``#text`` keys that
+    xml_to_dict produces become attributes and text again.  An XMLNodes
+    document (see multifile.xmlnodes) is converted as it is, keeping its
+    own root tag.  Nested dicts are walked with an explicit stack, so depth
+    is not limited by the recursion limit.
+    """
+    import xml.etree.ElementTree as ET
+    from multifile.xmlnodes import XMLNodes
+    if isinstance(d, XMLNodes):
+        return d.to_element()
+    root = ET.Element(tag)
+    stack = [(root, d)]
+    while stack:
+        element, content = stack.pop()
+        for k, v in content.items():
+            if k.startswith('@'):
+                element.set(k[1:], str(v))
+            elif k == '#text':
+                element.text = str(v)
+            else:
+                for item in v if isinstance(v, list) else [v]:
+                    child = ET.SubElement(element, k)
+                    if isinstance(item, dict):
+                        stack.append((child, item))
+                    elif item is not None:
+                        child.text = str(item)
+    return root
+
+
+def json_to_xml(json_obj, parent):
+    """Recursively convert JSON data to XML elements."""
+    import xml.etree.ElementTree as ET
+    if isinstance(json_obj, dict):
+        for key, value in json_obj.items():
+            sub_element = ET.SubElement(parent, key)
+            json_to_xml(value, sub_element)
+    elif isinstance(json_obj, list):
+        for item in json_obj:
+            sub_element = ET.SubElement(parent, "item")
+            json_to_xml(item, sub_element)
+    else:
+        parent.text = str(json_obj)
+    return parent
+
+
+def read_vcf(file_path):
+    """Return the contacts of a VCF file as dicts with Name, Phone and Email keys."""
+    contacts = []
+    contact = {}
+    with open(file_path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("FN:"):
+                contact['Name'] = line[3:]
+            elif line.startswith("TEL"):
+                contact['Phone'] = line.split(":", 1)[-1]
+            elif line.startswith("EMAIL"):
+                contact['Email'] = line.split(":", 1)[-1]
+            elif line == "END:VCARD":
+                if contact:
+                    contacts.append(contact)
+                    contact = {}
+    return contacts
+
+
+def rows_to_records(rows, has_header):
+    """Turn CSV rows into JSON-ready data: dicts keyed by the header, or plain lists."""
+    rows = iter(rows)
+    if not has_header:
+        return [list(row) for row in rows]
+    header = list(next(rows, []))
+    return [dict(zip(header, row)) for row in rows]
+
+
+def json_records(data):
+    """Return the records of JSON-like data for a CSV file: the items of an array, or the data itself."""
+    return data if isinstance(data, list) else [data]
+
+
+def record_fields(record, flatten=True):
+    """Return the (column name, cell value) pairs of one JSON record for a CSV row.
+
+    With ``flatten`` nested values get a column per leaf (named as by
+    path_to_key); otherwise an object's values are kept whole and nested
+    ones are written as JSON text.  Records that are not objects become a
+    single ``value`` column (or one column per leaf when flattened).
+    """
+    if flatten:
+        if not isinstance(record, (dict, list)):
+            return [('value', record)]
+        if not record:
+            return []
+        if isinstance(record, dict) and not any(isinstance(value, (dict, list)) for value in record.values()):
+            return list(record.items())  # Already flat
+        return [(path_to_key(path), cell_value(value)) for path, value in flatten_json(record).items()]
+    if isinstance(record, dict):
+        return [(str(key), cell_value(value)) for key, value in record.items()]
+    return [('value', cell_value(record))]
+
+
+def cell_value(value):
+    """Render nested values (and empty containers) as JSON text for a CSV cell."""
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def stream_json_to_csv(json_file, file_path, delimiter=',', flatten=True, batch_rows=CSV_BATCH_ROWS):
+    """Convert the records of a top-level JSON array to CSV without holding them in memory.
+
+    Records are read one at a time from the text file ``json_file`` (see
+    multifile.jsonio.iter_json_array) and written by write_records_csv.
+    Returns (number of records, number of columns).
+
+    Raises ValueError if the document is not an array.
+    """
+    from multifile.jsonio import iter_json_array
+    return write_records_csv(iter_json_array(json_file), file_path, delimiter, flatten, batch_rows)
+
+
+def write_records_csv(records, file_path, delimiter=',', flatten=True, batch_rows=CSV_BATCH_ROWS):
+    """Write an iterable of JSON records to CSV with a column for every field of any record.
+
+    The header is the union of all fields, in order of first appearance.
+    Since it is only known at the end, rows are formatted in batches and
+    spilled to a temp file, together with the width of the header at the
+    time; a new spill segment starts whenever a record brings new fields.
+    The output (saved atomically) is the header followed by the spilled
+    rows: segments that already have the final width are copied as raw
+    bytes, only older, narrower ones are re-read and padded.  Apart from
+    the records themselves, memory is bounded by the header and one batch
+    of rows.  Returns (number of records, number of columns).
+    """
+    from multifile.atomic import atomic_open
+    with atomic_open(file_path, 'wb') as out:
+        return dump_records_csv(records, out, delimiter, flatten, batch_rows)
+
+
+def dump_records_csv(records, out, delimiter=',', flatten=True, batch_rows=CSV_BATCH_ROWS):
+    """Write records as write_records_csv does, to the binary file ``out`` (e.g. standard output)."""
+    import csv
+    import io
+    import tempfile
+    from itertools import islice
+
+    columns = {}  # Column name -> position
+    segments = [(0, 0)]  # (start offset in the spill file, header width) of each run of rows
+    count = 0
+    with tempfile.TemporaryFile() as spill:
+        text = io.StringIO()
+        writer = csv.writer(text, delimiter=delimiter)
+        pending = []
+
+        def flush():
+            writer.writerows(pending)
+            pending.clear()
+            spill.write(text.getvalue().encode('utf-8'))
+            text.seek(0)
+            text.truncate()
+
+        for record in records:
+            fields = record_fields(record, flatten)
+            if any(name not in columns for name, value in fields):
+                flush()
+                for name, value in fields:
+                    columns.setdefault(name, len(columns))
+                segments.append((spill.tell(), len(columns)))
+            row = [''] * len(columns)
+            for name, value in fields:
+                row[columns[name]] = value
+            pending.append(row)
+            count += 1
+            if len(pending) == batch_rows:
+                flush()
+        flush()
+
+        width = len(columns)
+        writer.writerow(list(columns))
+        out.write(text.getvalue().encode('utf-8'))
+        ends = [start for start, _ in segments[1:]] + [spill.tell()]
+        for (start, segment_width), end in zip(segments, ends):
+            spill.seek(start)
+            if segment_width == width:
+                copy_range(spill, out, end - start)
+                continue
+            # Rows written before the last fields appeared: pad them to the full width
+            rows = csv.reader(iter_lines(spill, end), delimiter=delimiter)
+            while True:
+                batch = [row + [''] * (width - len(row)) for row in islice(rows, batch_rows)]
+                if not batch:
+                    break
+                text.seek(0)
+                text.truncate()
+                writer.writerows(batch)
+                out.write(text.getvalue().encode('utf-8'))
+    return count, width
+
+
+def iter_lines(src, end):
+    """Yield the lines of a binary file from its current position up to offset ``end``, decoded."""
+    while src.tell() < end:
+        yield src.readline().decode('utf-8')
+
+
+def copy_range(src, out, size):
+    """Copy ``size`` bytes from the current position of ``src`` to ``out``."""
+    while size > 0:
+        chunk = src.read(min(size, COPY_CHUNK))
+        if not chunk:
+            break
+        out.write(chunk)
+        size -= len(chunk)
+
+
+def build_xml(data):
+    """Return an ElementTree for JSON-like data.
+
+    A dict with a single key, as read_file returns for XML documents, keeps
+    that key as the root tag; anything else goes under a <root> element.
+    """
+    import xml.etree.ElementTree as ET
+    if isinstance(data, dict) and len(data) == 1:
+        (tag, content), = data.items()
+        root = dict_to_xml(tag, content) if isinstance(content, dict) else json_to_xml(content, ET.Element(tag))
+    else:
+        root = json_to_xml(data, ET.Element("root"))
+    return ET.ElementTree(root)
+
+
+def read_file(file_path, fmt=None, delimiter=None):
+    """Load a file into JSON-like data: lists of rows/records or nested dicts.
+
+    CSV files become records keyed by the header row when one is detected;
+    XML documents become the nested dict of xml_to_dict.
+    """
+    fmt = fmt or guess_format(file_path)
+    if fmt == 'csv':
+        from multifile.csvio import read_csv
+        rows = read_csv(file_path, delimiter, lazy_threshold=None)
+        return rows_to_records(rows, rows.has_header)
+    if fmt == 'json':
+        with open(file_path, 'rb') as json_file:
+            return json.load(json_file)
+    if fmt == 'ndjson':
+        from multifile.ndjson import iter_ndjson
+        with open(file_path, encoding='utf-8') as ndjson_file:
+            return list(iter_ndjson(ndjson_file))
+    if fmt == 'xml':
+        import xml.etree.ElementTree as ET
+        return xml_to_dict(ET.parse(file_path).getroot())
+    if fmt == 'vcf':
+        return read_vcf(file_path)
+    raise ValueError(f"Unknown file format: {fmt!r}")
+
+
+def write_file(data, file_path, fmt=None, delimiter=',', indent=4):
+    """Atomically save JSON-like data (as returned by read_file) in the given format.
+
+    ``indent=None`` writes compact JSON.
+    """
+    fmt = fmt or guess_format(file_path)
+    if fmt == 'csv':
+        # The same flattened columns as a streamed conversion of the records
+        write_records_csv(json_records(data), file_path, delimiter)
+    elif fmt == 'json':
+        from multifile.jsonio import write_json
+        write_json(data, file_path, indent)
+    elif fmt == 'ndjson':
+        from multifile.ndjson import write_ndjson
+        write_ndjson(data if isinstance(data, list) else [data], file_path).close()
+    elif fmt == 'xml':
+        from multifile.xmlwrite import write_xml
+        write_xml(data, file_path)
+    else:
+        raise ValueError(f"Cannot write file format: {fmt!r}")
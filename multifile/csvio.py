@@ -0,0 +1,185 @@
+"""CSV loading and saving shared by the editor apps."""
+import csv
+import io
+import os
+
+from multifile.atomic import atomic_open
+from multifile.dialect import sniff_csv
+from multifile.lazycsv import LazyCSV
+from multifile.loader import run_steps
+from multifile.table import ColumnTable
+
+# Files at least this big are opened lazily instead of parsed up front
+LAZY_THRESHOLD = 64 * 1024 * 1024
+
+# Eagerly loaded files at least this big are parsed on all CPU cores
+PARALLEL_THRESHOLD = 16 * 1024 * 1024
+
+# Chunk size for copying unchanged bytes when copy_file_range is unavailable
+COPY_CHUNK = 16 * 1024 * 1024
+
+
+def read_csv(file_path, delimiter=None, lazy_threshold=LAZY_THRESHOLD, quotechar='"',
+             parallel_threshold=PARALLEL_THRESHOLD):
+    """Return the rows of a CSV file.
+
+    With ``delimiter=None`` the dialect (delimiter, quote character, header)
+    is sniffed from a sample of the file first, so the file is parsed once
+    with the right settings.  The result's ``delimiter``, ``quotechar`` and
+    ``has_header`` attributes say what was used.
+
+    Small files are parsed into a ColumnTable, which reads like a list of
+    lists but stores each column in a compact buffer.  Files of
+    ``lazy_threshold`` bytes or more (pass 0 to always go lazy, None to never)
+    come back as a LazyCSV that only parses the rows that are actually looked at.
+    Tables of ``parallel_threshold`` bytes or more (None to never) are parsed
+    on all CPU cores, see multifile.parallel.
+    """
+    return run_steps(iter_read_csv(file_path, delimiter, lazy_threshold, quotechar, parallel_threshold))
+
+
+def iter_read_csv(file_path, delimiter=None, lazy_threshold=LAZY_THRESHOLD, quotechar='"',
+                  parallel_threshold=PARALLEL_THRESHOLD):
+    """Loader steps for read_csv (see multifile.loader).
+
+    Progress is in bytes; every step yields the growing table (or the
+    LazyCSV whose index is being built) as a partial result.
+    """
+    total = os.path.getsize(file_path)
+    if delimiter is None:
+        delimiter, quotechar, has_header = sniff_csv(file_path)
+    else:
+        has_header = False
+
+    if lazy_threshold is not None and total >= lazy_threshold:
+        # If the load is cancelled the UI may still be showing this partial
+        # data, so the mapping is left for garbage collection to release
+        data = LazyCSV(file_path, delimiter, build_index=False, quotechar=quotechar)
+        data.has_header = has_header
+        for done in data.index_steps():
+            yield done, total, data
+        return data
+
+    if parallel_threshold is not None and total >= parallel_threshold and (os.cpu_count() or 1) > 1:
+        # Process pools are slow to import, so only load them when needed
+        from multifile.parallel import iter_read_csv_parallel
+        table = yield from iter_read_csv_parallel(file_path, delimiter, quotechar)
+    else:
+        table = ColumnTable()
+        with open(file_path, newline='') as csvfile:
+            reader = csv.reader(csvfile, delimiter=delimiter, quotechar=quotechar)
+            for _ in table.load_steps(reader):
+                yield csvfile.buffer.tell(), total, table
+    table.file_path = file_path
+    table.delimiter = delimiter
+    table.quotechar = quotechar
+    table.has_header = has_header
+    return table
+
+
+def reparse_csv(data, delimiter):
+    """Return loaded CSV data split with another delimiter.
+
+    Lazily loaded data keeps its mapping and offset index and just re-splits
+    rows on demand.  A ColumnTable (only used below the lazy threshold) is
+    parsed again from its source file.  Data that did not come from a file,
+    such as a new empty sheet, is returned unchanged.
+    """
+    if isinstance(data, LazyCSV):
+        data.set_delimiter(delimiter)
+        return data
+    if isinstance(data, ColumnTable) and data.file_path:
+        table = read_csv(data.file_path, delimiter, lazy_threshold=None, quotechar=data.quotechar)
+        table.has_header = data.has_header
+        return table
+    return data
+
+
+def close_data(data):
+    """Release the file mapping behind lazily loaded data (LazyCSV, LazyNDJSON), if any."""
+    if hasattr(data, 'close'):
+        data.close()
+
+
+def write_csv(data, file_path, delimiter=',', dirty=()):
+    """Atomically save rows to ``file_path`` and return the data to keep editing.
+
+    Lazily loaded data with an unchanged delimiter is saved incrementally:
+    the bytes between modified rows are copied straight from the source file
+    and only changed rows are re-serialized.  Changes are found by
+    LazyCSV.changed_rows; ``dirty`` may name more rows to rewrite.  The
+    saved file is then reopened so the offset index matches it again.
+    Rows are quoted with the quote character the data was loaded with.
+    """
+    if not isinstance(data, LazyCSV):
+        with atomic_open(file_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile, delimiter=delimiter, quotechar=getattr(data, 'quotechar', '"'))
+            writer.writerows(data)
+        return data
+
+    changed = sorted(data.changed_rows().union(dirty))
+    # Windows cannot replace a mapped file, so there the source is closed just
+    # before its replacement; elsewhere it stays open until the save succeeded
+    same_file = os.path.exists(file_path) and os.path.samefile(data.file_path, file_path)
+    release = data.close if same_file and os.name == 'nt' else None
+    try:
+        with atomic_open(file_path, 'wb', before_replace=release) as out:
+            if delimiter == data.delimiter:
+                pos = 0
+                for row in changed:
+                    start, end = data.row_span(row)
+                    copy_bytes(data, out, pos, start)
+                    out.write(encode_row(data, row, delimiter))
+                    pos = end
+                copy_bytes(data, out, pos, len(data.buf))
+            else:
+                for row in range(len(data)):
+                    out.write(encode_row(data, row, delimiter))
+    except BaseException:
+        if data.closed:
+            # The source is unchanged: keep editing it, with the unsaved edits
+            data.map_file()
+        raise
+    data.close()
+    saved = LazyCSV(file_path, delimiter, data.encoding, quotechar=data.quotechar)
+    saved.has_header = data.has_header
+    return saved
+
+
+def encode_row(data, row, delimiter):
+    """Serialize one row of a LazyCSV, keeping the record's original line ending."""
+    raw = data.raw_row(row)
+    if raw.endswith(b'\r\n'):
+        line_end = '\r\n'
+    elif raw.endswith(b'\n'):
+        line_end = '\n'
+    else:
+        line_end = ''
+    text = io.StringIO()
+    csv.writer(text, delimiter=delimiter, quotechar=data.quotechar, lineterminator=line_end).writerow(data[row])
+    return text.getvalue().encode(data.encoding)
+
+
+def copy_bytes(data, out, start, end):
+    """Copy bytes [start, end) of the file behind ``data`` into ``out``."""
+    if start >= end:
+        return
+    out.flush()
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while start < end:
+                copied = os.copy_file_range(data.fileno(), out.fileno(), end - start, start)
+                if not copied:
+                    break
+                start += copied
+        except OSError:
+            # Not supported across these file systems; fall back to plain writes
+            pass
+    view = memoryview(data.buf)
+    try:
+        while start < end:
+            chunk_end = min(start + COPY_CHUNK, end)
+            out.write(view[start:chunk_end])
+            start = chunk_end
+    finally:
+        view.release()
@@ -0,0 +1,32 @@
+"""Detect the CSV dialect of a file from a bounded sample."""
+import csv
+from collections import namedtuple
+
+# Bytes read from the start of the file for sniffing
+SAMPLE_SIZE = 64 * 1024
+
+CSVDialect = namedtuple('CSVDialect', 'delimiter quotechar has_header')
+
+
+def sniff_csv(file_path, default_delimiter=',', sample_size=SAMPLE_SIZE):
+    """Guess the delimiter, quote character and header presence of a CSV file.
+
+    Only the first ``sample_size`` bytes are read, cut back to the last full
+    line.  Falls back to ``default_delimiter`` when the sample is ambiguous.
+    """
+    with open(file_path, 'rb') as csvfile:
+        sample = csvfile.read(sample_size)
+    if len(sample) == sample_size and b'\n' in sample:
+        sample = sample[:sample.rfind(b'\n') + 1]
+    text = sample.decode('utf-8', errors='replace')
+
+    sniffer = csv.Sniffer()
+    try:
+        dialect = sniffer.sniff(text, delimiters=',;\t|')
+    except csv.Error:
+        return CSVDialect(default_delimiter, '"', False)
+    try:
+        has_header = sniffer.has_header(text)
+    except csv.Error:
+        has_header = False
+    return CSVDialect(dialect.delimiter, dialect.quotechar or '"', has_header)
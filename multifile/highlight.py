@@ -0,0 +1,67 @@
+"""Line-at-a-time JSON lexer for syntax highlighting.
+
+The lexer state at the start of a line is the stack of containers that
+are open there, one character per level: ``k`` for an object expecting a
+key, ``v`` for an object expecting (or inside) a value and ``a`` for an
+array.  JSON strings cannot contain raw newlines, so that stack is all a
+line needs from the lines before it: lexing a line from its start state
+gives the start state of the next line.  An editor can keep the state of
+every line and, after an edit, re-lex only until a line's new end state
+equals the state it had before.
+"""
+import re
+
+TOKENS = re.compile(r'''
+    (?P<string>"(?:[^"\\]|\\.)*"?)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<literal>true|false|null)\b
+  | (?P<punct>[{}\[\]:,])
+''', re.VERBOSE)
+
+# Strings (skipped whole, so brackets inside them do not count) and structural characters
+STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"?|[{}\[\]:,]')
+
+INITIAL = ''
+
+OPENERS = {'{': 'k', '[': 'a'}
+CLOSERS = {'}': 'kv', ']': 'a'}
+
+
+def advance(state, char):
+    """Return the state after one structural character."""
+    if char in OPENERS:
+        return state + OPENERS[char]
+    if char in CLOSERS:
+        # A closer that does not match the open container is left to the validator
+        return state[:-1] if state and state[-1] in CLOSERS[char] else state
+    if char == ':':
+        return state[:-1] + 'v' if state.endswith('k') else state
+    if char == ',':
+        return state[:-1] + 'k' if state.endswith('v') else state
+    return state
+
+
+def scan_line(line, state):
+    """Return the state at the end of ``line`` without collecting tokens."""
+    for item in STRUCTURE.findall(line):
+        if item[0] != '"':
+            state = advance(state, item)
+    return state
+
+
+def lex_line(line, state):
+    """Return ([(start, end, kind), ...], end state) for one line.
+
+    Kinds are ``key``, ``string``, ``number`` and ``literal``; punctuation
+    only changes the state.
+    """
+    tokens = []
+    for match in TOKENS.finditer(line):
+        kind = match.lastgroup
+        if kind == 'punct':
+            state = advance(state, match.group())
+            continue
+        if kind == 'string' and state.endswith('k'):
+            kind = 'key'
+        tokens.append((match.start(), match.end(), kind))
+    return tokens, state
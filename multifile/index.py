@@ -0,0 +1,230 @@
+"""Column indexes for sorting, filtering and finding rows of loaded CSV data."""
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Sequence
+
+from multifile.table import ColumnTable, NumberColumn
+
+
+def column_values(data, col):
+    """Return the text of column ``col`` for every row of ``data`` ('' for short rows)."""
+    if isinstance(data, ColumnTable):
+        # Columns store short rows padded with ''
+        if col >= len(data.columns):
+            return [''] * len(data)
+        return list(map(data.columns[col].get, range(len(data))))
+    return [row[col] if col < len(row) else '' for row in data]
+
+
+def is_number(value):
+    """True if a cell's text fits a numeric sort key."""
+    try:
+        number = float(value)
+    except ValueError:
+        return False
+    return number == number
+
+
+def row_array(rows):
+    """Pack row numbers into a compact typed array."""
+    return array('I', rows)
+
+
+class ColumnIndex:
+    """Sorted permutation and hash index over one column, each built on first use.
+
+    The sorted index orders the column numerically when every value parses
+    as a number and as text otherwise; a text index counts the values that
+    are not numbers and is rebuilt numeric once edits leave none.  Rows before ``first`` (a header)
+    are left out of both indexes.  ``update`` keeps built indexes in step
+    with single cell edits instead of rebuilding them.
+    """
+
+    def __init__(self, data, col, first=0):
+        self.data = data
+        self.col = col
+        self.first = first
+        self.numeric = None
+        self.perm = None  # Row numbers in key order
+        self.sorted_keys = None  # Sort key of each entry in perm
+        self.misfits = 0  # Values that are not numbers, while sorted as text
+        self.buckets = None  # Cell text -> ascending row numbers
+
+    def key(self, value):
+        """Return the sort key of a cell, raising ValueError if it does not fit a numeric index."""
+        if not self.numeric:
+            return value
+        number = float(value)
+        if number != number:
+            raise ValueError("NaN cannot be ordered")
+        return number
+
+    def build_sorted(self):
+        """Sort the rows by this column."""
+        first, col = self.first, self.col
+        data = self.data
+        n = len(data)
+        column = data.columns[col] if isinstance(data, ColumnTable) and col < len(data.columns) else None
+        keys = None
+        if isinstance(column, NumberColumn) and all(row < first for row in column.overrides):
+            # Typed column without misfits: sort its numbers directly
+            keys = array('d', column.values)
+        else:
+            values = column_values(data, col)
+            try:
+                keys = array('d', [0.0] * first)
+                keys.extend(map(float, values[first:]))
+                if any(key != key for key in keys):
+                    raise ValueError("NaN cannot be ordered")
+            except ValueError:
+                keys = values
+        self.numeric = isinstance(keys, array)
+        self.misfits = 0 if self.numeric else sum(not is_number(value) for value in keys[first:])
+        self.perm = row_array(sorted(range(first, n), key=keys.__getitem__))
+        if self.numeric:
+            self.sorted_keys = array('d', map(keys.__getitem__, self.perm))
+        else:
+            self.sorted_keys = list(map(keys.__getitem__, self.perm))
+
+    def build_hash(self):
+        """Group the rows by cell text."""
+        buckets = {}
+        values = column_values(self.data, self.col)
+        for row in range(self.first, len(values)):
+            bucket = buckets.get(values[row])
+            if bucket is None:
+                buckets[values[row]] = [row]
+            else:
+                bucket.append(row)
+        self.buckets = buckets
+
+    def sorted_rows(self, reverse=False):
+        """Return the rows ordered by this column."""
+        if self.perm is None:
+            self.build_sorted()
+        return self.perm[::-1] if reverse else self.perm
+
+    def equal(self, value):
+        """Return the rows whose cell text is ``value``, in row order."""
+        if self.buckets is None:
+            self.build_hash()
+        return row_array(self.buckets.get(value, ()))
+
+    def between(self, low=None, high=None):
+        """Return the rows with low <= cell <= high (either bound may be None), in key order.
+
+        Raises ValueError when a bound is not a number but the column is numeric.
+        """
+        if self.perm is None:
+            self.build_sorted()
+        start = 0 if low is None else bisect_left(self.sorted_keys, self.key(low))
+        end = len(self.perm) if high is None else bisect_right(self.sorted_keys, self.key(high))
+        return self.perm[start:max(start, end)]
+
+    def find(self, value):
+        """Return the first row whose cell text is ``value``, or None."""
+        rows = self.equal(value)
+        return rows[0] if rows else None
+
+    def update(self, row, old, new):
+        """Move ``row`` from its ``old`` cell text to ``new`` in the built indexes.
+
+        An index that does not have ``row`` under ``old`` (e.g. a stale old
+        value) is dropped and rebuilt on next use.
+        """
+        if row < self.first or old == new:
+            return
+        if self.buckets is not None:
+            bucket = self.buckets.get(old)
+            if bucket is None or row not in bucket:
+                self.buckets = None
+            else:
+                bucket.remove(row)
+                if not bucket:
+                    del self.buckets[old]
+                insort(self.buckets.setdefault(new, []), row)
+        if self.perm is not None:
+            try:
+                old_key = self.key(old)
+                new_key = self.key(new)
+            except ValueError:
+                # No longer all numbers (or old is not what was indexed): sort as text on next use
+                self.perm = self.sorted_keys = None
+                return
+            if not self.numeric:
+                self.misfits += is_number(old) - is_number(new)
+                if not self.misfits:
+                    # Every value is a number again: sort numerically on next use
+                    self.perm = self.sorted_keys = None
+                    return
+            start = bisect_left(self.sorted_keys, old_key)
+            end = bisect_right(self.sorted_keys, old_key)
+            for pos in range(start, end):
+                if self.perm[pos] == row:
+                    break
+            else:
+                self.perm = self.sorted_keys = None
+                return
+            del self.perm[pos]
+            del self.sorted_keys[pos]
+            pos = bisect_right(self.sorted_keys, new_key)
+            self.perm.insert(pos, row)
+            self.sorted_keys.insert(pos, new_key)
+
+
+class TableIndex:
+    """Per-column indexes over a table of rows, created lazily per column.
+
+    Call ``update`` with each cell's old and new text before it is written
+    (FileHandler.update_data does), and make a new TableIndex whenever the
+    rows themselves are replaced.
+    """
+
+    def __init__(self, data, first=0):
+        self.data = data
+        self.first = first
+        self.columns = {}
+
+    def column(self, col):
+        """Return the index for a column, creating it on first use."""
+        index = self.columns.get(col)
+        if index is None:
+            index = self.columns[col] = ColumnIndex(self.data, col, self.first)
+        return index
+
+    def set_data(self, data):
+        """Point the indexes at an equivalent copy of the rows, e.g. the reopened file after a save."""
+        self.data = data
+        for index in self.columns.values():
+            index.data = data
+
+    def update(self, row, col, old, new):
+        index = self.columns.get(col)
+        if index is not None:
+            index.update(row, old, new)
+
+    def view(self, rows):
+        """Return a RowSubset of ``rows`` that keeps any header rows on top."""
+        head = row_array(range(min(self.first, len(self.data))))
+        head.extend(rows)
+        return RowSubset(self.data, head)
+
+
+class RowSubset(Sequence):
+    """Read-through view of selected rows of a table, in the given order.
+
+    Row objects are the table's own, so writing to a cell of a row from the
+    view writes to the table; ``rows[i]`` is the table row shown at ``i``.
+    """
+
+    def __init__(self, data, rows):
+        self.data = data
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.data[row] for row in self.rows[i]]
+        return self.data[self.rows[i]]
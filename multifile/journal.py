@@ -0,0 +1,104 @@
+"""Batched cell edits with undo/redo."""
+import sys
+from collections import deque
+
+# Memory the undo/redo history may use before the oldest batches are dropped
+HISTORY_BYTES = 16 * 1024 * 1024
+# Rough cost of one (row, col, old, new) entry besides the values themselves
+ENTRY_BYTES = 120
+
+
+class EditJournal:
+    """Collect cell edits and apply them to the data in batches.
+
+    ``record`` only remembers the latest value per cell, so any number of
+    keystrokes in one cell cost one dict write each.  ``commit`` applies all
+    pending cells through ``set_cell`` as one batch of (row, col, old, new)
+    changes, which ``undo``/``redo`` replay and ``listeners`` (e.g. an
+    autosave) are told about.
+
+    The history is a log of these changes, never copies of the data, so
+    undoing a batch costs as much as the batch itself however big the data
+    is.  It is bounded by memory rather than step count: once the batches
+    take more than ``max_bytes`` (estimated from the sizes of the old and
+    new values) the oldest ones are forgotten.
+    """
+
+    def __init__(self, get_cell, set_cell, max_bytes=HISTORY_BYTES):
+        self.get_cell = get_cell
+        self.set_cell = set_cell
+        self.max_bytes = max_bytes
+        self.pending = {}
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.history_bytes = 0
+        self.listeners = []
+
+    def record(self, row, col, value):
+        """Remember a new value for a cell without touching the data yet."""
+        self.pending[(row, col)] = value
+
+    def commit(self):
+        """Apply the pending edits as one batch and return it."""
+        if not self.pending:
+            return []
+        batch = []
+        for (row, col), value in self.pending.items():
+            old = self.get_cell(row, col)
+            if old != value:
+                self.set_cell(row, col, value)
+                batch.append((row, col, old, value))
+        self.pending.clear()
+        if batch:
+            self.history_bytes -= sum(map(batch_bytes, self.redo_stack))
+            self.redo_stack.clear()
+            self.undo_stack.append(batch)
+            self.history_bytes += batch_bytes(batch)
+            self.trim()
+            self.notify(batch)
+        return batch
+
+    def trim(self):
+        """Forget the oldest batches while the history is over budget (the newest one always stays)."""
+        while self.history_bytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.history_bytes -= batch_bytes(self.undo_stack.popleft())
+
+    def undo(self):
+        """Revert the last batch and return it (empty if there is nothing to undo)."""
+        self.commit()
+        if not self.undo_stack:
+            return []
+        batch = self.undo_stack.pop()
+        for row, col, old, new in reversed(batch):
+            self.set_cell(row, col, old)
+        self.redo_stack.append(batch)
+        self.notify(batch)
+        return batch
+
+    def redo(self):
+        """Re-apply the last undone batch and return it."""
+        self.commit()
+        if not self.redo_stack:
+            return []
+        batch = self.redo_stack.pop()
+        for row, col, old, new in batch:
+            self.set_cell(row, col, new)
+        self.undo_stack.append(batch)
+        self.notify(batch)
+        return batch
+
+    def notify(self, batch):
+        for listener in self.listeners:
+            listener(batch)
+
+    def clear(self):
+        """Forget pending edits and history, e.g. after loading another file."""
+        self.pending.clear()
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.history_bytes = 0
+
+
+def batch_bytes(batch):
+    """Estimate the memory one batch of changes keeps alive."""
+    return sum(ENTRY_BYTES + sys.getsizeof(old) + sys.getsizeof(new) for row, col, old, new in batch)
@@ -0,0 +1,301 @@
+"""JSON loading shared by the editor apps.
+
+Besides whole-document loading this has a streaming reader: JSONStream
+decodes one token or value at a time from a buffered text file, so a huge
+top-level array can be processed one record at a time with memory bounded
+by the largest record (plus one read chunk).
+"""
+import json
+import os
+import re
+
+# Bytes read per loader step
+READ_CHUNK = 1024 * 1024
+
+# Records collected per loader step when streaming a top-level array
+BATCH_RECORDS = 1000
+
+# Encoded text collected before each write when saving
+WRITE_CHUNK = 1024 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that could continue a number cut off at the end of the buffer
+NUMBER_TAIL = re.compile(r'[0-9.eE+\-]*')
+# Decode errors this close to the end of the buffer may just be a value cut off there
+CUT_OFF_CHARS = 8
+# Longest value the stream reads ahead for before giving up on it
+MAX_VALUE_CHARS = 256 * 1024 * 1024
+
+
+def iter_read_json(file_path, batch_size=BATCH_RECORDS):
+    """Loader steps that read a JSON file and return the parsed document.
+
+    Progress is in bytes.  A top-level array is streamed element by element
+    and the growing list of records is yielded as a partial result every
+    ``batch_size`` records; other documents are parsed once fully read.
+    """
+    total = os.path.getsize(file_path)
+    if starts_with_array(file_path):
+        records = []
+        with open(file_path, encoding='utf-8-sig') as json_file:
+            for record in iter_json_array(json_file):
+                records.append(record)
+                if len(records) % batch_size == 0:
+                    yield json_file.buffer.tell(), total, records
+        return records
+
+    chunks = []
+    done = 0
+    with open(file_path, 'rb') as json_file:
+        while True:
+            chunk = json_file.read(READ_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            done += len(chunk)
+            yield done, total, None
+    return json.loads(b''.join(chunks))
+
+
+def iter_encode_json(data, indent=4):
+    """Yield the JSON text of ``data`` in pieces, without building the whole document.
+
+    With ``indent=None`` the output is compact: each element of a top-level
+    array or object is encoded by the C encoder, so memory is bounded by the
+    largest element.  Indented output goes through JSONEncoder.iterencode.
+    """
+    if indent is not None:
+        yield from json.JSONEncoder(indent=indent).iterencode(data)
+        return
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    if isinstance(data, list):
+        yield '['
+        for i, item in enumerate(data):
+            yield ',' + encode(item) if i else encode(item)
+        yield ']'
+    elif isinstance(data, dict):
+        yield '{'
+        for i, (key, value) in enumerate(data.items()):
+            yield (',' if i else '') + encode(str(key)) + ':' + encode(value)
+        yield '}'
+    else:
+        yield encode(data)
+
+
+def write_json(data, file_path, indent=4):
+    """Atomically save data as JSON (compact with ``indent=None``), streaming the encoded text.
+
+    Pieces are joined into chunks of about WRITE_CHUNK characters before each
+    write, and the file only replaces ``file_path`` once it is complete and
+    fsynced (see multifile.atomic), so an interrupted save never leaves a
+    partial file.
+    """
+    from multifile.atomic import atomic_open
+    with atomic_open(file_path, 'w', encoding='utf-8') as json_file:
+        write_chunks(iter_encode_json(data, indent), json_file)
+
+
+def write_json_text(text, file_path):
+    """Atomically save JSON text exactly as it is, e.g. editor contents that are known to be valid."""
+    from multifile.atomic import atomic_open
+    with atomic_open(file_path, 'w', encoding='utf-8') as json_file:
+        json_file.write(text)
+
+
+def write_chunks(pieces, out):
+    """Write many small strings to ``out`` in chunks of about WRITE_CHUNK characters."""
+    chunk = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= WRITE_CHUNK:
+            out.write(''.join(chunk))
+            chunk.clear()
+            size = 0
+    out.write(''.join(chunk))
+
+
+def iter_read_text(file_path):
+    """Loader steps that read a text file in chunks, yielding each new chunk of text as the partial result.
+
+    Progress is in bytes; the result is the number of characters read.
+    """
+    total = os.path.getsize(file_path)
+    size = 0
+    with open(file_path, encoding='utf-8-sig') as text_file:
+        while True:
+            text = text_file.read(READ_CHUNK)
+            if not text:
+                break
+            size += len(text)
+            yield text_file.buffer.tell(), total, text
+    return size
+
+
+def iter_parse_json(text):
+    """Loader steps that parse JSON text, for validating an editor's contents in the background."""
+    yield 0, len(text), None
+    return json.loads(text)
+
+
+def starts_with_array(file_path):
+    """Return True if the JSON document in a file is an array."""
+    with open(file_path, 'rb') as json_file:
+        while True:
+            chunk = json_file.read(4096)
+            if not chunk:
+                return False
+            chunk = chunk.lstrip(b'\xef\xbb\xbf \t\n\r')
+            if chunk:
+                return chunk.startswith(b'[')
+
+
+class JSONStream:
+    """Decode JSON incrementally from a text file.
+
+    ``peek``/``take`` handle the punctuation between values and ``value``
+    decodes one complete value with the C decoder, reading more of the
+    file while the decode error could just mean the value is cut off at the
+    end of the buffer (up to MAX_VALUE_CHARS); other errors are raised at
+    once.  Consumed text is dropped on the next
+    read, so only the unread part of the document is buffered.
+    """
+
+    def __init__(self, fp, chunk_size=READ_CHUNK):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self, size=0):
+        """Read at least ``size`` more characters (and at least one chunk); return False at the end of the file."""
+        if self.eof:
+            return False
+        text = self.fp.read(max(size, self.chunk_size))
+        if not text:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at the end)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def take(self, expected):
+        """Consume the next non-whitespace character, which must be one of ``expected``."""
+        char = self.peek()
+        if not char or char not in expected:
+            raise self.error(f"Expecting one of {expected!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode and consume the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                # Errors before the end of the buffer are real; otherwise read as much again and retry
+                if self.cut_off(exc) and self.fill(len(self.buf) - self.pos):
+                    continue
+                raise
+            if NUMBER_TAIL.match(self.buf, end).end() == len(self.buf) and self.fill():
+                # A number at the end of the buffer may continue in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def cut_off(self, exc):
+        """True if a decode error may only mean that the value continues after the buffer."""
+        if len(self.buf) - self.pos >= MAX_VALUE_CHARS:
+            return False
+        if exc.msg.startswith('Unterminated string'):
+            # No line break up to the end of the buffer, so the string may go on past it
+            return True
+        return len(self.buf) - exc.pos <= CUT_OFF_CHARS
+
+
+def iter_json_events(fp, depth=None, chunk_size=READ_CHUNK):
+    """Yield ``(path, value)`` for the leaves of a JSON document read from a text file.
+
+    Paths are tuples of object keys and array indexes, as in
+    multifile.convert.flatten_json, and empty objects/arrays count as
+    leaves.  With ``depth`` set, values at that depth are yielded whole
+    instead of being split into leaves, e.g. ``depth=1`` yields each
+    element of a top-level array as ``((i,), element)``.
+    """
+    stream = JSONStream(fp, chunk_size)
+    closing = {'[': ']', '{': '}'}
+    path = []
+    stack = []  # Opening bracket of each container we are inside
+    expect_value = True
+    while True:
+        if expect_value:
+            char = stream.peek()
+            if char in closing and (depth is None or len(path) < depth):
+                stream.pos += 1
+                if stream.peek() == closing[char]:
+                    stream.pos += 1
+                    yield tuple(path), [] if char == '[' else {}
+                elif char == '[':
+                    stack.append(char)
+                    path.append(0)
+                    continue
+                else:
+                    stack.append(char)
+                    path.append(read_key(stream))
+                    continue
+            else:
+                yield tuple(path), stream.value()
+            expect_value = False
+
+        if not stack:
+            if stream.peek():
+                raise stream.error("Extra data")
+            return
+        char = stream.take(',' + closing[stack[-1]])
+        if char == ',':
+            if stack[-1] == '[':
+                path[-1] += 1
+            else:
+                path[-1] = read_key(stream)
+            expect_value = True
+        else:
+            stack.pop()
+            path.pop()
+
+
+def read_key(stream):
+    """Consume an object key and the colon after it."""
+    if stream.peek() != '"':
+        raise stream.error("Expecting property name enclosed in double quotes")
+    key = stream.value()
+    stream.take(':')
+    return key
+
+
+def iter_json_array(fp, chunk_size=READ_CHUNK):
+    """Yield the elements of a top-level JSON array read from a text file, one at a time.
+
+    Raises ValueError if the document is not an array.
+    """
+    for path, value in iter_json_events(fp, 1, chunk_size):
+        if path == () and value == []:
+            return
+        if len(path) != 1 or not isinstance(path[0], int):
+            raise ValueError("The JSON document is not an array")
+        yield value
@@ -0,0 +1,191 @@
+"""Memory-mapped CSV access that parses rows on demand."""
+import csv
+import io
+import mmap
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+
+
+def build_row_index(buf, quotechar='"'):
+    """Return an array('Q') with the byte offset where each record starts."""
+    offsets = array('Q')
+    for _ in scan_rows(buf, offsets, quotechar):
+        pass
+    return offsets
+
+
+def scan_rows(buf, offsets, quotechar='"', step_rows=65536):
+    """Append record start offsets to ``offsets``, yielding bytes scanned every ``step_rows`` records.
+
+    Newlines inside quoted fields do not start a new record: every quote
+    character toggles the quoted state, so doubled quotes ("") inside a
+    field cancel out and only newlines outside quotes end a record.
+    """
+    quote = quotechar.encode('ascii')
+    size = len(buf)
+    if not size:
+        return
+
+    offsets.append(0)
+    next_quote = buf.find(quote)
+    in_quote = False
+    pos = 0
+    countdown = step_rows
+    while True:
+        nl = buf.find(b'\n', pos)
+        if nl == -1:
+            break
+        while next_quote != -1 and next_quote < nl:
+            in_quote = not in_quote
+            next_quote = buf.find(quote, next_quote + 1)
+        pos = nl + 1
+        if not in_quote and pos < size:
+            offsets.append(pos)
+            countdown -= 1
+            if not countdown:
+                countdown = step_rows
+                yield pos
+
+
+class LazyCSV(Sequence):
+    """Read-mostly list of CSV rows backed by an mmap and a row-offset index.
+
+    Only the index (8 bytes per row) is built up front.  Rows are decoded and
+    parsed when indexed, kept in a small LRU cache, and rows that were changed
+    in place are pinned in ``edits`` so the change survives cache eviction.
+    ``changed_rows()`` finds every edit, whether it was assigned or made to a
+    returned row list, so savers need no record of what was edited.
+
+    With ``build_index=False`` the index is built by running ``index_steps()``
+    instead; while it runs only the rows indexed so far are visible.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, file_path, delimiter=',', encoding='utf-8', build_index=True, quotechar='"'):
+        self.file_path = file_path
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.has_header = False
+        self.encoding = encoding
+        self.edits = {}
+        self._cache = OrderedDict()
+        self.map_file()
+        self.offsets = array('Q')
+        self.complete = False
+        if build_index:
+            for _ in self.index_steps():
+                pass
+
+    def index_steps(self):
+        """Build the row index, yielding the number of bytes scanned as it goes."""
+        for pos in scan_rows(self.buf, self.offsets, self.quotechar):
+            yield pos
+        self.complete = True
+        yield len(self.buf)
+
+    def __len__(self):
+        if self.complete:
+            return len(self.offsets)
+        # The last record found so far may not be complete yet
+        return max(len(self.offsets) - 1, 0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+
+        if index in self.edits:
+            return self.edits[index]
+        row = self._cache.get(index)
+        if row is not None:
+            self._cache.move_to_end(index)
+            return row
+
+        row = self.parse_row(index)
+        self._cache[index] = row
+        if len(self._cache) > self.CACHE_SIZE:
+            self.evict()
+        return row
+
+    def peek(self, index):
+        """Return a row without touching the LRU cache, so other threads can read while the UI edits.
+
+        Uncached rows are parsed afresh and not kept.
+        """
+        row = self.edits.get(index)
+        if row is None:
+            row = self._cache.get(index)
+        return self.parse_row(index) if row is None else row
+
+    def __setitem__(self, index, row):
+        if index < 0:
+            index += len(self)
+        self._cache.pop(index, None)
+        self.edits[index] = list(row)
+
+    def evict(self):
+        """Drop the least recently used row, pinning it first if it was edited in place."""
+        index, row = self._cache.popitem(last=False)
+        if row != self.parse_row(index):
+            self.edits[index] = row
+
+    def changed_rows(self):
+        """Return the indexes of the rows that differ from the file: pinned edits and cached rows changed in place."""
+        changed = set(self.edits)
+        changed.update(index for index, row in self._cache.items() if row != self.parse_row(index))
+        return changed
+
+    def row_span(self, index):
+        """Return the (start, end) byte range of a record, including its line ending."""
+        start = self.offsets[index]
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.buf)
+        return start, end
+
+    def raw_row(self, index):
+        """Return the undecoded bytes of a record."""
+        start, end = self.row_span(index)
+        return self.buf[start:end]
+
+    def parse_row(self, index):
+        """Decode and parse a single record from the mapped file."""
+        text = self.raw_row(index).decode(self.encoding)
+        reader = csv.reader(io.StringIO(text, newline=''), delimiter=self.delimiter, quotechar=self.quotechar)
+        return next(reader, [])
+
+    def set_delimiter(self, delimiter):
+        """Re-split the rows with another delimiter.
+
+        Record boundaries only depend on quotes and newlines, so the offset
+        index and the mapping are reused; parsed rows and edits are dropped.
+        """
+        self.delimiter = delimiter
+        self._cache.clear()
+        self.edits.clear()
+
+    def map_file(self):
+        """Open and map the source file (again after close(), if it is unchanged, keeping rows and edits)."""
+        self._file = open(self.file_path, 'rb')
+        try:
+            self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self.buf = b''
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def fileno(self):
+        """Return the descriptor of the source file (for copy_file_range)."""
+        return self._file.fileno()
+
+    def close(self):
+        """Release the mapping and the file handle."""
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
@@ -0,0 +1,109 @@
+"""Run file loaders off the Tk main thread.
+
+A loader is a generator that does the parsing in steps.  Each step yields
+``(done, total, partial)``: progress so far (bytes or records; ``total`` may
+be None when unknown) and either None or a partial result the UI can show
+before loading finishes.  The generator's return value is the final data.
+"""
+import queue
+import threading
+
+
+def run_steps(steps):
+    """Run a loader generator to completion on the calling thread and return its result."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class LoadJob:
+    """One loader generator running on its own worker thread."""
+
+    def __init__(self, steps, callbacks):
+        self.steps = steps
+        self.callbacks = callbacks
+        self.events = queue.Queue()
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.work, daemon=True)
+
+    def work(self):
+        """Worker thread: advance the generator and post its events."""
+        try:
+            while True:
+                if self.cancelled.is_set():
+                    self.steps.close()
+                    self.events.put(('cancel',))
+                    return
+                try:
+                    done, total, partial = next(self.steps)
+                except StopIteration as stop:
+                    self.events.put(('done', stop.value))
+                    return
+                self.events.put(('progress', done, total))
+                if partial is not None:
+                    self.events.put(('partial', partial))
+        except Exception as exc:
+            self.events.put(('error', exc))
+
+
+class BackgroundLoader:
+    """Run one loader at a time on a worker thread and report back on the Tk thread.
+
+    Events travel through a queue that is drained every ``poll_ms`` with
+    ``root.after``, so all callbacks run on the main thread:
+
+    - ``on_progress(done, total)`` after every step,
+    - ``on_partial(partial)`` when a step yields a partial result,
+    - ``on_done(result)``, ``on_error(exc)`` or ``on_cancel()`` at the end.
+
+    Starting a new load cancels the previous one; a superseded load reports
+    nothing further.
+    """
+
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.job = None
+
+    def busy(self):
+        return self.job is not None
+
+    def start(self, steps, on_done, on_progress=None, on_partial=None, on_error=None, on_cancel=None):
+        """Start running ``steps`` in the background."""
+        if self.job is not None:
+            self.job.cancelled.set()
+            self.job.callbacks = None
+        self.job = LoadJob(steps, {
+            'done': on_done, 'progress': on_progress, 'partial': on_partial,
+            'error': on_error, 'cancel': on_cancel,
+        })
+        self.job.thread.start()
+        self.root.after(self.poll_ms, self.poll, self.job)
+
+    def cancel(self):
+        """Ask the running loader to stop after its current step."""
+        if self.job is not None:
+            self.job.cancelled.set()
+
+    def poll(self, job):
+        """Main thread: deliver the job's queued events, then poll again until it ends."""
+        while True:
+            try:
+                event = job.events.get_nowait()
+            except queue.Empty:
+                break
+            kind, args = event[0], event[1:]
+            finished = kind in ('done', 'error', 'cancel')
+            if finished and job is self.job:
+                self.job = None
+            if job.callbacks is not None:
+                callback = job.callbacks[kind]
+                if callback:
+                    callback(*args)
+                elif kind == 'error':
+                    raise args[0]
+            if finished:
+                return
+        self.root.after(self.poll_ms, self.poll, job)
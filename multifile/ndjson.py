@@ -0,0 +1,369 @@
+"""JSON Lines (NDJSON): one JSON record per line, indexed for random access."""
+import json
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from multifile.atomic import atomic_open
+from multifile.csvio import copy_bytes
+# Records encoded per write when saving
+WRITE_BATCH = 10000
+# Field value of records that do not have the field
+MISSING = object()
+
+
+def scan_lines(buf, offsets, start=0, step_lines=65536):
+    """Append the offset of every non-blank line from ``start`` on to ``offsets``.
+
+    Yields the number of bytes scanned every ``step_lines`` lines.  JSON
+    strings cannot contain raw newlines, so every newline ends a record.
+    """
+    size = len(buf)
+    pos = start
+    countdown = step_lines
+    while pos < size:
+        nl = buf.find(b'\n', pos)
+        if nl == -1:
+            nl = size
+        # Most lines start with '{', so only lines starting with blanks are checked in full
+        if nl > pos and (buf[pos:pos + 1] not in b' \t\r' or buf[pos:nl].strip()):
+            offsets.append(pos)
+            countdown -= 1
+            if not countdown:
+                countdown = step_lines
+                yield nl
+        pos = nl + 1
+
+
+class LazyNDJSON(Sequence):
+    """List of JSON Lines records backed by an mmap and a line-offset index.
+
+    Only the index (8 bytes per record) is built up front, so going to any
+    record is one seek.  Records are decoded when indexed and kept in a
+    small LRU cache; records changed in place or replaced are pinned in
+    ``edits``, and records added with ``append`` wait in ``appended`` until
+    the file is saved (see write_ndjson).
+
+    With ``build_index=False`` the index is built by running
+    ``index_steps()`` instead; while it runs only the records indexed so far
+    are visible.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, file_path, encoding='utf-8', build_index=True):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.edits = {}
+        self.appended = []
+        self._cache = OrderedDict()
+        self.map_file()
+        self.offsets = array('Q')
+        self.complete = False
+        if build_index:
+            for _ in self.index_steps():
+                pass
+
+    def index_steps(self, start=0):
+        """Build the record index, yielding the number of bytes scanned as it goes."""
+        yield from scan_lines(self.buf, self.offsets, start)
+        self.complete = True
+        yield len(self.buf)
+
+    def __len__(self):
+        if self.complete:
+            return len(self.offsets) + len(self.appended)
+        # The last line found so far may not be complete yet
+        return max(len(self.offsets) - 1, 0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+
+        if index >= len(self.offsets):
+            return self.appended[index - len(self.offsets)]
+        if index in self.edits:
+            return self.edits[index]
+        record = self._cache.get(index)
+        if record is not None:
+            self._cache.move_to_end(index)
+            return record
+
+        record = self.parse_record(index)
+        self._cache[index] = record
+        if len(self._cache) > self.CACHE_SIZE:
+            self.evict()
+        return record
+
+    def peek(self, index):
+        """Return a record without touching the LRU cache, so other threads can read while the UI edits.
+
+        Uncached records are parsed afresh and not kept.
+        """
+        if index >= len(self.offsets):
+            return self.appended[index - len(self.offsets)]
+        for records in (self.edits, self._cache):
+            record = records.get(index, MISSING)
+            if record is not MISSING:
+                return record
+        return self.parse_record(index)
+
+    def __setitem__(self, index, record):
+        if index < 0:
+            index += len(self)
+        if index >= len(self.offsets):
+            self.appended[index - len(self.offsets)] = record
+            return
+        self._cache.pop(index, None)
+        if record == self.parse_record(index):
+            # Set back to what the file holds (e.g. by undo): the line is saved unchanged
+            self.edits.pop(index, None)
+        else:
+            self.edits[index] = record
+
+    def append(self, record):
+        """Add a record after the last one; saving appends it to the file."""
+        self.appended.append(record)
+
+    def evict(self):
+        """Drop the least recently used record, pinning it first if it was changed in place."""
+        index, record = self._cache.popitem(last=False)
+        if record != self.parse_record(index):
+            self.edits[index] = record
+
+    def dirty_records(self):
+        """Return the indexes of file records that differ from the file (not counting appended ones)."""
+        changed = set(self.edits)
+        changed.update(index for index, record in self._cache.items() if record != self.parse_record(index))
+        return changed
+
+    def record_span(self, index):
+        """Return the (start, end) byte range of a record's line, without the line ending."""
+        start = self.offsets[index]
+        end = self.buf.find(b'\n', start)
+        return start, len(self.buf) if end == -1 else end
+
+    def raw_record(self, index):
+        """Return the undecoded bytes of a record."""
+        start, end = self.record_span(index)
+        return self.buf[start:end]
+
+    def parse_record(self, index):
+        """Decode a single record from the mapped file."""
+        try:
+            return json.loads(self.raw_record(index).decode(self.encoding))
+        except ValueError as exc:
+            raise ValueError(f"Line with record {index + 1}: {exc}") from None
+
+    def map_file(self):
+        """Open and map the source file (again after close(), if it is unchanged, keeping records and edits)."""
+        self._file = open(self.file_path, 'rb')
+        try:
+            self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self.buf = b''
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        """Release the mapping and the file handle."""
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
+
+
+class RecordRows(Sequence):
+    """Grid rows over a sequence of JSON records, one column per field.
+
+    The fields are the keys of the first ``sample`` records (records that
+    are not objects get a single ``value`` field); other keys of later
+    records are not shown.  Rows are built when the grid asks for them, so
+    only the visible records are decoded.  Nested values are shown as JSON
+    text.
+    """
+
+    def __init__(self, records, sample=1000):
+        self.records = records
+        fields = {}
+        for i in range(min(sample, len(records))):
+            record = records[i]
+            fields.update(dict.fromkeys(record if isinstance(record, dict) else ['value']))
+        self.fields = list(fields)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, row):
+        record = self.records[row]
+        if not isinstance(record, dict):
+            record = {'value': record}
+        return [cell_text(record.get(field, '')) for field in self.fields]
+
+    def get_cell(self, row, col):
+        """Return the text of a cell as a FieldText that remembers the field's value.
+
+        Setting the cell back to it restores the field exactly, so undoing an
+        edit brings back nulls and missing fields.
+        """
+        record = self.records[row]
+        if not isinstance(record, dict):
+            record = {'value': record}
+        value = record.get(self.fields[col], MISSING)
+        return FieldText(cell_text(None if value is MISSING else value), value)
+
+    def set_cell(self, row, col, text):
+        """Store edited text in a record, as a value of the same kind as the one it replaces.
+
+        A FieldText from get_cell puts back the value it remembers (or
+        removes the field if it was missing) instead.
+        """
+        record = self.records[row]
+        record = dict(record) if isinstance(record, dict) else {'value': record}
+        field = self.fields[col]
+        old = record.get(field)
+        if isinstance(text, FieldText):
+            if text.value is MISSING:
+                record.pop(field, None)
+            else:
+                record[field] = text.value
+        elif text == '' and old is None:
+            return  # Empty cells stand for null and missing fields alike
+        elif isinstance(old, str):
+            record[field] = text
+        else:
+            try:
+                record[field] = json.loads(text)
+            except ValueError:
+                record[field] = text
+        self.records[row] = record if list(record) != ['value'] else record['value']
+
+    def append_record(self):
+        """Add an empty record at the end."""
+        self.records.append({})
+
+
+class FieldText(str):
+    """Cell text that also carries the record field it was made from (MISSING if there was none)."""
+
+    def __new__(cls, text, value):
+        self = super().__new__(cls, text)
+        self.value = value
+        return self
+
+
+def cell_text(value):
+    """Text shown in a grid cell for a record field."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list, bool)):
+        return json.dumps(value)
+    return str(value)
+
+
+def iter_read_ndjson(file_path):
+    """Loader steps that index a JSON Lines file; the result is a LazyNDJSON.
+
+    Progress is in bytes and the LazyNDJSON is yielded as the partial result,
+    so the records indexed so far can be shown while the rest is scanned.
+    """
+    data = LazyNDJSON(file_path, build_index=False)
+    total = len(data.buf)
+    for pos in data.index_steps():
+        yield pos, total, data
+    return data
+
+
+def iter_ndjson(fp):
+    """Yield the records of a JSON Lines text file one at a time."""
+    for number, line in enumerate(fp, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"Line {number}: {exc}") from None
+
+
+def encode_record(record):
+    """Return one record as a JSON Lines line."""
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def write_ndjson(data, file_path):
+    """Save records as JSON Lines and return the saved data (a LazyNDJSON of the file).
+
+    If ``data`` is the LazyNDJSON of ``file_path`` and only new records were
+    added, they are appended to the file and the existing index is extended;
+    nothing else is rewritten.  Otherwise the file is written atomically,
+    copying the bytes between changed records of a LazyNDJSON as they are
+    (blank lines and line endings included) and encoding only the changed
+    records, each in place of its own line.
+    """
+    same_file = isinstance(data, LazyNDJSON) and os.path.exists(file_path) and os.path.samefile(data.file_path, file_path)
+    if same_file and data.complete and not data.dirty_records():
+        return append_ndjson(data)
+
+    # As in multifile.csvio.write_csv, the source is only closed early where
+    # a mapped file cannot be replaced (Windows)
+    release = data.close if same_file and os.name == 'nt' else None
+    try:
+        with atomic_open(file_path, 'wb', before_replace=release) as out:
+            if isinstance(data, LazyNDJSON):
+                pos = 0  # Start of the unchanged bytes not written yet
+                for index in sorted(data.dirty_records()):
+                    start, end = data.record_span(index)
+                    if data.buf[end - 1:end] == b'\r':
+                        end -= 1  # Keep the line ending as it is
+                    copy_bytes(data, out, pos, start)
+                    out.write(encode_record(data[index]).rstrip('\n').encode('utf-8'))
+                    pos = end
+                copy_bytes(data, out, pos, len(data.buf))
+                if len(data.buf) and data.buf[-1:] != b'\n' and data.appended:
+                    out.write(b'\n')
+                records = data.appended
+            else:
+                records = data
+            buffer = []
+            for record in records:
+                buffer.append(encode_record(record))
+                if len(buffer) == WRITE_BATCH:
+                    out.write(''.join(buffer).encode('utf-8'))
+                    buffer.clear()
+            out.write(''.join(buffer).encode('utf-8'))
+    except BaseException:
+        if isinstance(data, LazyNDJSON) and data.closed:
+            # The source is unchanged: keep editing it, with the unsaved edits
+            data.map_file()
+        raise
+    if isinstance(data, LazyNDJSON):
+        data.close()
+    return LazyNDJSON(file_path)
+
+
+def append_ndjson(data):
+    """Append a LazyNDJSON's new records to its file and return the LazyNDJSON of the grown file."""
+    old_size = len(data.buf)
+    if data.appended:
+        with open(data.file_path, 'ab') as out:
+            if old_size and data.buf[-1:] != b'\n':
+                out.write(b'\n')
+            out.write(''.join(map(encode_record, data.appended)).encode('utf-8'))
+            out.flush()
+            os.fsync(out.fileno())
+    saved = LazyNDJSON(data.file_path, data.encoding, build_index=False)
+    saved.offsets = data.offsets
+    for _ in saved.index_steps(old_size):
+        pass
+    data.close()
+    return saved
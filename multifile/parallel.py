@@ -0,0 +1,218 @@
+"""Parse big CSV files on several CPU cores.
+
+The file is cut into chunks that start on record boundaries, each chunk is
+parsed into a ColumnTable by a worker process, and the chunk tables are
+concatenated in file order.  Workers hand their column buffers back through
+``multiprocessing.shared_memory`` instead of pickling rows, and the parent
+appends them to the merged table straight from the shared block.
+
+Finding record boundaries has to know whether a newline is inside a quoted
+field.  Workers first count the quote characters in each nominal chunk; the
+running parity of those counts gives the quoted state at every cut, from
+which the cut is moved forward to the next newline outside quotes (the same
+rule as multifile.lazycsv.scan_rows).
+"""
+import csv
+import io
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import resource_tracker, shared_memory
+
+from multifile.table import COLUMN_TYPES, ColumnTable
+
+# Target size of the byte range each worker parses at a time
+CHUNK_SIZE = 32 * 1024 * 1024
+
+
+def read_file_range(file_path, start, end):
+    """Return bytes [start, end) of a file."""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def count_quotes(file_path, start, end, quotechar='"'):
+    """Worker: count the quote characters in bytes [start, end) of a file."""
+    return read_file_range(file_path, start, end).count(quotechar.encode('ascii'))
+
+
+def next_record(buf, pos, in_quote, quotechar='"'):
+    """Return the start of the first record at or after ``pos``.
+
+    ``in_quote`` is the quoted state at ``pos``.  Returns ``len(buf)`` when
+    no record starts after ``pos``.
+    """
+    quote = quotechar.encode('ascii')
+    size = len(buf)
+    if pos == 0:
+        return 0
+    next_quote = buf.find(quote, pos)
+    while True:
+        nl = buf.find(b'\n', pos)
+        if nl == -1:
+            return size
+        while next_quote != -1 and next_quote < nl:
+            in_quote = not in_quote
+            next_quote = buf.find(quote, next_quote + 1)
+        pos = nl + 1
+        if not in_quote:
+            return pos
+
+
+def split_records(file_path, buf, executor, parts, quotechar='"'):
+    """Return (start, end) byte ranges of about equal size that each hold whole records."""
+    size = len(buf)
+    step = -(-size // parts)
+    cuts = list(range(0, size, step))
+    counts = executor.map(count_quotes, [file_path] * len(cuts), cuts,
+                          [min(cut + step, size) for cut in cuts], [quotechar] * len(cuts))
+
+    starts = []
+    quotes = 0
+    for cut, count in zip(cuts, counts):
+        start = next_record(buf, cut, quotes % 2 == 1, quotechar)
+        if start < size and (not starts or start > starts[-1]):
+            starts.append(start)
+        quotes += count
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def parse_chunk(file_path, start, end, kinds, delimiter=',', quotechar='"', encoding='utf-8'):
+    """Worker: parse bytes [start, end) into a table and export it to shared memory.
+
+    ``kinds`` are the column types chosen from the start of the file, so all
+    chunks agree unless a chunk's values do not fit them.
+    """
+    text = read_file_range(file_path, start, end).decode(encoding)
+    rows = csv.reader(io.StringIO(text, newline=''), delimiter=delimiter, quotechar=quotechar)
+    table = ColumnTable.from_kinds(kinds)
+    while True:
+        chunk = list(islice(rows, ColumnTable.CHUNK_ROWS))
+        if not chunk:
+            break
+        table.extend(chunk)
+    return export_table(table)
+
+
+def export_table(table):
+    """Copy a table's buffers into one shared memory block.
+
+    Returns ``(name, layout)``; ``layout`` describes where each buffer sits
+    plus the small per-column ``overrides`` dicts, which are pickled.
+    """
+    buffers = [table.widths]
+    columns = []
+    for column in table.columns:
+        columns.append((column.kind, column.overrides))
+        buffers.extend(getattr(column, name) for name in column.buffers)
+
+    views = [memoryview(buffer).cast('B') for buffer in buffers]
+    shm = shared_memory.SharedMemory(create=True, size=max(1, sum(map(len, views))))
+    spans = []
+    pos = 0
+    for buffer, view in zip(buffers, views):
+        shm.buf[pos:pos + len(view)] = view
+        spans.append((getattr(buffer, 'typecode', None), pos, pos + len(view)))
+        pos += len(view)
+        view.release()
+    shm.close()
+    return shm.name, (spans, columns)
+
+
+def merge_table(table, name, layout):
+    """Append a table exported by export_table to ``table`` and free its shared memory.
+
+    The chunk's columns are memoryviews of the shared block, so each buffer
+    is copied once, straight into ``table``.
+    """
+    spans, columns = layout
+    shm = shared_memory.SharedMemory(name=name)
+    views = []  # Every view of the block, released before it is closed
+    try:
+        buffers = []
+        for typecode, start, end in spans:
+            view = shm.buf[start:end]
+            views.append(view)
+            if typecode is not None:
+                view = view.cast(typecode)
+                views.append(view)
+            buffers.append(view)
+
+        part = ColumnTable()
+        buffers = iter(buffers)
+        part.widths = next(buffers)
+        for kind, overrides in columns:
+            column = COLUMN_TYPES[kind]()
+            for attr in column.buffers:
+                setattr(column, attr, next(buffers))
+            column.overrides = overrides
+            part.columns.append(column)
+        table.concat(part)
+    finally:
+        for view in reversed(views):
+            view.release()
+        shm.close()
+        shm.unlink()
+
+
+def release_export(future):
+    """Free the shared memory of a finished parse_chunk whose table was not merged."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    name, _ = future.result()
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def iter_read_csv_parallel(file_path, delimiter=',', quotechar='"', encoding='utf-8',
+                           workers=None, chunk_size=CHUNK_SIZE):
+    """Loader steps that parse a CSV file into a ColumnTable on ``workers`` processes.
+
+    Progress is in bytes; every step yields the table merged so far as a
+    partial result.  Chunks are merged strictly in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(file_path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return ColumnTable()
+    total = len(buf)
+
+    with open(file_path, newline='', encoding=encoding) as csvfile:
+        sample = list(islice(csv.reader(csvfile, delimiter=delimiter, quotechar=quotechar), ColumnTable.SAMPLE_ROWS))
+    kinds = [column.kind for column in ColumnTable.sample_columns(sample)]
+
+    table = ColumnTable.from_kinds(kinds)
+    futures = []
+    merged = 0
+    # Workers must share our resource tracker: blocks they create are unlinked here
+    resource_tracker.ensure_running()
+    # Loads run on a worker thread of the GUI process, which must not be forked
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        parts = max(workers, -(-total // chunk_size))
+        ranges = split_records(file_path, buf, executor, parts, quotechar)
+        buf.close()
+        futures = [executor.submit(parse_chunk, file_path, start, end, kinds, delimiter, quotechar, encoding)
+                   for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            merge_table(table, *future.result())
+            merged += 1
+            yield end, total, table
+    finally:
+        # Cancelled or failed: drop queued chunks and free the ones already parsed
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in futures[merged:]:
+            release_export(future)
+        if not buf.closed:
+            buf.close()
+    return table
@@ -0,0 +1,283 @@
+"""Inverted index for finding keys and values in loaded documents.
+
+Every key name and every scalar value is split into lowercase word tokens,
+and each token maps to the nodes it occurs in.  A node is a numbered entry
+with its parent's number and its key, so the data path of a match (keys
+and indexes from the root, as in multifile.convert.flatten_json) is
+rebuilt only for the matches that are shown.
+"""
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from heapq import merge
+
+TOKEN = re.compile(r'\w+')
+
+# Parent number of the nodes directly under the root
+ROOT = 0xFFFFFFFF
+
+# Nodes indexed per loader step
+INDEX_STEP = 65536
+
+# Matches returned by a search
+MATCH_LIMIT = 1000
+
+MODES = ('prefix', 'substring', 'exact')
+
+
+def is_container(value):
+    """True for the values a node can have children in (objects, arrays and rows)."""
+    return isinstance(value, Mapping) or (isinstance(value, Sequence) and not isinstance(value, str))
+
+
+def value_tokens(value):
+    """Return the set of tokens of a scalar value (JSON spelling for null and booleans)."""
+    if value is None:
+        return {'null'}
+    if value is True or value is False:
+        return {'true' if value else 'false'}
+    if type(value) is int:
+        return {str(abs(value))}
+    return set(TOKEN.findall(str(value).lower()))
+
+
+def node_tokens(key, value):
+    """Return the tokens of a node: its key name (list indexes have none) and, for scalars, its value."""
+    tokens = set(TOKEN.findall(key.lower())) if isinstance(key, str) else set()
+    if not is_container(value):
+        tokens |= value_tokens(value)
+    return tokens
+
+
+def children_of(value):
+    """Return an iterator over the (key, value) pairs of a container."""
+    return iter(value.items() if isinstance(value, Mapping) else enumerate(value))
+
+
+def top_level_items(data):
+    """Return an iterator over the (key, value) pairs of the data being indexed.
+
+    Lazily loaded files (LazyCSV, LazyNDJSON) are read with ``peek``, which
+    leaves their row cache alone while the UI thread uses it.
+    """
+    if hasattr(data, 'peek'):
+        return enumerate(map(data.peek, range(len(data))))
+    return children_of(data)
+
+
+def iter_nodes(value, path=()):
+    """Yield (path, value) for every node below ``value``, in document order."""
+    if not is_container(value):
+        return
+    stack = [(path, children_of(value))]
+    while stack:
+        path, items = stack[-1]
+        for key, value in items:
+            yield path + (key,), value
+            if is_container(value):
+                stack.append((path + (key,), children_of(value)))
+                break
+        else:
+            stack.pop()
+
+
+class SearchIndex:
+    """Token -> node postings over nested data, with prefix, substring and exact lookups.
+
+    The index is filled by running ``index_steps()`` (on a worker thread with
+    BackgroundLoader); searches made while it runs see the nodes indexed so
+    far.  Postings are typed arrays of node numbers in document order.
+    Prefix lookups bisect the sorted vocabulary and substring lookups scan
+    it as one joined string, so a query only touches the distinct tokens
+    and the postings it actually matches.
+
+    Edits do not touch the postings: ``update(path)`` marks the subtree at
+    ``path`` as changed, indexed matches inside changed subtrees are
+    dropped, and the current values there are matched directly.  Edited
+    subtrees are usually single values, so this keeps edits O(1) and
+    searches consistent with the data.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.postings = {}
+        self.parents = array('I')
+        self.keys = []
+        self.edited = set()
+        self.complete = False
+        self._vocabulary = None  # (token count, sorted tokens, joined text, start offsets)
+
+    def index_steps(self):
+        """Loader steps that index every node; progress is in top-level items."""
+        data = self.data
+        if not is_container(data):
+            self.complete = True
+            return
+        postings, parents, keys = self.postings, self.parents, self.keys
+        key_tokens = {}  # Key names repeat in every record, so tokenize each once
+        total = len(data)
+        done = 0
+        countdown = INDEX_STEP
+        # Each stack entry is (parent number, iterator over its (key, value) pairs)
+        stack = [(ROOT, top_level_items(data))]
+        while stack:
+            parent, items = stack[-1]
+            for key, value in items:
+                node = len(keys)
+                parents.append(parent)
+                keys.append(key)
+                tokens = key_tokens.get(key) if isinstance(key, str) else ()
+                if tokens is None:
+                    tokens = key_tokens[key] = tuple(set(TOKEN.findall(key.lower())))
+                container = type(value) in (dict, list) or is_container(value)
+                if not container:
+                    tokens = value_tokens(value).union(tokens)
+                for token in tokens:
+                    nodes = postings.get(token)
+                    if nodes is None:
+                        postings[token] = array('I', (node,))
+                    else:
+                        nodes.append(node)
+                if parent == ROOT:
+                    done += 1
+                countdown -= 1
+                if not countdown:
+                    countdown = INDEX_STEP
+                    yield done, total, None
+                if container and len(value):
+                    stack.append((node, children_of(value)))
+                    break
+            else:
+                stack.pop()
+        self.complete = True
+        self.vocabulary()
+        yield total, total, None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def path_of(self, node):
+        """Return the data path of a node number."""
+        path = []
+        while node != ROOT:
+            path.append(self.keys[node])
+            node = self.parents[node]
+        return tuple(reversed(path))
+
+    def update(self, path):
+        """Record that the value at ``path`` was replaced (call after writing it to the data)."""
+        path = tuple(path)
+        if any(path[:i] in self.edited for i in range(len(path) + 1)):
+            return
+        self.edited = {edited for edited in self.edited if edited[:len(path)] != path}
+        self.edited.add(path)
+
+    def is_edited(self, path):
+        """True if ``path`` lies in a subtree changed since it was indexed."""
+        return any(path[:i] in self.edited for i in range(len(path) + 1))
+
+    def vocabulary(self):
+        """Return the sorted tokens, their newline-joined text and each token's offset in it."""
+        count = len(self.postings)
+        if self._vocabulary is None or self._vocabulary[0] != count:
+            tokens = sorted(self.postings)
+            starts = array('Q')
+            pos = 0
+            for token in tokens:
+                starts.append(pos)
+                pos += len(token) + 1
+            self._vocabulary = (count, tokens, '\n'.join(tokens), starts)
+        return self._vocabulary[1:]
+
+    def matching_tokens(self, term, mode='prefix'):
+        """Return the indexed tokens that match one lowercase query term."""
+        if mode == 'exact':
+            return [term] if term in self.postings else []
+        tokens, text, starts = self.vocabulary()
+        if mode == 'prefix':
+            return tokens[bisect_left(tokens, term):bisect_left(tokens, term + '\U0010ffff')]
+        if mode != 'substring':
+            raise ValueError(f"Unknown search mode: {mode!r}")
+        found = []
+        pos = text.find(term)
+        while pos != -1:
+            i = bisect_right(starts, pos) - 1
+            found.append(tokens[i])
+            # Continue after this token so each token is reported once
+            pos = text.find(term, starts[i] + len(tokens[i]) + 1)
+        return found
+
+    def term_matches(self, term, mode):
+        """Return a predicate telling whether a token matches a query term."""
+        if mode == 'exact':
+            return term.__eq__
+        if mode == 'prefix':
+            return lambda token: token.startswith(term)
+        return lambda token: term in token
+
+    def search(self, query, mode='prefix', limit=MATCH_LIMIT):
+        """Return the paths of up to ``limit`` nodes matching every word of ``query``, in document order.
+
+        In ``prefix`` mode a word matches the tokens that start with it, in
+        ``substring`` mode the tokens that contain it, and in ``exact`` mode
+        only the same token.  Key names and values match alike.
+        """
+        terms = TOKEN.findall(query.lower())
+        if not terms:
+            return []
+        # Postings of the tokens each word matches, rarest word first
+        matched = [[self.postings[token] for token in self.matching_tokens(term, mode)] for term in terms]
+        matched.sort(key=lambda postings: sum(map(len, postings)))
+        if len(matched) == 1:
+            # Postings are in document order, so merging them yields the first matches without a full pass
+            postings = matched[0]
+            nodes = postings[0] if len(postings) == 1 else merge(*postings)
+        else:
+            candidates = set().union(*matched[0])
+            for postings in matched[1:]:
+                if not candidates:
+                    break
+                # intersection() streams each array through the (smaller) candidate set
+                candidates = set().union(*(candidates.intersection(nodes) for nodes in postings))
+            nodes = sorted(candidates)
+
+        paths = []
+        last = None
+        for node in nodes:
+            if node == last:
+                continue  # Matched through more than one token
+            last = node
+            path = self.path_of(node)
+            if not self.edited or not self.is_edited(path):
+                paths.append(path)
+                if len(paths) == limit:
+                    break
+        if self.edited and len(paths) < limit:
+            paths.extend(self.search_edited(terms, mode, limit - len(paths)))
+        return paths
+
+    def search_edited(self, terms, mode, limit):
+        """Match the current values of edited subtrees directly."""
+        matchers = [self.term_matches(term, mode) for term in terms]
+        paths = []
+        for edited in sorted(self.edited, key=len):
+            try:
+                value = self.value_at(edited)
+            except (LookupError, TypeError):
+                continue  # Removed by a later edit of its parent
+            nodes = [(edited, value)] if edited else []
+            for path, value in nodes + list(iter_nodes(value, edited)):
+                tokens = node_tokens(path[-1], value)
+                if all(any(map(match, tokens)) for match in matchers):
+                    paths.append(path)
+                    if len(paths) == limit:
+                        return paths
+        return paths
+
+    def value_at(self, path):
+        """Return the current value at a data path."""
+        value = self.data
+        for key in path:
+            value = value[key]
+        return value
@@ -0,0 +1,354 @@
+"""Columnar, array-backed storage for CSV tables."""
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate, islice
+
+
+def parse_int(value):
+    """Return ``value`` as an int if it round-trips exactly, else raise ValueError."""
+    number = int(value)
+    if str(number) != value:
+        raise ValueError(value)
+    return number
+
+
+def parse_float(value):
+    """Return ``value`` as a float if it round-trips exactly, else raise ValueError."""
+    number = float(value)
+    if repr(number) != value:
+        raise ValueError(value)
+    return number
+
+
+class Column:
+    """One field of a ColumnTable.
+
+    Values that do not fit the column's storage (a header above a numeric
+    column, the odd "N/A", or an edit to a string column) are kept in the
+    ``overrides`` dict keyed by row.
+    """
+
+    kind = None
+    # Attributes holding the column's flat storage buffers
+    buffers = ()
+
+    def __init__(self):
+        self.overrides = {}
+
+    def get(self, row):
+        if row in self.overrides:
+            return self.overrides[row]
+        return self.value(row)
+
+
+class StrColumn(Column):
+    """Strings stored as UTF-8 in one bytearray plus an array of end offsets."""
+
+    kind = 'str'
+    buffers = ('offsets', 'buf')
+
+    def __init__(self):
+        super().__init__()
+        self.offsets = array('I', [0])
+        self.buf = bytearray()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def value(self, row):
+        return self.buf[self.offsets[row]:self.offsets[row + 1]].decode('utf-8')
+
+    def extend(self, values):
+        encoded = [value.encode('utf-8') for value in values]
+        base = len(self.buf)
+        self.buf += b''.join(encoded)
+        if len(self.buf) > 0xFFFFFFFF and self.offsets.typecode == 'I':
+            self.offsets = array('Q', self.offsets)
+        self.offsets.extend(islice(accumulate(map(len, encoded), initial=base), 1, None))
+
+    def set(self, row, value):
+        # The byte buffer is append-only; edits live in the overrides
+        self.overrides[row] = value
+
+    def extend_column(self, other):
+        """Append all values of another StrColumn."""
+        base = len(self.buf)
+        n_rows = len(self)
+        self.buf += other.buf
+        if len(self.buf) > 0xFFFFFFFF and self.offsets.typecode == 'I':
+            self.offsets = array('Q', self.offsets)
+        self.offsets.extend(map(base.__add__, islice(other.offsets, 1, None)))
+        self.overrides.update((n_rows + row, value) for row, value in other.overrides.items())
+
+    @classmethod
+    def from_column(cls, column):
+        """Copy any column into string storage."""
+        new = cls()
+        new.extend([column.get(row) for row in range(len(column))])
+        return new
+
+
+class NumberColumn(Column):
+    """Numbers stored in a typed array; see IntColumn and FloatColumn."""
+
+    typecode = None
+    buffers = ('values',)
+
+    def __init__(self):
+        super().__init__()
+        self.values = array(self.typecode)
+
+    def __len__(self):
+        return len(self.values)
+
+    def extend(self, values):
+        # Fast path: convert the whole batch in C and check it round-trips
+        try:
+            numbers = array(self.typecode, map(self.convert, values))
+            if list(map(self.format, numbers)) == values:
+                self.values.extend(numbers)
+                return
+        except (ValueError, OverflowError):
+            pass
+        for value in values:
+            try:
+                self.values.append(self.parse(value))
+            except (ValueError, OverflowError):
+                self.values.append(0)
+                self.overrides[len(self.values) - 1] = value
+
+    def set(self, row, value):
+        try:
+            self.values[row] = self.parse(value)
+        except (ValueError, OverflowError):
+            self.overrides[row] = value
+        else:
+            self.overrides.pop(row, None)
+
+    def extend_column(self, other):
+        """Append all values of another column of the same type."""
+        n_rows = len(self)
+        self.values.frombytes(memoryview(other.values).cast('B'))
+        self.overrides.update((n_rows + row, value) for row, value in other.overrides.items())
+
+    def numpy(self):
+        """Return the values as a zero-copy NumPy array (rows in ``overrides`` hold 0)."""
+        import numpy
+        return numpy.frombuffer(self.values, dtype=self.values.typecode)
+
+
+class IntColumn(NumberColumn):
+    kind = 'int'
+    typecode = 'q'
+    convert = int
+    format = str
+    parse = staticmethod(parse_int)
+
+    def value(self, row):
+        return str(self.values[row])
+
+
+class FloatColumn(NumberColumn):
+    kind = 'float'
+    typecode = 'd'
+    convert = float
+    format = repr
+    parse = staticmethod(parse_float)
+
+    def value(self, row):
+        return repr(self.values[row])
+
+
+class RowView(Sequence):
+    """List-like view of one table row; item assignment writes to the table."""
+
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __len__(self):
+        return self.table.widths[self.row]
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[c] for c in range(*col.indices(len(self)))]
+        if col < 0:
+            col += len(self)
+        if not 0 <= col < len(self):
+            raise IndexError("column index out of range")
+        return self.table.columns[col].get(self.row)
+
+    def __setitem__(self, col, value):
+        if col < 0:
+            col += len(self)
+        if not 0 <= col < len(self):
+            raise IndexError("column index out of range")
+        self.table.set(self.row, col, value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColumnTable(Sequence):
+    """Table of string cells stored column by column.
+
+    Behaves like the list of lists ``csv.reader`` produces (``table[r][c]``,
+    ``len(table[r])``, iteration) while keeping each column in a compact
+    buffer: typed arrays for columns of integers or floats, and an
+    offsets + bytes buffer for everything else.  Cells always read back as
+    the exact text they were loaded or set with.
+    """
+
+    # Rows looked at before choosing a storage type for each column
+    SAMPLE_ROWS = 64
+    # Rows converted to columns at a time while loading
+    CHUNK_ROWS = 4096
+
+    def __init__(self):
+        self.columns = []
+        self.widths = array('I')
+        # Where the table was loaded from and how, when it came from a file
+        self.file_path = None
+        self.delimiter = ','
+        self.quotechar = '"'
+        self.has_header = False
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a table from an iterable of rows, such as a csv.reader."""
+        table = cls()
+        for _ in table.load_steps(rows):
+            pass
+        return table
+
+    def load_steps(self, rows):
+        """Append ``rows`` chunk by chunk, yielding the row count after each chunk.
+
+        Column types are chosen from the first SAMPLE_ROWS rows, so this is
+        meant for filling an empty table.
+        """
+        rows = iter(rows)
+        sample = list(islice(rows, self.SAMPLE_ROWS))
+        self.columns = self.sample_columns(sample)
+        self.extend(sample)
+        yield len(self)
+        while True:
+            chunk = list(islice(rows, self.CHUNK_ROWS))
+            if not chunk:
+                break
+            self.extend(chunk)
+            yield len(self)
+
+    @classmethod
+    def sample_columns(cls, sample):
+        """Return empty columns suited to the rows in ``sample``."""
+        width = max((len(row) for row in sample), default=0)
+        return [cls.choose_column([row[c] for row in sample if c < len(row)]) for c in range(width)]
+
+    @classmethod
+    def from_kinds(cls, kinds):
+        """Return an empty table whose columns have the given ``kind`` names."""
+        table = cls()
+        table.columns = [COLUMN_TYPES[kind]() for kind in kinds]
+        return table
+
+    @staticmethod
+    def choose_column(values):
+        """Return an empty column of the type most of ``values`` fit into."""
+        for column_class in (IntColumn, FloatColumn):
+            fits = 0
+            for value in values:
+                try:
+                    column_class.parse(value)
+                    fits += 1
+                except (ValueError, OverflowError):
+                    pass
+            if values and fits * 2 > len(values):
+                return column_class()
+        return StrColumn()
+
+    def __len__(self):
+        return len(self.widths)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [RowView(self, r) for r in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("row index out of range")
+        return RowView(self, row)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield RowView(self, row)
+
+    def append(self, row):
+        """Append a row of strings."""
+        self.extend([row])
+
+    def extend(self, rows):
+        """Append a batch of rows, adding columns if they are wider than the table."""
+        if not rows:
+            return
+        n_rows = len(self.widths)
+        width = max(map(len, rows))
+        while len(self.columns) < width:
+            column = StrColumn()
+            column.extend([''] * n_rows)
+            self.columns.append(column)
+
+        width = len(self.columns)
+        widths = array('I', map(len, rows))
+        if widths.count(width) != len(rows):
+            rows = [list(row) + [''] * (width - len(row)) for row in rows]
+        for c, values in enumerate(zip(*rows)):
+            self.columns[c].extend(list(values))
+            self.check_column(c)
+        self.widths.extend(widths)
+
+    def concat(self, other):
+        """Append all rows of ``other``, e.g. a table parsed from the next chunk of the same file."""
+        n_rows = len(self.widths)
+        while len(self.columns) < len(other.columns):
+            column = StrColumn()
+            column.extend([''] * n_rows)
+            self.columns.append(column)
+
+        for c, column in enumerate(self.columns):
+            if c < len(other.columns):
+                part = other.columns[c]
+            else:
+                part = StrColumn()
+                part.extend([''] * len(other))
+            if part.kind != column.kind:
+                # The chunks disagree on the type, so fall back to strings
+                if column.kind != 'str':
+                    column = self.columns[c] = StrColumn.from_column(column)
+                if part.kind != 'str':
+                    part = StrColumn.from_column(part)
+            column.extend_column(part)
+            self.check_column(c)
+        self.widths.frombytes(memoryview(other.widths).cast('B'))
+
+    def check_column(self, c):
+        """Demote a numeric column to strings once too many values did not fit it."""
+        column = self.columns[c]
+        if column.kind != 'str' and len(column.overrides) > 16 + len(column) // 16:
+            self.columns[c] = StrColumn.from_column(column)
+
+    def set(self, row, col, value):
+        """Set one cell, keeping the column's storage type."""
+        self.columns[col].set(row, value)
+
+    def column(self, col):
+        """Return the storage object for a column, for column-wise scans."""
+        return self.columns[col]
+
+
+COLUMN_TYPES = {column_class.kind: column_class for column_class in (StrColumn, IntColumn, FloatColumn)}
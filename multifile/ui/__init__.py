@@ -0,0 +1 @@
+"""Tkinter widgets shared by the editor apps."""
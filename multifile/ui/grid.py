@@ -0,0 +1,207 @@
+import tkinter as tk
+
+
+class VirtualGrid(tk.Frame):
+    """Editable cell grid that only creates widgets for the visible viewport.
+
+    A fixed pool of Entry widgets is laid out once; scrolling just changes
+    which slice of the data the pool shows.  Keystrokes only mark a cell as
+    edited; its text is read once and reported through
+    ``on_edit(row, col, value)`` (absolute row/column numbers) when the cell
+    loses focus, before the viewport scrolls, or after ``debounce_ms`` of
+    idle time.  ``on_flush()`` is called after each such batch of edits.
+    """
+
+    # Rows wider than this sample are picked up lazily as they scroll into view
+    WIDTH_SAMPLE = 1000
+
+    def __init__(self, master, on_edit=None, on_flush=None, rows=20, columns=8, cell_width=15, debounce_ms=500):
+        super().__init__(master)
+        self.on_edit = on_edit
+        self.on_flush = on_flush
+        self.debounce_ms = debounce_ms
+        self.edited = {}  # (pool row, pool col) -> (data row, data col)
+        self.flush_job = None
+        self.editable = True  # Set to False to ignore typing, e.g. while a load is in progress
+        self.view_rows = rows
+        self.view_cols = columns
+        self.data = []
+        self.header = None  # Optional column names shown instead of column numbers
+        self.n_cols = 0
+        self.first_row = 0
+        self.first_col = 0
+
+        self.create_widgets(cell_width)
+
+    def create_widgets(self, cell_width):
+        """Create the header labels, the Entry pool and the scrollbars."""
+        self.col_labels = []
+        for j in range(self.view_cols):
+            label = tk.Label(self, width=cell_width, anchor="w")
+            label.grid(row=0, column=j + 1, padx=5)
+            self.col_labels.append(label)
+
+        self.row_labels = []
+        self.cells = []
+        for i in range(self.view_rows):
+            label = tk.Label(self, width=7, anchor="e")
+            label.grid(row=i + 1, column=0, padx=5)
+            self.row_labels.append(label)
+
+            pool_row = []
+            for j in range(self.view_cols):
+                entry = tk.Entry(self, width=cell_width)
+                entry.grid(row=i + 1, column=j + 1, padx=5, pady=2)
+                entry.bind('<KeyRelease>', lambda event, i=i, j=j: self.on_key(i, j, event))
+                entry.bind('<FocusOut>', lambda event: self.flush())
+                entry.bind('<Up>', lambda event, i=i, j=j: self.move_focus(i - 1, j))
+                entry.bind('<Down>', lambda event, i=i, j=j: self.move_focus(i + 1, j))
+                entry.bind('<Return>', lambda event, i=i, j=j: self.move_focus(i + 1, j))
+                self.bind_wheel(entry)
+                pool_row.append(entry)
+            self.cells.append(pool_row)
+
+        self.vsb = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.vsb.grid(row=1, column=self.view_cols + 1, rowspan=self.view_rows, sticky="ns")
+        self.hsb = tk.Scrollbar(self, orient="horizontal", command=self.xview)
+        self.hsb.grid(row=self.view_rows + 1, column=1, columnspan=self.view_cols, sticky="ew")
+        self.bind_wheel(self)
+
+    def bind_wheel(self, widget):
+        """Scroll the grid with the mouse wheel (Windows/macOS and X11 events)."""
+        widget.bind('<MouseWheel>', lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        widget.bind('<Button-4>', lambda event: self.scroll_rows(-1))
+        widget.bind('<Button-5>', lambda event: self.scroll_rows(1))
+
+    def set_data(self, data, columns=None, header=None):
+        """Show a new sequence of rows, starting at the top-left corner.
+
+        ``header`` optionally names the columns in the label row.
+        """
+        # Unflushed edits belong to the old data
+        if self.flush_job is not None:
+            self.after_cancel(self.flush_job)
+            self.flush_job = None
+        self.edited = {}
+        self.data = data
+        self.header = header
+        if columns is None:
+            columns = 0
+            for r in range(min(len(data), self.WIDTH_SAMPLE)):
+                columns = max(columns, len(data[r]))
+        self.n_cols = columns
+        self.first_row = 0
+        self.first_col = 0
+        self.refresh()
+
+    def refresh(self):
+        """Copy the visible slice of the data into the Entry pool."""
+        self.flush()
+        n_rows = len(self.data)
+        for i in range(self.view_rows):
+            r = self.first_row + i
+            row = self.data[r] if r < n_rows else None
+            if row is not None and len(row) > self.n_cols:
+                self.n_cols = len(row)
+            self.row_labels[i].config(text=str(r + 1) if row is not None else "")
+            for j in range(self.view_cols):
+                c = self.first_col + j
+                entry = self.cells[i][j]
+                entry.config(state="normal")
+                entry.delete(0, tk.END)
+                if row is not None and c < len(row):
+                    entry.insert(0, row[c])
+                else:
+                    entry.config(state="disabled")
+
+        header = self.header
+        for j in range(self.view_cols):
+            c = self.first_col + j
+            if c >= self.n_cols:
+                text = ""
+            elif header is not None and c < len(header):
+                text = str(header[c])
+            else:
+                text = str(c + 1)
+            self.col_labels[j].config(text=text)
+
+        self.vsb.set(*self.fraction(self.first_row, self.view_rows, n_rows))
+        self.hsb.set(*self.fraction(self.first_col, self.view_cols, self.n_cols))
+
+    @staticmethod
+    def fraction(first, visible, total):
+        """Return the (low, high) scrollbar fractions for a window into ``total`` items."""
+        if total <= visible:
+            return 0.0, 1.0
+        return first / total, min(first + visible, total) / total
+
+    def on_key(self, i, j, event):
+        """Mark pool cell (i, j) as edited and (re)start the idle timer."""
+        if not self.editable or event.keysym in ('Up', 'Down', 'Return', 'Left', 'Right', 'Tab'):
+            return
+        row, col = self.first_row + i, self.first_col + j
+        if row >= len(self.data):
+            return
+        self.edited[(i, j)] = (row, col)
+        if self.flush_job is not None:
+            self.after_cancel(self.flush_job)
+        self.flush_job = self.after(self.debounce_ms, self.flush)
+
+    def flush(self):
+        """Report the text of every edited cell once, then call ``on_flush``."""
+        if self.flush_job is not None:
+            self.after_cancel(self.flush_job)
+            self.flush_job = None
+        if not self.edited:
+            return
+        edited, self.edited = self.edited, {}
+        for (i, j), (row, col) in edited.items():
+            if self.on_edit:
+                self.on_edit(row, col, self.cells[i][j].get())
+        if self.on_flush:
+            self.on_flush()
+
+    def move_focus(self, i, j):
+        """Move the focus up or down a cell, scrolling at the viewport edges."""
+        if i < 0:
+            self.scroll_rows(-1)
+            i = 0
+        elif i >= self.view_rows:
+            self.scroll_rows(1)
+            i = self.view_rows - 1
+        self.cells[i][j].focus_set()
+        return "break"
+
+    def scroll_rows(self, amount):
+        """Scroll the viewport by ``amount`` rows."""
+        self.set_first_row(self.first_row + amount)
+
+    def set_first_row(self, first):
+        first = max(0, min(first, len(self.data) - self.view_rows))
+        if first != self.first_row:
+            self.first_row = first
+            self.refresh()
+
+    def set_first_col(self, first):
+        first = max(0, min(first, self.n_cols - self.view_cols))
+        if first != self.first_col:
+            self.first_col = first
+            self.refresh()
+
+    def yview(self, *args):
+        """Scrollbar command for the vertical scrollbar."""
+        self.set_first_row(self.scroll_target(args, self.first_row, self.view_rows, len(self.data)))
+
+    def xview(self, *args):
+        """Scrollbar command for the horizontal scrollbar."""
+        self.set_first_col(self.scroll_target(args, self.first_col, self.view_cols, self.n_cols))
+
+    @staticmethod
+    def scroll_target(args, first, visible, total):
+        """Translate Scrollbar ``moveto``/``scroll`` arguments into a first index."""
+        if args[0] == "moveto":
+            return int(float(args[1]) * total)
+        amount = int(args[1])
+        if args[2] == "pages":
+            amount *= visible
+        return first + amount
@@ -0,0 +1,168 @@
+import time
+
+from multifile.highlight import INITIAL, lex_line, scan_line
+
+# Lines highlighted above and below the visible ones
+MARGIN_LINES = 20
+# Lines fetched from the widget per call while catching up on line states
+SCAN_BLOCK = 2000
+# Seconds an idle callback may spend before handing back to the event loop
+IDLE_BUDGET = 0.01
+
+COLORS = {'key': '#1f3fa0', 'string': '#1c7a1c', 'number': '#b45f06', 'literal': '#8a2be2'}
+
+
+class JSONHighlighter:
+    """Incremental JSON syntax highlighting for a tk.Text.
+
+    Only the visible lines (plus MARGIN_LINES) are tokenized and tagged,
+    in an idle callback after each change or scroll.  The lexer state at
+    the start of every line is kept (see multifile.highlight), so an edit
+    re-scans from the changed line only until a line's state comes out as
+    it was before; a jump far down the file catches up on the states in
+    time-sliced idle steps.
+
+    The Text's widget command is wrapped to see every insert and delete
+    (including undo and redo), which is how the changed line and the number
+    of lines added or removed are known.  Set the Text's ``yscrollcommand``
+    before creating the highlighter; it is chained.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.enabled = True
+        self.states = [INITIAL]  # states[i]: lexer state at the start of line i + 1
+        self.painted = [None]  # painted[i]: state line i + 1 was highlighted from, None if it needs painting
+        self.frontier = 1  # states[:frontier] are up to date
+        # States from dirty_end up to valid_end were up to date before the pending edits,
+        # so re-scanning can stop as soon as it reproduces one of them
+        self.dirty_end = 0
+        self.valid_end = 1
+        self.job = None
+        for kind, color in COLORS.items():
+            text.tag_configure(f"json_{kind}", foreground=color)
+
+        self.scroll_command = text.cget("yscrollcommand")
+        text.configure(yscrollcommand=self.on_scroll)
+        self.widget_command = text._w + "_highlighted"
+        text.tk.call("rename", text._w, self.widget_command)
+        text.tk.createcommand(text._w, self.dispatch)
+
+    def call(self, *args):
+        """Run a subcommand of the wrapped Text directly."""
+        return self.text.tk.call((self.widget_command,) + args)
+
+    def dispatch(self, operation, *args):
+        """Text widget command: pass everything on, noting which lines inserts and deletes change."""
+        if operation not in ('insert', 'delete', 'replace'):
+            return self.call(operation, *args)
+        before = self.line_count()
+        # "end" is after the final newline, past the last line
+        line = min(int(str(self.call('index', args[0])).split('.')[0]), before)
+        result = self.call(operation, *args)
+        self.lines_changed(line, self.line_count() - before)
+        return result
+
+    def line_count(self):
+        return int(str(self.call('index', 'end-1c')).split('.')[0])
+
+    def lines_changed(self, line, added):
+        """Drop the states after an edit starting on ``line`` that added (or removed) ``added`` lines."""
+        if added > 0:
+            self.states[line:line] = [None] * added
+            self.painted[line:line] = [None] * added
+        elif added < 0:
+            del self.states[line:line - added]
+            del self.painted[line:line - added]
+        self.painted[line - 1] = None
+
+        def shifted(index):
+            return max(index + added, line) if index > line else index
+        self.valid_end = shifted(max(self.valid_end, self.frontier))
+        self.dirty_end = max(shifted(self.dirty_end), line + max(added, 0))
+        self.frontier = min(self.frontier, line)
+        self.schedule()
+
+    def on_scroll(self, first, last):
+        if self.scroll_command:
+            self.text.tk.eval(f"{self.scroll_command} {first} {last}")
+        self.schedule()
+
+    def schedule(self):
+        """Highlight the visible lines once Tk is idle."""
+        if self.job is None and self.enabled:
+            self.job = self.text.after_idle(self.rehighlight)
+
+    def set_enabled(self, enabled):
+        """Turn highlighting on or off (off removes the tags)."""
+        self.enabled = enabled
+        if enabled:
+            self.schedule()
+            return
+        for kind in COLORS:
+            self.text.tag_remove(f"json_{kind}", "1.0", "end")
+        self.painted = [None] * len(self.painted)
+
+    def visible_lines(self):
+        """Return the first and last line to highlight: the visible ones plus a margin."""
+        first = int(str(self.call('index', '@0,0')).split('.')[0])
+        last = int(str(self.call('index', f"@0,{self.text.winfo_height()}")).split('.')[0])
+        return max(1, first - MARGIN_LINES), min(len(self.states), last + MARGIN_LINES)
+
+    def rehighlight(self):
+        self.job = None
+        if not self.enabled:
+            return
+        first, last = self.visible_lines()
+        if not self.catch_up(last, time.perf_counter() + IDLE_BUDGET):
+            # Far from the known states (e.g. after a jump to the end); continue in the next slice
+            self.job = self.text.after(1, self.rehighlight)
+            return
+        self.paint(first, last)
+
+    def get_lines(self, first, last):
+        return str(self.call('get', f"{first}.0", f"{last}.end")).split('\n')
+
+    def catch_up(self, upto, deadline):
+        """Bring the states up to line ``upto``; returns False if the deadline passed first."""
+        done = True
+        while self.frontier < upto:
+            first = self.frontier
+            state = self.states[first - 1]
+            for index, line in enumerate(self.get_lines(first, min(upto, first + SCAN_BLOCK) - 1), first):
+                state = scan_line(line, state)
+                if self.dirty_end <= index < self.valid_end and self.states[index] == state:
+                    # Converged: the states after this line are the same as before the edit
+                    self.frontier = self.valid_end
+                    break
+                self.states[index] = state
+                self.frontier = index + 1
+            if time.perf_counter() > deadline and self.frontier < upto:
+                done = False
+                break
+        if self.frontier < self.valid_end:
+            # The old states only follow on from each other after the last one re-scanned
+            self.dirty_end = max(self.dirty_end, self.frontier)
+        else:
+            self.dirty_end = 0
+        return done
+
+    def paint(self, first, last):
+        """Tag the tokens of the lines in ``first..last`` that changed since they were last painted."""
+        states, painted = self.states, self.painted
+        stale = [line for line in range(first, last + 1) if painted[line - 1] != states[line - 1]]
+        if not stale:
+            return
+        texts = self.get_lines(stale[0], stale[-1])
+        cleared = []
+        ranges = {kind: [] for kind in COLORS}
+        for line in stale:
+            tokens, _ = lex_line(texts[line - stale[0]], states[line - 1])
+            cleared += (f"{line}.0", f"{line}.end")
+            for start, end, kind in tokens:
+                ranges[kind] += (f"{line}.{start}", f"{line}.{end}")
+            painted[line - 1] = states[line - 1]
+        for kind in COLORS:
+            self.call('tag', 'remove', f"json_{kind}", *cleared)
+            if ranges[kind]:
+                self.call('tag', 'add', f"json_{kind}", *ranges[kind])
@@ -0,0 +1,32 @@
+import tkinter as tk
+
+
+class LoadStatus(tk.Frame):
+    """Status line with a Cancel button for a BackgroundLoader."""
+
+    def __init__(self, master, loader):
+        super().__init__(master)
+        self.loader = loader
+
+        self.label = tk.Label(self, text="", anchor="w")
+        self.label.grid(row=0, column=0, padx=5, sticky="w")
+
+        self.cancel_button = tk.Button(self, text="Cancel", command=self.loader.cancel, state="disabled")
+        self.cancel_button.grid(row=0, column=1, padx=5)
+
+    def begin(self, file_path):
+        """Show that a load has started."""
+        self.label.config(text=f"Loading {file_path}...")
+        self.cancel_button.config(state="normal")
+
+    def show_progress(self, done, total):
+        """BackgroundLoader ``on_progress`` callback."""
+        if total:
+            self.label.config(text=f"Loading... {done * 100 // total}%")
+        else:
+            self.label.config(text=f"Loading... {done:,}")
+
+    def finish(self, message=""):
+        """Show the outcome of the load and disable Cancel."""
+        self.label.config(text=message)
+        self.cancel_button.config(state="disabled")
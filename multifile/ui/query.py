@@ -0,0 +1,134 @@
+import tkinter as tk
+from tkinter import messagebox
+
+
+class QueryBar(tk.Frame):
+    """Sort, filter and go-to-key controls for a VirtualGrid of indexed rows.
+
+    ``get_index()`` returns the TableIndex (see multifile.index) of the rows
+    currently loaded, or None if there is nothing to query.  Sorted and
+    filtered results are shown through a RowSubset view, so grid row numbers
+    have to be mapped back with ``source_row`` before editing the data.
+
+    Edits still pending in the grid are flushed (through its ``on_flush``,
+    which commits them) before every query, so the indexes and the view
+    they replace both see them.
+
+    The column is given by number (1-based) or header name.  A filter value
+    of ``low..high`` (either side may be empty) selects a range, anything
+    else selects cells equal to it.
+    """
+
+    def __init__(self, master, grid, get_index):
+        super().__init__(master)
+        self.grid_view = grid
+        self.get_index = get_index
+        self.view = None  # RowSubset shown instead of all rows
+
+        tk.Label(self, text="Column:").grid(row=0, column=0, padx=2)
+        self.column_entry = tk.Entry(self, width=12)
+        self.column_entry.grid(row=0, column=1, padx=2)
+        tk.Label(self, text="Value:").grid(row=0, column=2, padx=2)
+        self.value_entry = tk.Entry(self, width=20)
+        self.value_entry.grid(row=0, column=3, padx=2)
+        self.value_entry.bind('<Return>', lambda event: self.filter())
+
+        buttons = [("Sort ▲", lambda: self.sort(False)), ("Sort ▼", lambda: self.sort(True)),
+                   ("Filter", self.filter), ("Go To", self.go_to), ("Show All", self.show_all)]
+        for i, (text, command) in enumerate(buttons):
+            tk.Button(self, text=text, command=command).grid(row=0, column=4 + i, padx=2)
+
+        self.status = tk.Label(self, text="", anchor="w")
+        self.status.grid(row=0, column=4 + len(buttons), padx=5, sticky="w")
+
+    def column_index(self):
+        """Return (TableIndex, column number) for the column entry, or None after reporting a problem."""
+        self.grid_view.flush()
+        index = self.get_index()
+        if index is None:
+            messagebox.showerror("Error", "Load a CSV file first.")
+            return None
+        text = self.column_entry.get().strip()
+        if text.isdigit() and int(text) > 0:
+            return index, int(text) - 1
+        if index.first and len(index.data):
+            header = list(index.data[0])
+            if text in header:
+                return index, header.index(text)
+        messagebox.showerror("Error", f"Unknown column: {text!r}")
+        return None
+
+    def show(self, rows, message):
+        """Show the given data rows (header rows stay on top)."""
+        index = self.get_index()
+        self.view = index.view(rows)
+        self.grid_view.set_data(self.view, header=self.grid_view.header)
+        self.status.config(text=message)
+
+    def sort(self, reverse):
+        found = self.column_index()
+        if found:
+            index, col = found
+            self.show(index.column(col).sorted_rows(reverse), "Sorted descending" if reverse else "Sorted")
+
+    def filter(self):
+        found = self.column_index()
+        if not found:
+            return
+        index, col = found
+        value = self.value_entry.get()
+        try:
+            if '..' in value:
+                low, high = value.split('..', 1)
+                rows = index.column(col).between(low or None, high or None)
+            else:
+                rows = index.column(col).equal(value)
+        except ValueError:
+            messagebox.showerror("Error", "This column holds numbers; range bounds must be numbers too.")
+            return
+        self.show(rows, f"{len(rows):,} matching rows")
+
+    def go_to(self):
+        """Scroll to the first row whose cell equals the value."""
+        found = self.column_index()
+        if not found:
+            return
+        index, col = found
+        row = index.column(col).find(self.value_entry.get())
+        if row is not None and self.view is not None:
+            try:
+                row = self.view.rows.index(row)
+            except ValueError:
+                row = None
+        if row is None:
+            self.status.config(text="Not found")
+            return
+        self.status.config(text=f"Row {row + 1}")
+        self.grid_view.set_first_row(row)
+
+    def show_all(self):
+        """Go back to showing every row in file order."""
+        self.grid_view.flush()
+        if self.view is not None:
+            data = self.view.data
+            self.view = None
+            self.grid_view.set_data(data, header=self.grid_view.header)
+        self.status.config(text="")
+
+    def reset(self):
+        """Forget the current view, e.g. because other rows were loaded."""
+        self.view = None
+        self.status.config(text="")
+
+    def rebind(self, data):
+        """Point the grid (through the current view, if any) at an equivalent copy of the rows."""
+        if self.view is not None:
+            self.view.data = data
+        else:
+            self.grid_view.data = data
+
+    def source_row(self, row):
+        """Return the data row shown at grid row ``row``."""
+        if self.view is not None:
+            return self.view.rows[row]
+        return row
@@ -0,0 +1,83 @@
+import tkinter as tk
+
+from multifile.loader import BackgroundLoader
+from multifile.search import MATCH_LIMIT, MODES, SearchIndex
+
+
+class SearchBar(tk.Frame):
+    """Find keys and values in loaded data and jump to each match.
+
+    ``set_data`` indexes new data on a worker thread (see
+    multifile.search.SearchIndex); searches can start right away and see
+    what has been indexed so far.  ``on_jump(path)`` shows the node at a
+    data path and returns something false if it cannot.  Call ``note_edit``
+    with the path of every value written to the data, so matches follow
+    the edits.
+    """
+
+    def __init__(self, master, on_jump):
+        super().__init__(master)
+        self.on_jump = on_jump
+        self.loader = BackgroundLoader(self)
+        self.index = None
+        self.matches = []
+        self.current = -1
+
+        tk.Label(self, text="Find:").grid(row=0, column=0, padx=2)
+        self.query_entry = tk.Entry(self, width=30)
+        self.query_entry.grid(row=0, column=1, padx=2)
+        self.query_entry.bind('<Return>', lambda event: self.find())
+        self.mode = tk.StringVar(self, MODES[0])
+        tk.OptionMenu(self, self.mode, *MODES).grid(row=0, column=2, padx=2)
+        tk.Button(self, text="Find", command=self.find).grid(row=0, column=3, padx=2)
+        tk.Button(self, text="Next", command=self.next_match).grid(row=0, column=4, padx=2)
+
+        self.status = tk.Label(self, text="", anchor="w")
+        self.status.grid(row=0, column=5, padx=5, sticky="w")
+
+    def set_data(self, data):
+        """Start indexing new data, replacing the old index."""
+        self.index = SearchIndex(data)
+        self.matches = []
+        self.current = -1
+        self.status.config(text="Indexing...")
+        self.loader.start(
+            self.index.index_steps(),
+            on_done=lambda result: self.status.config(text=f"Indexed {len(self.index):,} nodes"),
+            on_progress=self.show_progress,
+        )
+
+    def show_progress(self, done, total):
+        """BackgroundLoader ``on_progress`` callback."""
+        if total:
+            self.status.config(text=f"Indexing... {done * 100 // total}%")
+
+    def note_edit(self, path):
+        """Note that the value at ``path`` was replaced."""
+        if self.index is not None:
+            self.index.update(path)
+
+    def find(self):
+        """Search for the query and jump to the first match."""
+        if self.index is None:
+            return
+        self.matches = self.index.search(self.query_entry.get(), self.mode.get())
+        self.current = -1
+        if not self.matches:
+            self.status.config(text="No matches" + self.indexing_note())
+            return
+        self.next_match()
+
+    def next_match(self):
+        """Jump to the next match, wrapping around at the end."""
+        if not self.matches:
+            return
+        self.current = (self.current + 1) % len(self.matches)
+        count = f"{len(self.matches):,}+" if len(self.matches) == MATCH_LIMIT else f"{len(self.matches):,}"
+        if self.on_jump(self.matches[self.current]):
+            self.status.config(text=f"Match {self.current + 1:,} of {count}" + self.indexing_note())
+        else:
+            self.status.config(text=f"Match {self.current + 1:,} is no longer in the data")
+
+    def indexing_note(self):
+        return "" if self.index.complete else " (still indexing)"
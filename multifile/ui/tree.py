@@ -0,0 +1,263 @@
+from collections.abc import Mapping
+from itertools import islice
+
+from multifile.search import is_container
+
+# Children inserted per expansion; the rest wait behind a "more" node
+PAGE_SIZE = 500
+# Longest value text shown in the Value column
+PREVIEW_CHARS = 200
+
+
+def preview(value):
+    """Text for the Value column: the value itself, or a size for containers of containers.
+
+    Arrays of plain values (such as CSV rows) show their first few items.
+    """
+    if isinstance(value, Mapping):
+        return f"{{{len(value):,} keys}}" if value else "{}"
+    if is_container(value):
+        if not len(value):
+            return "[]"
+        head = list(islice(value, 20))
+        if any(map(is_container, head)):
+            return f"[{len(value):,} items]"
+        text = ", ".join(map(str, head)) + (", …" if len(value) > len(head) else "")
+    else:
+        text = str(value)
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + "…"
+
+
+class PagedTree:
+    """Paging machinery shared by the lazily populated Treeview models.
+
+    A node with children gets a single placeholder child so Tk draws it as
+    expandable, and opening it (``<<TreeviewOpen>>``) replaces the
+    placeholder with its first ``page_size`` children; a "more" node at the
+    end inserts the next page when it is opened or selected.
+
+    Subclasses supply ``child_count(node)`` and ``insert_items(node, start,
+    stop, position)``, which inserts the nodes for children ``start`` to
+    ``stop`` and returns the position after them.
+    """
+
+    def __init__(self, tree, page_size=PAGE_SIZE):
+        self.tree = tree
+        self.page_size = page_size
+        self.placeholders = set()
+        self.more = {}  # "more" node -> (parent node, first child, end of its range or None)
+        tree.bind("<<TreeviewOpen>>", self.on_open, add=True)
+        tree.bind("<<TreeviewSelect>>", self.on_select, add=True)
+
+    def clear(self):
+        """Delete every node."""
+        self.tree.delete(*self.tree.get_children())
+        self.placeholders = set()
+        self.more = {}
+
+    def child_count(self, node):
+        """Number of children of a node that can be shown."""
+        raise NotImplementedError
+
+    def insert_items(self, node, start, stop, position):
+        """Insert the nodes for children ``start`` to ``stop`` under ``node``; return the position after them."""
+        raise NotImplementedError
+
+    def insert_children(self, node, start, stop=None, position="end"):
+        """Insert a page of the children ``start`` to ``stop`` (None for all) of a node.
+
+        Children go under ``node`` at ``position``; the rest of the range
+        waits behind a "more" node.
+        """
+        end = self.child_count(node) if stop is None else stop
+        page_end = min(end, start + self.page_size)
+        position = self.insert_items(node, start, page_end, position)
+        if page_end < end:
+            self.add_more(node, page_end, stop, position)
+
+    def add_placeholder(self, node):
+        """Give a node a placeholder child so it can be opened."""
+        self.placeholders.add(self.tree.insert(node, "end", text=""))
+
+    def add_more(self, node, start, stop, position="end"):
+        """Insert a "more" node for the children from ``start`` up to ``stop`` (None for all)."""
+        count = (self.child_count(node) if stop is None else stop) - start
+        more = self.tree.insert(node, position, text=f"… {count:,} more")
+        self.more[more] = (node, start, stop)
+
+    def expand(self, node):
+        """Replace a node's placeholder with its first page of children."""
+        children = self.tree.get_children(node)
+        if len(children) == 1 and children[0] in self.placeholders:
+            self.placeholders.discard(children[0])
+            self.tree.delete(children[0])
+            self.insert_children(node, 0)
+
+    def load_more(self, more, at=None):
+        """Replace a "more" node with the next page of children, or with the page holding child number ``at``.
+
+        Jumping to a page leaves the children skipped over behind a "more"
+        node of their own.
+        """
+        node, start, stop = self.more.pop(more)
+        position = self.tree.index(more)
+        self.tree.delete(more)
+        if at is not None and at - start >= self.page_size:
+            page_start = at - (at - start) % self.page_size
+            self.add_more(node, start, page_start, position)
+            start = page_start
+            position += 1
+        self.insert_children(node, start, stop, position)
+
+    def load_page(self, node, position):
+        """Insert the page holding child number ``position`` of a node; return False if no "more" node has it."""
+        for child in self.tree.get_children(node):
+            if child in self.more:
+                start, stop = self.more[child][1:]
+                if start <= position < (self.child_count(node) if stop is None else stop):
+                    self.load_more(child, position)
+                    return True
+        return False
+
+    def on_open(self, event):
+        node = self.tree.focus()
+        if node in self.more:
+            self.load_more(node)
+        else:
+            self.expand(node)
+
+    def on_select(self, event):
+        for node in self.tree.selection():
+            if node in self.more:
+                self.load_more(node)
+
+    def show(self, node):
+        """Scroll to, select and focus a node."""
+        self.tree.see(node)
+        self.tree.selection_set(node)
+        self.tree.focus(node)
+
+
+class LazyTree(PagedTree):
+    """Show nested data in a ttk.Treeview, inserting nodes only when they are opened.
+
+    Only the top level is inserted by ``set_data``; containers are paged in
+    as they are opened (see PagedTree).  ``paths`` maps every inserted node
+    to its data path (keys and indexes from the root, as in
+    multifile.convert.flatten_json), so ``set_value`` writes an edit straight
+    to the data without searching the tree.  ``reveal`` opens the way down to
+    a path (such as a search match), inserting only the page that holds each
+    node on the way.
+
+    The Treeview needs ``show="tree headings"`` and one ``Value`` column; the
+    key is shown in the tree column.
+    """
+
+    def __init__(self, tree, page_size=PAGE_SIZE):
+        super().__init__(tree, page_size)
+        self.data = None
+        self.paths = {}
+
+    def set_data(self, data):
+        """Show new data, replacing the whole tree."""
+        self.clear()
+        self.data = data
+        self.paths = {}
+        if is_container(data):
+            self.insert_children("", 0)
+        else:
+            self.paths[self.tree.insert("", "end", text="", values=(preview(data),))] = ()
+
+    def value_at(self, path):
+        """Return the value at a data path."""
+        value = self.data
+        for key in path:
+            value = value[key]
+        return value
+
+    def child_count(self, node):
+        return len(self.value_at(self.paths[node] if node else ()))
+
+    def insert_items(self, node, start, stop, position):
+        path = self.paths[node] if node else ()
+        container = self.value_at(path)
+        if isinstance(container, Mapping):
+            items = islice(container.items(), start, stop)
+        else:
+            items = zip(range(start, stop), (container[i] for i in range(start, stop)))
+        for key, value in items:
+            child = self.tree.insert(node, position, text=str(key), values=(preview(value),))
+            self.paths[child] = path + (key,)
+            if is_container(value) and len(value):
+                self.add_placeholder(child)
+            if position != "end":
+                position += 1
+        return position
+
+    def reveal(self, path):
+        """Insert and open the nodes down to a data path, then select and show its node.
+
+        Returns the node, or None if the path is not in the data.
+        """
+        node = ""
+        for depth in range(1, len(path) + 1):
+            if node:
+                self.expand(node)
+                self.tree.item(node, open=True)
+            node = self.child_node(node, path[:depth])
+            if node is None:
+                return None
+        if not path:
+            children = self.tree.get_children("")
+            if not children:
+                return None
+            node = children[0]
+        self.show(node)
+        return node
+
+    def child_node(self, node, path):
+        """Return the child of ``node`` at a data path, inserting its page if needed."""
+        for child in self.tree.get_children(node):
+            if self.paths.get(child) == path:
+                return child
+        container = self.value_at(path[:-1])
+        key = path[-1]
+        try:
+            if isinstance(container, Mapping):
+                position = list(container).index(key)
+            elif 0 <= key < len(container):
+                position = key
+            else:
+                return None
+        except (ValueError, TypeError):
+            return None
+        if self.load_page(node, position):
+            return self.child_node(node, path)
+        return None
+
+    def path_of(self, node):
+        """Return the data path of a node, or None for placeholder and "more" nodes."""
+        return self.paths.get(node)
+
+    def set_value(self, node, value):
+        """Write a new value for a node into the data and refresh its row (and children)."""
+        path = self.paths[node]
+        if path:
+            self.value_at(path[:-1])[path[-1]] = value
+        else:
+            self.data = value
+        self.forget_subtree(node)
+        self.tree.delete(*self.tree.get_children(node))
+        if is_container(value) and len(value):
+            self.add_placeholder(node)
+        self.tree.item(node, values=(preview(value),), open=False)
+
+    def forget_subtree(self, node):
+        """Drop the bookkeeping of a node's inserted descendants."""
+        stack = list(self.tree.get_children(node))
+        while stack:
+            child = stack.pop()
+            self.paths.pop(child, None)
+            self.placeholders.discard(child)
+            self.more.pop(child, None)
+            stack.extend(self.tree.get_children(child))
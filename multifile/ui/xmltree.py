@@ -0,0 +1,120 @@
+from multifile.ui.tree import PAGE_SIZE, PREVIEW_CHARS, PagedTree
+
+
+def clip(text):
+    """Shorten text for a Treeview column."""
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + "…"
+
+
+def element_values(element):
+    """Attributes and text columns for an element."""
+    attributes = " ".join(f'{name}="{value}"' for name, value in element.attrib.items())
+    text = (element.text or "").strip()
+    return clip(attributes), clip(text)
+
+
+class LazyXMLTree(PagedTree):
+    """Show an ElementTree in a ttk.Treeview, inserting elements only when their parent is opened.
+
+    ``set_root`` inserts the root and its first page of children; elements
+    are paged in as they are opened (see multifile.ui.tree.PagedTree).
+    ``elements`` maps every inserted node to its Element, so no widgets or
+    copies of the document are kept per element.  ``reveal`` opens the way
+    down to an element given by its child positions (such as a query
+    result), inserting only the page that holds each element on the way.
+
+    While a document is still streaming in, ``grow`` makes more of the
+    root's children available (only complete ones should be shown).
+
+    The Treeview needs ``show="tree headings"`` and the columns
+    ``Attributes`` and ``Text``; the tag is shown in the tree column.
+    """
+
+    def __init__(self, tree, page_size=PAGE_SIZE):
+        super().__init__(tree, page_size)
+        self.root_node = None
+        self.available = None  # Children of the root that can be shown (None for all)
+        self.root_end = 0  # Children of the root inserted or standing behind "more" nodes
+        self.elements = {}
+
+    def set_root(self, element, available=None):
+        """Show a new document, replacing the whole tree."""
+        self.clear()
+        self.elements = {}
+        self.available = available
+        self.root_end = 0
+        self.root_node = self.tree.insert("", "end", text=element.tag, values=element_values(element), open=True)
+        self.elements[self.root_node] = element
+        self.insert_children(self.root_node, 0)
+
+    def child_count(self, node):
+        count = len(self.elements[node])
+        if node == self.root_node and self.available is not None:
+            return min(count, self.available)
+        return count
+
+    def grow(self, available):
+        """Allow ``available`` children of the root to be shown (None for all of them)."""
+        self.available = available
+        children = self.tree.get_children(self.root_node)
+        if children and children[-1] in self.more:
+            more = children[-1]
+            start = self.more[more][1]
+            self.tree.item(more, text=f"… {self.child_count(self.root_node) - start:,} more")
+        elif self.root_end < self.child_count(self.root_node):
+            if sum(1 for child in children if child not in self.more) < self.page_size:
+                self.insert_children(self.root_node, self.root_end)
+            else:
+                self.add_more(self.root_node, self.root_end, None)
+
+    def insert_children(self, node, start, stop=None, position="end"):
+        if node == self.root_node:
+            self.root_end = max(self.root_end, self.child_count(node) if stop is None else stop)
+        super().insert_children(node, start, stop, position)
+
+    def insert_items(self, node, start, stop, position):
+        element = self.elements[node]
+        for index in range(start, stop):
+            child = element[index]
+            item = self.tree.insert(node, position, text=child.tag, values=element_values(child))
+            self.elements[item] = child
+            if len(child):
+                self.add_placeholder(item)
+            if position != "end":
+                position += 1
+        return position
+
+    def reveal(self, positions):
+        """Insert and open the nodes down to an element, then select and show its node.
+
+        ``positions`` are the child indexes leading from the root element
+        (see multifile.xpath.XMLIndex.path_of).  Returns the node, or None
+        if there is no such element in the tree.
+        """
+        node = self.root_node
+        if node is None:
+            return None
+        for position in positions:
+            self.expand(node)
+            self.tree.item(node, open=True)
+            node = self.child_node(node, position)
+            if node is None:
+                return None
+        self.show(node)
+        return node
+
+    def child_node(self, node, position):
+        """Return the node of child number ``position`` of a node's element, inserting its page if needed."""
+        if not 0 <= position < self.child_count(node):
+            return None
+        child = self.elements[node][position]
+        for item in self.tree.get_children(node):
+            if self.elements.get(item) is child:
+                return item
+        if self.load_page(node, position):
+            return self.child_node(node, position)
+        return None
+
+    def element_of(self, node):
+        """Return the Element shown by a node, or None for placeholder and "more" nodes."""
+        return self.elements.get(node)
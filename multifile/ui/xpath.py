@@ -0,0 +1,85 @@
+import tkinter as tk
+from tkinter import messagebox
+
+from multifile.loader import BackgroundLoader
+from multifile.xpath import XMLIndex
+
+
+class XPathBar(tk.Frame):
+    """Run XPath-style queries over a loaded XML tree and jump to each result.
+
+    ``set_root`` indexes a new tree on a worker thread (see
+    multifile.xpath.XMLIndex); queries run once the index is built.
+    ``on_jump(positions)`` shows the element at the given child positions
+    from the root and returns something false if it cannot.
+    """
+
+    def __init__(self, master, on_jump):
+        super().__init__(master)
+        self.on_jump = on_jump
+        self.loader = BackgroundLoader(self)
+        self.index = None
+        self.matches = []
+        self.current = -1
+
+        tk.Label(self, text="XPath:").grid(row=0, column=0, padx=2)
+        self.query_entry = tk.Entry(self, width=40)
+        self.query_entry.grid(row=0, column=1, padx=2)
+        self.query_entry.bind('<Return>', lambda event: self.find())
+        tk.Button(self, text="Find", command=self.find).grid(row=0, column=2, padx=2)
+        tk.Button(self, text="Next", command=self.next_match).grid(row=0, column=3, padx=2)
+
+        self.status = tk.Label(self, text="", anchor="w")
+        self.status.grid(row=0, column=4, padx=5, sticky="w")
+
+    def set_root(self, root):
+        """Start indexing a new tree, replacing the old index."""
+        self.clear()
+        self.index = XMLIndex(root)
+        self.status.config(text="Indexing...")
+        self.loader.start(
+            self.index.index_steps(),
+            on_done=lambda index: self.status.config(text=f"Indexed {len(index):,} elements"),
+            on_progress=self.show_progress,
+        )
+
+    def clear(self):
+        """Forget the current tree (e.g. while another one loads)."""
+        self.loader.cancel()
+        self.index = None
+        self.matches = []
+        self.current = -1
+        self.status.config(text="")
+
+    def show_progress(self, done, total):
+        """BackgroundLoader ``on_progress`` callback."""
+        if total:
+            self.status.config(text=f"Indexing... {done * 100 // total}%")
+
+    def find(self):
+        """Run the query and jump to the first result."""
+        if self.index is None:
+            return
+        if not self.index.complete:
+            self.status.config(text="Still indexing, try again shortly")
+            return
+        try:
+            self.matches = self.index.select(self.query_entry.get())
+        except ValueError as exc:
+            messagebox.showerror("Error", f"Invalid query: {exc}")
+            return
+        self.current = -1
+        if not self.matches:
+            self.status.config(text="No matches")
+            return
+        self.next_match()
+
+    def next_match(self):
+        """Jump to the next result, wrapping around at the end."""
+        if not self.matches:
+            return
+        self.current = (self.current + 1) % len(self.matches)
+        if self.on_jump(self.index.path_of(self.matches[self.current])):
+            self.status.config(text=f"Match {self.current + 1:,} of {len(self.matches):,}")
+        else:
+            self.status.config(text=f"Match {self.current + 1:,} is not in the tree")
@@ -0,0 +1,117 @@
+"""XML loading shared by the editor apps."""
+import os
+import xml.etree.ElementTree as ET
+
+# Bytes fed to the parser per loader step
+READ_CHUNK = 1024 * 1024
+
+# Elements parsed per loader step when streaming
+STREAM_BATCH = 10000
+
+
+def iter_read_xml(file_path):
+    """Loader steps that feed an XML file to the parser in chunks and return the root element.
+
+    Progress is in bytes; there are no partial results.
+    """
+    total = os.path.getsize(file_path)
+    parser = ET.XMLParser()
+    done = 0
+    with open(file_path, 'rb') as xml_file:
+        while True:
+            chunk = xml_file.read(READ_CHUNK)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            done += len(chunk)
+            yield done, total, None
+    return parser.close()
+
+
+class StreamedXML:
+    """The part of an XML document kept by iter_stream_xml.
+
+    ``root`` is the root element (None until the parser has seen it) and
+    ``complete`` the number of its children that have been fully parsed;
+    children after those may still be growing.  ``truncated`` is True when
+    loading stopped at the element limit.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.complete = 0
+        self.kept = 0  # Complete elements kept in the tree
+        self.truncated = False
+
+
+def iter_stream_xml(file_path, max_depth=None, tags=None, max_elements=None, batch_size=STREAM_BATCH):
+    """Loader steps that stream an XML file through ET.iterparse, keeping only part of the tree.
+
+    - ``max_depth``: elements more than this many levels below the root
+      are dropped as soon as they end (the root is level 0),
+    - ``tags``: only elements with one of these tags are kept, with their
+      whole subtree and the ancestors leading to them,
+    - ``max_elements``: loading stops once this many elements are kept.
+
+    Dropped subtrees are cleared as soon as they are parsed, so memory
+    holds the kept elements plus the path to the element being parsed.
+    Progress is in bytes and the StreamedXML is yielded as the partial
+    result every ``batch_size`` elements, so its complete top-level
+    elements can be shown while the rest is read.  The result is the
+    StreamedXML.
+    """
+    total = os.path.getsize(file_path)
+    tags = set(tags) if tags else None
+    streamed = StreamedXML()
+    stack = []  # Open elements, root first
+    inside = []  # With ``tags``: for each open element, whether it or an ancestor matches
+    countdown = batch_size
+    with open(file_path, 'rb') as xml_file:
+        for event, element in ET.iterparse(xml_file, events=('start', 'end')):
+            if event == 'start':
+                if not stack:
+                    streamed.root = element
+                    streamed.kept = 1
+                if tags is not None:
+                    inside.append(element.tag in tags or (inside[-1] if inside else False))
+                stack.append(element)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if not depth:
+                break  # The root has ended
+            matched = inside.pop() if tags is not None else True
+            if (max_depth is not None and depth > max_depth) or (not matched and not len(element)):
+                parent = stack[-1]
+                del parent[child_position(parent, element)]
+                element.clear()
+            else:
+                streamed.kept += 1
+                if depth == 1:
+                    streamed.complete = child_position(stack[0], element) + 1
+                if max_elements is not None and streamed.kept >= max_elements:
+                    streamed.truncated = True
+                    break
+            countdown -= 1
+            if not countdown:
+                countdown = batch_size
+                yield xml_file.tell(), total, streamed
+    if streamed.root is not None and not streamed.truncated:
+        streamed.complete = len(streamed.root)
+    return streamed
+
+
+def child_position(parent, element):
+    """Return the index of ``element`` among the children of ``parent``.
+
+    iterparse reports events a buffer at a time, so siblings after an
+    element may already be attached when its end event arrives; they are
+    few, so the search runs from the end.
+    """
+    if parent[-1] is element:
+        return len(parent) - 1
+    for position in range(len(parent) - 2, -1, -1):
+        if parent[position] is element:
+            return position
+    raise ValueError("element is not a child of parent")
@@ -0,0 +1,320 @@
+"""Compact in-memory model of an XML document for the editors."""
+import os
+import xml.etree.ElementTree as ET
+from array import array
+
+from multifile.xmlio import READ_CHUNK
+
+# Parents whose children are kept grouped by tag for resolving edited paths
+GROUP_CACHE = 256
+
+
+class XMLNodes:
+    """An XML document as parallel arrays, one entry per element.
+
+    Elements are numbered in document order (the root is 0) and linked by
+    ``first_child`` and ``next_sibling`` (-1 for none).  Tag and attribute
+    names are interned in ``names`` and stored as indexes into it.  Texts
+    (stripped, as in multifile.convert.xml_to_dict) and attribute values
+    are UTF-8 in one shared ``pool`` and stored as offsets and lengths, so
+    an element costs a few array slots rather than objects of its own.
+    Tails are dropped, as in xml_to_dict.
+
+    ``items()`` is the flattened view the editors show: the same
+    (path, value) pairs as ``flatten_json(xml_to_dict(root))``, generated
+    as they are walked.  Assigning to a path writes the text or attribute
+    straight into the model (the new value is appended to the pool), and
+    ``to_element()`` rebuilds the elements in their original order.
+    Nothing here recurses, so depth is not limited by the recursion limit.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.name_ids = {}  # Name -> its index in names
+        self.tag_ids = array('I')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.text_start = array('Q')
+        self.text_length = array('i')  # -1 for elements without text
+        # Element i has the attributes from first_attribute[i] up to first_attribute[i + 1]
+        self.first_attribute = array('I')
+        self.attribute_ids = array('I')
+        self.attribute_start = array('Q')
+        self.attribute_length = array('I')
+        self.pool = bytearray()
+        self.groups = {}  # Element -> its children grouped by tag, for recently edited paths
+
+    @classmethod
+    def from_element(cls, element):
+        """Build the model from an ElementTree element and its subtree."""
+        nodes = cls()
+        # (element, its node, children iterator, node of the last child added)
+        stack = [(element, nodes.add(element.tag, element.attrib, element.text, -1, -1), iter(element), -1)]
+        while stack:
+            current, node, children, last = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            added = nodes.add(child.tag, child.attrib, child.text, node, last)
+            stack[-1] = (current, node, children, added)
+            stack.append((child, added, iter(child), -1))
+        return nodes
+
+    def name_id(self, name):
+        """Return the index of a tag or attribute name in ``names``, adding it if it is new."""
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def store(self, text):
+        """Append text to the pool and return its (offset, length)."""
+        data = str(text).encode('utf-8')
+        start = len(self.pool)
+        self.pool += data
+        return start, len(data)
+
+    def fetch(self, start, length):
+        return self.pool[start:start + length].decode('utf-8')
+
+    def add(self, tag, attrib, text, parent, previous):
+        """Append an element as the child of ``parent`` after sibling ``previous`` (-1 for none)."""
+        node = len(self.tag_ids)
+        self.tag_ids.append(self.name_id(tag))
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.text_start.append(0)
+        self.text_length.append(-1)
+        if text is not None:
+            self.set_text(node, text.strip())
+        self.first_attribute.append(len(self.attribute_ids))
+        for name, value in attrib.items():
+            start, length = self.store(value)
+            self.attribute_ids.append(self.name_id(name))
+            self.attribute_start.append(start)
+            self.attribute_length.append(length)
+        if previous >= 0:
+            self.next_sibling[previous] = node
+        elif parent >= 0:
+            self.first_child[parent] = node
+        return node
+
+    def __len__(self):
+        return len(self.tag_ids)
+
+    def tag(self, node):
+        return self.names[self.tag_ids[node]]
+
+    def text(self, node):
+        """Return an element's stripped text, or None if it has none."""
+        length = self.text_length[node]
+        return None if length < 0 else self.fetch(self.text_start[node], length)
+
+    def set_text(self, node, text):
+        self.text_start[node], self.text_length[node] = self.store(text)
+
+    def attribute_range(self, node):
+        """Return the range of an element's attributes in the attribute arrays."""
+        end = self.first_attribute[node + 1] if node + 1 < len(self.first_attribute) else len(self.attribute_ids)
+        return range(self.first_attribute[node], end)
+
+    def attributes(self, node):
+        """Return an element's attributes as a dict."""
+        return {self.names[self.attribute_ids[i]]: self.fetch(self.attribute_start[i], self.attribute_length[i])
+                for i in self.attribute_range(node)}
+
+    def set_attribute(self, node, name, value):
+        """Change the value of an existing attribute; raises KeyError if the element has no such attribute."""
+        name_id = self.name_ids.get(name)
+        for i in self.attribute_range(node):
+            if self.attribute_ids[i] == name_id:
+                self.attribute_start[i], self.attribute_length[i] = self.store(value)
+                return
+        raise KeyError(name)
+
+    def children(self, node):
+        """Yield the child elements of ``node`` in document order."""
+        child = self.first_child[node]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def grouped_children(self, node):
+        """Return ``{tag: [child, ...]}`` for the children of ``node``, tags in order of first appearance."""
+        groups = {}
+        for child in self.children(node):
+            tag = self.tag(child)
+            if tag in groups:
+                groups[tag].append(child)
+            else:
+                groups[tag] = [child]
+        return groups
+
+    def is_leaf(self, node):
+        """True if an element flattens to a single value (its text): no children and no attributes."""
+        return self.first_child[node] < 0 and not self.attribute_range(node)
+
+    def members(self, node):
+        """Yield (keys, element or None, value) for the fields xml_to_dict gives a non-leaf element.
+
+        ``keys`` is the key, or tag and index, of the field within the element.
+        """
+        for tag, group in self.grouped_children(node).items():
+            if len(group) == 1:
+                yield (tag,), group[0], None
+            else:
+                for index, child in enumerate(group):
+                    yield (tag, index), child, None
+        for name, value in self.attributes(node).items():
+            yield ('@' + name,), None, value
+        text = self.text(node)
+        if text:
+            yield ('#text',), None, text
+
+    def items(self):
+        """Yield the (path, value) pairs of flatten_json(xml_to_dict(root)), in the same order."""
+        if not self.tag_ids:
+            return
+        # keys[:sizes[i]] is the path of the element whose fields stack[i] walks
+        keys = []
+        sizes = []
+        stack = [iter((((self.tag(0),), 0, None),))]
+        while stack:
+            for parts, node, value in stack[-1]:
+                if node is None:
+                    yield tuple(keys) + parts, value
+                elif self.is_leaf(node):
+                    yield tuple(keys) + parts, self.text(node)
+                else:
+                    sizes.append(len(keys))
+                    keys.extend(parts)
+                    stack.append(self.members(node))
+                    break
+            else:
+                stack.pop()
+                if sizes:
+                    del keys[sizes.pop():]
+
+    def locate(self, path):
+        """Return (element, field) for an items() path; field is None for a leaf's text, or ``@name``/``#text``.
+
+        Raises KeyError if the path is not in the document.
+        """
+        if not self.tag_ids or not path or path[0] != self.tag(0):
+            raise KeyError(path)
+        node = 0
+        position = 1
+        while position < len(path):
+            part = path[position]
+            if part == '#text' or (isinstance(part, str) and part.startswith('@')):
+                if position != len(path) - 1:
+                    raise KeyError(path)
+                return node, part
+            group = self.cached_groups(node).get(part)
+            if group is None:
+                raise KeyError(path)
+            if len(group) > 1:
+                position += 1
+                if position == len(path) or not isinstance(path[position], int):
+                    raise KeyError(path)
+                node = group[path[position]]
+            else:
+                node = group[0]
+            position += 1
+        if not self.is_leaf(node):
+            raise KeyError(path)
+        return node, None
+
+    def cached_groups(self, node):
+        if node not in self.groups:
+            if len(self.groups) >= GROUP_CACHE:
+                self.groups.clear()
+            self.groups[node] = self.grouped_children(node)
+        return self.groups[node]
+
+    def __getitem__(self, path):
+        node, field = self.locate(path)
+        if field is not None and field.startswith('@'):
+            return self.attributes(node)[field[1:]]
+        return self.text(node)
+
+    def __setitem__(self, path, value):
+        """Set the text or attribute at an items() path."""
+        node, field = self.locate(path)
+        if field is not None and field.startswith('@'):
+            try:
+                self.set_attribute(node, field[1:], value)
+            except KeyError:
+                raise KeyError(path) from None
+        else:
+            self.set_text(node, value)
+
+    def to_element(self):
+        """Rebuild the ElementTree element of the document, children in their original order."""
+        if not self.tag_ids:
+            return None
+        root = self.new_element(0)
+        stack = [(root, self.first_child[0])]  # (element, node of its next child to build)
+        while stack:
+            parent, child = stack[-1]
+            if child < 0:
+                stack.pop()
+                continue
+            stack[-1] = (parent, self.next_sibling[child])
+            stack.append((self.new_element(child, parent), self.first_child[child]))
+        return root
+
+    def new_element(self, node, parent=None):
+        """Create the element for a node, appended to ``parent`` if one is given."""
+        if parent is None:
+            element = ET.Element(self.tag(node), self.attributes(node))
+        else:
+            element = ET.SubElement(parent, self.tag(node), self.attributes(node))
+        element.text = self.text(node)
+        return element
+
+
+def iter_read_nodes(file_path):
+    """Loader steps that parse an XML file straight into XMLNodes.
+
+    The file is fed to the parser in chunks and every element is cleared
+    and detached once it has been copied into the model, so the full
+    ElementTree is never held.  Progress is in bytes; the result is the
+    XMLNodes.
+    """
+    total = os.path.getsize(file_path)
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    nodes = XMLNodes()
+    stack = []  # (element, node, node of its last child) for the open elements
+    done = 0
+    with open(file_path, 'rb') as xml_file:
+        while True:
+            chunk = xml_file.read(READ_CHUNK)
+            if chunk:
+                parser.feed(chunk)
+                done += len(chunk)
+            else:
+                parser.close()
+            for event, element in parser.read_events():
+                if event == 'start':
+                    if stack:
+                        parent, node, last = stack[-1]
+                        added = nodes.add(element.tag, element.attrib, None, node, last)
+                        stack[-1] = (parent, node, added)
+                    else:
+                        added = nodes.add(element.tag, element.attrib, None, -1, -1)
+                    stack.append((element, added, -1))
+                    continue
+                _, node, _ = stack.pop()
+                # The text is complete by the end event; the children were copied already
+                if element.text is not None:
+                    nodes.set_text(node, element.text.strip())
+                element.clear()
+                if stack:
+                    del stack[-1][0][:]
+            if not chunk:
+                break
+            yield done, total, None
+    return nodes
@@ -0,0 +1,260 @@
+"""Streaming XML output.
+
+Elements are written through xml.sax.saxutils.XMLGenerator as the source
+data is walked, instead of building an ElementTree and writing it at the
+end, so memory holds only the path to the element being written (plus a
+chunk of output).  The walkers arrange data the way the tree-building
+functions in multifile.convert do: write_json_element like json_to_xml,
+write_dict_element like dict_to_xml and write_data like build_xml.
+"""
+import io
+import re
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
+from xml.sax.saxutils import XMLGenerator
+
+# Characters collected before each write to the file
+WRITE_CHUNK = 1024 * 1024
+# Sanitized names remembered (JSON keys repeat a lot)
+NAME_CACHE = 4096
+
+NAME_CHARS = re.compile(r'[^\w.\-]')
+# Characters XML 1.0 cannot represent at all, not even escaped
+INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+
+@lru_cache(maxsize=NAME_CACHE)
+def sanitize_name(name):
+    """Turn any string (e.g. a JSON key) into a valid XML name.
+
+    Characters that cannot appear in a name become ``_``, and names that
+    do not start with a letter or ``_`` get a ``_`` in front.
+    """
+    name = NAME_CHARS.sub('_', str(name))
+    if not name or not (name[0].isalpha() or name[0] == '_'):
+        name = '_' + name
+    return name
+
+
+def clean_text(text):
+    """Replace characters that XML cannot represent with U+FFFD."""
+    return INVALID_CHARS.sub('\ufffd', text)
+
+
+class ChunkedText(io.TextIOBase):
+    """Text sink passing many small writes on to ``out`` in chunks of about WRITE_CHUNK characters.
+
+    Binary files get the chunks encoded as UTF-8.
+    """
+
+    def __init__(self, out):
+        super().__init__()
+        self.out = out
+        self.binary = isinstance(out, (io.RawIOBase, io.BufferedIOBase))
+        self.pieces = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self.pieces.append(text)
+        self.size += len(text)
+        if self.size >= WRITE_CHUNK:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self.pieces:
+            text = ''.join(self.pieces)
+            self.out.write(text.encode('utf-8') if self.binary else text)
+            self.pieces.clear()
+            self.size = 0
+
+    def close(self):
+        # Whatever was not flushed belongs to an abandoned document
+        self.pieces.clear()
+        super().close()
+
+
+class XMLWriter:
+    """Write an XML document to a file (text or binary) one element at a time.
+
+    Names are sanitized (see sanitize_name) and ElementTree's ``{uri}name``
+    names get a prefix, declared on the element where the namespace is
+    first used.  Text and attribute values are escaped by XMLGenerator.
+    """
+
+    def __init__(self, out):
+        self.buffer = ChunkedText(out)
+        self.generator = XMLGenerator(self.buffer, 'utf-8', short_empty_elements=True)
+        self.names = []  # Names of the open elements
+        self.scopes = []  # (depth, {uri: prefix}) of the open elements that declare namespaces
+        self.prefix_count = 0
+
+    def start_document(self):
+        self.generator.startDocument()
+
+    def end_document(self):
+        self.generator.endDocument()
+        self.buffer.flush()
+
+    def start(self, tag, attrib=None):
+        """Open an element."""
+        declarations = {}
+        name = self.qualify(tag, declarations)
+        attrs = {}
+        if attrib:
+            for key, value in attrib.items():
+                attrs[self.qualify(key, declarations)] = clean_text(str(value))
+        if declarations:
+            attrs = {**declarations, **attrs}
+        self.generator.startElement(name, attrs)
+        self.names.append(name)
+
+    def text(self, text):
+        """Write text inside the open element."""
+        self.generator.characters(clean_text(text))
+
+    def end(self):
+        """Close the innermost open element."""
+        self.generator.endElement(self.names.pop())
+        if self.scopes and self.scopes[-1][0] > len(self.names):
+            self.scopes.pop()
+
+    def qualify(self, name, declarations):
+        """Return the name to write for a tag or attribute, adding any namespace declaration it needs."""
+        if not name.startswith('{'):
+            return sanitize_name(name)
+        uri, local = name[1:].split('}', 1)
+        if uri == XML_NAMESPACE:
+            return 'xml:' + sanitize_name(local)
+        for _, prefixes in reversed(self.scopes):
+            if uri in prefixes:
+                return f"{prefixes[uri]}:{sanitize_name(local)}"
+        prefix = f"ns{self.prefix_count}"
+        self.prefix_count += 1
+        declarations['xmlns:' + prefix] = uri
+        depth = len(self.names) + 1  # Depth of the element being opened
+        if not self.scopes or self.scopes[-1][0] != depth:
+            self.scopes.append((depth, {}))
+        self.scopes[-1][1][uri] = prefix
+        return f"{prefix}:{sanitize_name(local)}"
+
+
+def write_tree(writer, pairs, open_element):
+    """Write the elements for an iterable of (tag, value) pairs, walking their content with an explicit stack.
+
+    ``open_element(writer, tag, value)`` writes an element's start tag and
+    text and returns an iterable of (tag, value) pairs for its children,
+    or None if it has none.
+    """
+    stack = [iter(pairs)]
+    while stack:
+        for tag, value in stack[-1]:
+            children = open_element(writer, tag, value)
+            if children is None:
+                writer.end()
+            else:
+                stack.append(iter(children))
+                break
+        else:
+            stack.pop()
+            if stack:
+                writer.end()
+
+
+def open_json(writer, tag, value):
+    """Start the element json_to_xml makes for a value: objects and arrays nest, anything else is text."""
+    writer.start(tag)
+    if isinstance(value, dict):
+        return value.items()
+    if isinstance(value, list):
+        return zip(repeat('item'), value)
+    writer.text(str(value))
+    return None
+
+
+def open_dict(writer, tag, value):
+    """Start the element dict_to_xml makes for a value, with ``@name`` keys as attributes and ``#text`` as text."""
+    if not isinstance(value, dict):
+        writer.start(tag)
+        if value is not None:
+            writer.text(str(value))
+        return None
+    writer.start(tag, {key[1:]: item for key, item in value.items() if key.startswith('@')})
+    if '#text' in value:
+        writer.text(str(value['#text']))
+    return ((key, item) for key, items in value.items() if not key.startswith('@') and key != '#text'
+            for item in (items if isinstance(items, list) else [items]))
+
+
+def write_json_element(writer, tag, value):
+    """Write JSON-like data as the element json_to_xml would build for it."""
+    write_tree(writer, [(tag, value)], open_json)
+
+
+def write_dict_element(writer, tag, d):
+    """Write a dict (as xml_to_dict returns) as the element dict_to_xml would build for it."""
+    write_tree(writer, [(tag, d)], open_dict)
+
+
+def write_nodes(writer, nodes):
+    """Write an XMLNodes document (see multifile.xmlnodes), elements in their original order."""
+    def open_node(writer, tag, node):
+        writer.start(nodes.tag(node), nodes.attributes(node))
+        text = nodes.text(node)
+        if text:
+            writer.text(text)
+        return ((None, child) for child in nodes.children(node))
+
+    if len(nodes):
+        write_tree(writer, [(None, 0)], open_node)
+
+
+def write_data(writer, data):
+    """Write JSON-like data arranged as multifile.convert.build_xml arranges it."""
+    from multifile.xmlnodes import XMLNodes
+    if isinstance(data, XMLNodes):
+        write_nodes(writer, data)
+    elif isinstance(data, dict) and len(data) == 1:
+        (tag, content), = data.items()
+        if isinstance(content, dict):
+            write_dict_element(writer, tag, content)
+        else:
+            write_json_element(writer, tag, content)
+    else:
+        write_json_element(writer, "root", data)
+
+
+def write_records(writer, records):
+    """Write an iterable of JSON records as the ``<root>`` of ``<item>`` elements json_to_xml makes for a list.
+
+    Records are written as they come, so memory is bounded by the largest one.
+    """
+    writer.start("root")
+    write_tree(writer, zip(repeat('item'), records), open_json)
+    writer.end()
+
+
+@contextmanager
+def xml_file(file_path):
+    """Open an XMLWriter on ``file_path``, with the XML declaration written.
+
+    The file replaces ``file_path`` only once the block has finished
+    without an error (see multifile.atomic).
+    """
+    from multifile.atomic import atomic_open
+    with atomic_open(file_path, 'w', encoding='utf-8', newline='\n') as out:
+        writer = XMLWriter(out)
+        writer.start_document()
+        yield writer
+        writer.end_document()
+
+
+def write_xml(data, file_path):
+    """Atomically save JSON-like data as XML, arranged as build_xml arranges it."""
+    with xml_file(file_path) as writer:
+        write_data(writer, data)
@@ -0,0 +1,247 @@
+"""Indexed XPath-style queries over a loaded ElementTree.
+
+Supported is the subset of XPath (and ElementPath) used to pick out
+elements: location paths made of ``/tag`` (children) and ``//tag``
+(descendants) steps, ``*`` for any tag, and predicates ``[@name='value']``,
+``[@name]``, ``[n]`` (1-based position among the parent's matching
+children) and ``[last()]``.  For example ``//record[@id='123']`` or
+``/catalog/book[2]/title``.
+
+XMLIndex walks the tree once and keeps postings of the elements with each
+tag and a hash of attribute values, so a query starts from the elements it
+names instead of walking the tree; elements are numbered in document order
+and subtrees are contiguous ranges of numbers, so ``//`` steps are range
+lookups in those postings.
+"""
+import re
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+# Elements indexed per loader step
+INDEX_STEP = 65536
+# Compiled queries kept for reuse
+QUERY_CACHE = 128
+
+STEP = re.compile(r'(//?)(\{[^}]*\}[\w.-]+|[\w.:-]+|\*)((?:\[[^\]]*\])*)')
+PREDICATE = re.compile(r'''\[\s*(?:
+    @(?P<name>[\w.:-]+)\s*(?:=\s*(?:'(?P<single>[^']*)'|"(?P<double>[^"]*)"))?
+  | (?P<position>\d+)
+  | (?P<last>last\(\)))\s*\]''', re.VERBOSE)
+
+
+@lru_cache(maxsize=QUERY_CACHE)
+def compile_query(query):
+    """Parse a query into a tuple of (descendant, tag, predicates) steps.
+
+    ``predicates`` is a tuple of ``('attr', name, value)``, ``('has', name)``,
+    ``('position', n)`` and ``('last',)``.  Raises ValueError for queries
+    outside the supported subset.
+    """
+    query = query.strip()
+    steps = []
+    position = 0
+    while position < len(query):
+        match = STEP.match(query, position)
+        if not match:
+            raise ValueError(f"Unsupported query at {query[position:]!r}")
+        predicates = []
+        for text in re.findall(r'\[[^\]]*\]', match.group(3)):
+            predicate = PREDICATE.fullmatch(text)
+            if not predicate:
+                raise ValueError(f"Unsupported predicate {text!r}")
+            if predicate.group('name'):
+                value = predicate.group('single')
+                if value is None:
+                    value = predicate.group('double')
+                if value is None:
+                    predicates.append(('has', predicate.group('name')))
+                else:
+                    predicates.append(('attr', predicate.group('name'), value))
+            elif predicate.group('position'):
+                if int(predicate.group('position')) < 1:
+                    raise ValueError(f"Positions start at 1: {text!r}")
+                predicates.append(('position', int(predicate.group('position'))))
+            else:
+                predicates.append(('last',))
+        steps.append((match.group(1) == '//', match.group(2), tuple(predicates)))
+        position = match.end()
+    if not steps:
+        raise ValueError("Empty query")
+    return tuple(steps)
+
+
+class XMLIndex:
+    """Tag postings and an attribute-value hash over an ElementTree, for ``select``.
+
+    Elements are numbered in document order (the root is 0); ``elements``
+    maps numbers back to elements.  The subtree of element ``n`` is the
+    numbers from ``n`` up to ``ends[n]``.  Run ``index_steps()`` (e.g. with
+    multifile.loader.BackgroundLoader) before querying; the tree must not
+    change afterwards.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.elements = []
+        self.parents = array('i')
+        self.positions = array('I')  # Index of each element among its parent's children
+        self.ends = array('I')
+        self.tags = {}  # Tag -> array('I') of the elements with it, in document order
+        # Attribute name -> {value: element number, or array('I') of them for values that repeat}
+        self.attributes = {}
+        self.complete = False
+
+    def __len__(self):
+        return len(self.elements)
+
+    def index_steps(self):
+        """Loader steps that number and index every element; progress is in top-level elements."""
+        elements, ends = self.elements, self.ends
+        total = len(self.root)
+        countdown = INDEX_STEP
+        self.add(self.root, -1, 0)
+        stack = [(0, iter(self.root))]  # (element number, its children iterator)
+        counts = [0]  # Children numbered so far, for each element on the stack
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                counts.pop()
+                ends[node] = len(elements)
+                continue
+            number = len(elements)
+            self.add(child, node, counts[-1])
+            counts[-1] += 1
+            stack.append((number, iter(child)))
+            counts.append(0)
+            countdown -= 1
+            if not countdown:
+                countdown = INDEX_STEP
+                yield counts[0], total, None
+        self.complete = True
+        return self
+
+    def add(self, element, parent, position):
+        number = len(self.elements)
+        self.elements.append(element)
+        self.parents.append(parent)
+        self.positions.append(position)
+        self.ends.append(0)
+        postings = self.tags.get(element.tag)
+        if postings is None:
+            self.tags[element.tag] = array('I', (number,))
+        else:
+            postings.append(number)
+        for name, value in element.attrib.items():
+            values = self.attributes.get(name)
+            if values is None:
+                values = self.attributes[name] = {}
+            numbers = values.get(value)
+            if numbers is None:
+                values[value] = number
+            elif isinstance(numbers, int):
+                values[value] = array('I', (numbers, number))
+            else:
+                numbers.append(number)
+
+    def select(self, query):
+        """Return the numbers of the elements a query selects, in document order.
+
+        Raises ValueError for queries outside the supported subset.
+        """
+        context = None  # The document, above the root element
+        for descendant, tag, predicates in compile_query(query):
+            context = self.step(context, descendant, tag, predicates)
+            if not context:
+                break
+        return context
+
+    def step(self, context, descendant, tag, predicates):
+        """Apply one location step to the sorted element numbers in ``context`` (None for the document)."""
+        elements = self.elements
+        rest = predicates
+        if predicates and predicates[0][0] == 'attr':
+            # Start from the elements with the attribute value rather than all with the tag
+            candidates = self.with_attribute(predicates[0][1], predicates[0][2])
+            if tag != '*':
+                candidates = [n for n in candidates if elements[n].tag == tag]
+            rest = predicates[1:]
+        elif tag == '*':
+            candidates = range(len(elements))
+        else:
+            candidates = self.tags.get(tag, ())
+
+        if context is None:
+            selected = list(candidates) if descendant else [n for n in candidates[:1] if n == 0]
+        elif descendant:
+            selected = self.within(context, candidates)
+        elif len(candidates) <= sum(len(elements[n]) for n in context):
+            parents = self.parents
+            context = set(context)
+            selected = [n for n in candidates if parents[n] in context]
+        else:
+            # Fewer children in the context than candidates: test the children instead
+            selected = sorted(child for n in context for child in self.children(n)
+                              if tag == '*' or elements[child].tag == tag)
+            rest = predicates
+
+        for predicate in rest:
+            selected = self.filter(selected, predicate)
+        return selected
+
+    def with_attribute(self, name, value):
+        """Return the numbers of the elements with an attribute value, in document order."""
+        numbers = self.attributes.get(name, {}).get(value, ())
+        return (numbers,) if isinstance(numbers, int) else numbers
+
+    def within(self, context, candidates):
+        """Return the candidates inside the subtrees below the elements in ``context``."""
+        selected = []
+        end = 0
+        for node in context:
+            if node < end:
+                continue  # Inside the subtree of an earlier context element
+            end = self.ends[node]
+            selected.extend(candidates[bisect_left(candidates, node + 1):bisect_left(candidates, end)])
+        return selected
+
+    def children(self, node):
+        """Yield the numbers of an element's children."""
+        child = node + 1
+        for _ in range(len(self.elements[node])):
+            yield child
+            child = self.ends[child]
+
+    def filter(self, selected, predicate):
+        """Apply one predicate to the sorted element numbers in ``selected``."""
+        kind = predicate[0]
+        elements = self.elements
+        if kind == 'attr':
+            return [n for n in selected if elements[n].get(predicate[1]) == predicate[2]]
+        if kind == 'has':
+            return [n for n in selected if elements[n].get(predicate[1]) is not None]
+        # Positions count among the selected children of the same parent
+        parents = self.parents
+        counts = {}
+        if kind == 'last':
+            for n in selected:
+                counts[parents[n]] = counts.get(parents[n], 0) + 1
+            wanted = counts
+            counts = {}
+        kept = []
+        for n in selected:
+            parent = parents[n]
+            count = counts[parent] = counts.get(parent, 0) + 1
+            if count == (wanted[parent] if kind == 'last' else predicate[1]):
+                kept.append(n)
+        return kept
+
+    def path_of(self, node):
+        """Return the child positions leading from the root element to an element."""
+        path = []
+        while node > 0:
+            path.append(self.positions[node])
+            node = self.parents[node]
+        return tuple(reversed(path))
@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import csv
-import json
+from multifile.jsonio import write_json
 
 class VCFViewerApp:
     def __init__(self, root):
@@ -114,9 +114,8 @@ class VCFViewerApp:
                 writer.writerow([contact.get('Name', 'Unknown'), contact.get('Phone', 'N/A')])
 
     def save_as_json(self, file_path):
-        # Save contacts as a JSON file
-        with open(file_path, "w") as json_file:
-            json.dump(self.contacts, json_file, indent=4)
+        # Save contacts as a JSON file (atomically)
+        write_json(self.contacts, file_path)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,11 +1,23 @@
 import tkinter as tk
-from tkinter import filedialog
-import xml.etree.ElementTree as ET
+from tkinter import filedialog, messagebox, ttk
+from multifile.loader import BackgroundLoader
+from multifile.ui.progress import LoadStatus
+from multifile.ui.xmltree import LazyXMLTree
+from multifile.ui.xpath import XPathBar
+from multifile.xmlio import iter_stream_xml
+
+# Elements kept in memory while streaming a file; loading stops after that many
+MAX_ELEMENTS = 1000000
 
 class XMLParserApp:
     def __init__(self, root):
         self.root = root
         self.root.title("XML Parser")
+        self.loader = BackgroundLoader(root)
+        self.max_depth = None  # Levels below the root element to keep (None keeps them all)
+        self.keep_tags = None  # Tags of the elements to keep, with their subtrees (None keeps all)
+        self.max_elements = MAX_ELEMENTS
+        self.streamed = None  # StreamedXML being shown
         
         # Load XML button
         self.load_button = tk.Button(root, text="Load XML", command=self.load_xml)
@@ -14,47 +26,85 @@ class XMLParserApp:
         # Frame to display XML content
         self.content_frame = tk.Frame(root)
         self.content_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        self.content_frame.grid_rowconfigure(0, weight=1)
+        self.content_frame.grid_columnconfigure(0, weight=1)
+
+        # Elements are inserted into the tree only when their parent is opened
+        self.tree = ttk.Treeview(self.content_frame, columns=("Attributes", "Text"), show="tree headings")
+        self.tree.heading("#0", text="Tag")
+        self.tree.heading("Attributes", text="Attributes")
+        self.tree.heading("Text", text="Text")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree_model = LazyXMLTree(self.tree)
+
+        # Load progress and Cancel button
+        self.load_status = LoadStatus(root, self.loader)
+        self.load_status.grid(row=2, column=0, padx=10, pady=5, sticky="w")
+
+        # Indexed XPath-style queries over the loaded document
+        self.query_bar = XPathBar(root, on_jump=self.tree_model.reveal)
+        self.query_bar.grid(row=3, column=0, padx=10, pady=5, sticky="w")
         
     def load_xml(self):
+        """Stream an XML file in the background, showing its top-level elements as they are parsed."""
         # Open file dialog to select XML file
         file_path = filedialog.askopenfilename(filetypes=[("XML files", "*.xml")])
         if file_path:
-            # Parse XML file
-            tree = ET.parse(file_path)
-            root_element = tree.getroot()
-            
-            # Clear the content frame before displaying new content
-            for widget in self.content_frame.winfo_children():
-                widget.destroy()
-
-            # Display XML content
-            self.display_xml(root_element, self.content_frame, row=0)
+            # Clear the tree before displaying new content
+            self.tree.delete(*self.tree.get_children())
+            self.streamed = None
+            self.query_bar.clear()
+
+            self.load_status.begin(file_path)
+            self.loader.start(
+                iter_stream_xml(file_path, self.max_depth, self.keep_tags, self.max_elements),
+                on_done=self.on_loaded,
+                on_progress=self.load_status.show_progress,
+                on_partial=self.show_partial,
+                on_error=self.on_load_error,
+                on_cancel=lambda: self.load_status.finish("Loading cancelled"),
+            )
+
+    def show_partial(self, streamed):
+        """Make the top-level elements completed since the last update available in the tree."""
+        if streamed is not self.streamed:
+            self.streamed = streamed
+            self.display_xml(streamed.root, streamed.complete)
+        else:
+            self.tree_model.grow(streamed.complete)
+
+    def on_loaded(self, streamed):
+        """Display the rest of the document once streaming has finished."""
+        if streamed.root is not None:
+            self.show_partial(streamed)
+            self.tree_model.grow(None)
+            self.query_bar.set_root(streamed.root)
+        message = f"Loaded {streamed.kept:,} elements"
+        if streamed.truncated:
+            message += f" (stopped at {self.max_elements:,})"
+        self.load_status.finish(message)
+
+    def on_load_error(self, exc):
+        """Report a failed background load."""
+        self.load_status.finish()
+        messagebox.showerror("Error", f"Failed to load XML file: {exc}")
     
-    def display_xml(self, element, parent, row):
-        """Recursively display XML elements and their attributes in the Tkinter grid."""
-        tk.Label(parent, text=f"Tag: {element.tag}", font=("Arial", 12, "bold")).grid(row=row, column=0, sticky="w")
-        
-        if element.attrib:
-            tk.Label(parent, text=f"Attributes: {element.attrib}", font=("Arial", 10)).grid(row=row, column=1, sticky="w")
-        
-        row += 1
-        
-        if element.text and element.text.strip():
-            tk.Label(parent, text=f"Text: {element.text.strip()}", font=("Arial", 10)).grid(row=row, column=1, sticky="w")
-            row += 1
-        
-        for child in element:
-            row = self.display_xml(child, parent, row)
-        
-        return row
+    def display_xml(self, element, available=None):
+        """Show an element in the tree; only its first page of children is inserted until nodes are opened."""
+        self.tree_model.set_root(element, available)
+
 
-# Create the main window
-root = tk.Tk()
+if __name__ == "__main__":
+    # Create the main window
+    root = tk.Tk()
 
-# Make the window resizable
-root.grid_rowconfigure(1, weight=1)
-root.grid_columnconfigure(0, weight=1)
+    # Make the window resizable
+    root.grid_rowconfigure(1, weight=1)
+    root.grid_columnconfigure(0, weight=1)
 
-# Run the application
-app = XMLParserApp(root)
-root.mainloop()
+    # Run the application
+    app = XMLParserApp(root)
+    root.mainloop()